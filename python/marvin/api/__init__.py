@@ -52,6 +52,8 @@ viewargs = {'name': fields.String(required=True, metadata={"location": 'view_arg
             'colname': fields.String(required=True, metadata={"location": 'view_args'}, allow_none=True),
             'fiberid': fields.Integer(required=True, metadata={"location": 'view_args'},
                                       validate=validate.Range(min=-1, max=5800)),
+            'rss_extension': fields.String(required=True, metadata={"location": 'view_args'},
+                                           validate=validate.Regexp('^[a-zA-Z0-9_]+$')),
             }
 
 # List of all form parameters that are needed in all the API routes
@@ -64,6 +66,8 @@ params = {'query': {'searchfilter': fields.String(allow_none=True),
                     'start': fields.Integer(allow_none=True, validate=validate.Range(min=0)),
                     'end': fields.Integer(allow_none=True, validate=validate.Range(min=0)),
                     'offset': fields.Integer(allow_none=True, validate=validate.Range(min=0)),
+                    'cursor': fields.String(allow_none=True),
+                    'batch_size': fields.Integer(allow_none=True, validate=validate.Range(min=1, max=100000)),
                     'limit': fields.Integer(allow_none=True, missing=100, validate=validate.Range(max=50000)),
                     'sort': fields.String(allow_none=True),
                     'order': fields.String(load_default='asc', validate=validate.OneOf(['asc', 'desc'])),
@@ -75,6 +79,7 @@ params = {'query': {'searchfilter': fields.String(allow_none=True),
                     'return_all': fields.Boolean(allow_none=True),
                     'format_type': fields.String(allow_none=True, validate=validate.OneOf(['list', 'listdict', 'dictlist'])),
                     'caching': fields.Boolean(allow_none=True),
+                    'count_mode': fields.String(allow_none=True, validate=validate.OneOf(['separate', 'window', 'estimate'])),
                     'query_type': fields.String(allow_none=True, validate=validate.OneOf(['raw', 'core', 'orm']))
                     },
           'search': {'searchbox': fields.String(required=True),
@@ -95,6 +100,14 @@ params = {'query': {'searchfilter': fields.String(allow_none=True),
                      'bintemp': fields.String(allow_none=True),
                      'params[]': fields.List(fields.String(), allow_none=True)
                      },
+          'spectra': {'x': fields.DelimitedList(fields.Integer(validate=validate.Range(min=0, max=100)),
+                                                required=True),
+                      'y': fields.DelimitedList(fields.Integer(validate=validate.Range(min=0, max=100)),
+                                                required=True),
+                      'datacube': fields.String(allow_none=True, missing='flux',
+                                                validate=validate.OneOf(['flux', 'dispersion',
+                                                                         'dispersion_prepixel']))
+                      },
           'explore': {'target': fields.String(required=True),
                       'mapchoice': fields.String(allow_none=True),
                       'btchoice': fields.String(allow_none=True)}
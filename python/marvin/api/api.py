@@ -14,6 +14,7 @@ from __future__ import print_function
 from __future__ import division
 from brain.api.api import BrainInteraction
 from marvin import config
+from marvin.api import batches as batchstream
 
 configkeys = ['release', 'session_id', 'compression']
 
@@ -58,6 +59,9 @@ class Interaction(BrainInteraction):
             All matters when Marvin Query return_all is True.
         base (str):
             Optional replacement for domain API url.
+        batches (object):
+            The store of the rows of a response streamed in batches (see
+            `~marvin.api.batches.BatchDecoder`).  Defaults to a list of rows.
 
     Returns:
         results (dict):
@@ -88,6 +92,24 @@ class Interaction(BrainInteraction):
         >>> print(data)
     '''
 
+    def __init__(self, route, *args, batches=None, **kwargs):
+        self.batches = batches
+        super(Interaction, self).__init__(route, *args, **kwargs)
+
+    def _get_content(self, response):
+        ''' Get the response content, decoding streams of batches as they arrive '''
+
+        if batchstream.mimetype not in response.headers.get('Content-Type', ''):
+            return super(Interaction, self)._get_content(response)
+
+        decoder = batchstream.BatchDecoder(compression=self.compression, batches=self.batches)
+        for chunk in response.iter_content(chunk_size=65536):
+            decoder.feed(chunk)
+        decoder.close()
+
+        return {'data': decoder.batches, 'params': decoder.params, 'count': decoder.count,
+                'totalcount': decoder.count}
+
     def _loadConfigParams(self):
         """Load the local configuration into a parameters dictionary to be sent with the request"""
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# batches.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import struct
+
+from brain.utils.general import compress_data, uncompress_data
+
+from marvin.core.exceptions import MarvinError
+
+
+__ALL__ = ('encode_batches', 'BatchDecoder', 'RowBatches')
+
+
+#: The mimetype of a stream of batches.
+mimetype = 'application/x-marvin-batches'
+
+# Each frame is a one-byte kind and the length of the payload, followed by
+# the payload, a value compressed with json or msgpack.
+_frame_header = struct.Struct('>cI')
+
+_kinds = {b'H': 'header', b'B': 'batch', b'E': 'end', b'X': 'error'}
+
+
+def _encode_frame(kind, value, compression):
+    """Returns a frame with ``value`` compressed with ``compression``."""
+
+    payload = compress_data(value, compress_with=compression)
+    if not isinstance(payload, bytes):
+        payload = payload.encode('utf-8')
+
+    return _frame_header.pack(kind, len(payload)) + payload
+
+
+def encode_batches(rows, params, batch_size=1000, compression='json'):
+    """Yields the frames of a stream of rows, in batches.
+
+    The stream starts with a header frame with the ``params`` (the names of
+    the columns), the ``batch_size``, and the ``compression``, followed by
+    one frame per batch of rows, and an end frame with the ``count`` of
+    rows. If iterating over the rows fails, an error frame with the message
+    is sent instead of the end frame.
+
+    Parameters:
+        rows (iterable):
+            The rows to stream, e.g., a SQLAlchemy query.
+        params (list):
+            The names of the columns of the rows.
+        batch_size (int):
+            The number of rows per batch.
+        compression ({'json', 'msgpack'}):
+            The compression of each frame.
+
+    Yields:
+        frame (bytes):
+            The binary frames of the stream.
+
+    """
+
+    yield _encode_frame(b'H', {'params': list(params or []), 'batch_size': batch_size,
+                               'compression': compression}, compression)
+
+    count = 0
+    batch = []
+
+    try:
+        for row in rows:
+            batch.append(list(row))
+            if len(batch) == batch_size:
+                yield _encode_frame(b'B', batch, compression)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            yield _encode_frame(b'B', batch, compression)
+            count += len(batch)
+
+    except Exception as ee:
+        yield _encode_frame(b'X', {'error': '{0}: {1}'.format(ee.__class__.__name__, ee)},
+                            compression)
+        return
+
+    yield _encode_frame(b'E', {'count': count}, compression)
+
+
+class RowBatches(list):
+    """Collects the batches of a stream as a flat list of rows."""
+
+    def append_batch(self, rows):
+        self.extend(rows)
+
+
+class BatchDecoder(object):
+    """Incrementally decodes a stream of batches.
+
+    Bytes are fed in chunks of any size, as they arrive, and each batch is
+    appended to ``batches`` as soon as it is complete.
+
+    Parameters:
+        compression ({'json', 'msgpack'}):
+            The compression of each frame.
+        batches (object):
+            The store of the rows. Must have an ``append_batch`` method that
+            receives the list of rows of each batch. Defaults to a
+            `.RowBatches` list.
+
+    Attributes:
+        params (list):
+            The names of the columns, from the header of the stream.
+        count (int):
+            The number of rows decoded.
+
+    """
+
+    def __init__(self, compression='json', batches=None):
+
+        self.compression = compression
+        self.batches = batches if batches is not None else RowBatches()
+        self.params = None
+        self.count = 0
+
+        self._buffer = bytearray()
+        self._done = False
+
+    def feed(self, chunk):
+        """Decodes the complete frames in the received bytes."""
+
+        self._buffer.extend(chunk)
+
+        while len(self._buffer) >= _frame_header.size:
+
+            kind, length = _frame_header.unpack_from(self._buffer)
+            end = _frame_header.size + length
+            if len(self._buffer) < end:
+                break
+
+            payload = bytes(self._buffer[_frame_header.size:end])
+            del self._buffer[:end]
+
+            self._decode_frame(kind, payload)
+
+    def _decode_frame(self, kind, payload):
+
+        if kind not in _kinds:
+            raise MarvinError('invalid frame in stream of batches.')
+        elif self._done:
+            raise MarvinError('received data after the end of the stream of batches.')
+
+        if self.compression == 'json':
+            payload = payload.decode('utf-8')
+        value = uncompress_data(payload, uncompress_with=self.compression)
+
+        if _kinds[kind] == 'header':
+            self.params = value['params']
+        elif _kinds[kind] == 'batch':
+            self.batches.append_batch(value)
+            self.count += len(value)
+        elif _kinds[kind] == 'error':
+            raise MarvinError('the stream of batches failed: {0}'.format(value['error']))
+        else:
+            if value['count'] != self.count:
+                raise MarvinError('expected {0} rows in the stream of batches '
+                                  'but received {1}.'.format(value['count'], self.count))
+            self._done = True
+
+    def close(self):
+        """Checks that the whole stream was received."""
+
+        if not self._done or len(self._buffer) > 0:
+            raise MarvinError('the stream of batches ended unexpectedly.')
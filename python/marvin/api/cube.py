@@ -360,3 +360,78 @@ class CubeView(BaseView):
             self.results['data']['wavelength'] = cube._wavelength.tolist()
 
         return Response(json.dumps(self.results), mimetype='application/json')
+
+    @route('/<name>/spectra/', methods=['GET', 'POST'], endpoint='getCubeSpectra')
+    @av.check_args(use_params='spectra', required=['x', 'y'])
+    def getCubeSpectra(self, args, name):
+        """Returns the spectra of a datacube for a list of spaxels.
+
+        .. :quickref: Cube; Returns the spectra of a datacube for a list of spaxels
+
+        :param name: The name of the cube as plate-ifu or mangaid
+        :form release: the release of MaNGA
+        :form x: comma-separated list of the x coordinates of the spaxels (origin is ``lower``)
+        :form y: comma-separated list of the y coordinates of the spaxels (origin is ``lower``)
+        :form datacube: the name of the datacube. Defaults to ``flux``.
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson json data: dictionary of returned data
+        :json list value: the (N, nwave) array of spectra
+        :json list ivar: the (N, nwave) array of inverse variances, or null
+        :json list mask: the (N, nwave) array of masks, or null
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           POST /marvin/api/cubes/8485-1901/spectra/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+           x=10,11&y=12,12
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": {"value": [[0,0,..0], [0,0,..0]], "ivar": ..., "mask": ...}
+           }
+        """
+
+        # Pass the args in and get the cube
+        x = args.pop('x')
+        y = args.pop('y')
+        datacube = args.pop('datacube', None) or 'flux'
+        args = self._pop_args(args, arglist=['name'])
+        cube, res = _getCube(name, **args)
+        self.update_results(res)
+
+        if cube:
+
+            try:
+                spectra = cube.get_spectra(x=x, y=y, xyorig='lower', datacube=datacube)
+            except Exception as ee:
+                self.results['error'] = 'Failed to retrieve spectra: {0}'.format(str(ee))
+                self.results['status'] = -1
+            else:
+                ivar = spectra.ivar.tolist() if spectra.ivar is not None else None
+                mask = spectra.mask.tolist() if spectra.mask is not None else None
+                self.results['data'] = {'value': spectra.value.tolist(),
+                                        'ivar': ivar,
+                                        'mask': mask}
+
+        return Response(json.dumps(self.results), mimetype='application/json')
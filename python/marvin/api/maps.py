@@ -13,6 +13,7 @@ from __future__ import absolute_import
 from flask_classful import route
 from flask import jsonify
 
+import marvin
 import marvin.api.base
 import marvin.core.exceptions
 import marvin.tools.maps
@@ -417,6 +418,25 @@ class MapsView(marvin.api.base.BaseView):
 
             self.results['data'] = {}
 
+            if (maps.data_origin == 'file' and
+                    marvin.config._custom_config.get('maps_property_block', False)):
+
+                # Gathers all the quantities from the property block at once.
+                block = maps.get_property_block()
+                dtypes = block['dtypes']
+
+                values = block['value'][:, y, x].tolist()
+                ivars = block['ivar'][:, y, x].tolist()
+                masks = block['mask'][:, y, x].tolist()
+
+                for ii, quant in enumerate(block['names']):
+                    self.results['data'][quant] = {
+                        'value': values[ii],
+                        'ivar': ivars[ii] if dtypes['ivar'][ii] is not None else None,
+                        'mask': masks[ii] if dtypes['mask'][ii] is not None else None}
+
+                return jsonify(self.results)
+
             spaxel_quantities = maps._get_spaxel_quantities(x, y)
 
             for quant in spaxel_quantities:
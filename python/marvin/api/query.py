@@ -15,6 +15,7 @@ from brain.utils.general.decorators import public
 from flask import Response, jsonify, redirect, stream_with_context, url_for
 from flask_classful import route
 from marvin import config
+from marvin.api import batches
 from marvin.api.base import arg_validate as av
 from marvin.api.base import BaseView
 from marvin.core.exceptions import MarvinError
@@ -77,7 +78,9 @@ def _getCubes(searchfilter, **kwargs):
     # set up the output
     output = dict(data=results, query=r.showQuery(), chunk=limit,
                   filter=searchfilter, params=q.params, returnparams=returnparams, runtime=_get_runtime(q),
-                  queryparams_order=q._query_params_order, count=len(results), totalcount=r.totalcount)
+                  queryparams_order=q._query_params_order, count=len(results),
+                  totalcount=r.totalcount, cursors=r.cursors, cached=q._cache_hit,
+                  approximate_totalcount=r.approximate_totalcount)
     return output
 
 
@@ -208,10 +211,18 @@ class QueryView(BaseView):
     @route('/stream/', methods=['GET', 'POST'], endpoint='stream')
     @av.check_args(use_params='query', required='searchfilter')
     def stream(self, args):
-        ''' test query generator stream '''
+        ''' Streams all the results of a query
+
+        By default, each row is sent compressed on its own line.  If ``batch_size``
+        is set, the results are sent as a binary stream of batches of rows, with
+        a header containing the parameters, that can be decoded as it arrives
+        with `~marvin.api.batches.BatchDecoder`.
+
+        '''
 
         searchfilter = args.pop('searchfilter', None)
         compression = args.pop('compression', config.compression)
+        batch_size = args.pop('batch_size', None)
         mimetype = 'json' if compression == 'json' else 'octet-stream'
 
         release = args.pop('release', None)
@@ -223,6 +234,11 @@ class QueryView(BaseView):
                       filter=searchfilter, params=q.params, returnparams=q.return_params, runtime=None,
                       queryparams_order=q._query_params_order, count=None, totalcount=None)
 
+        if batch_size:
+            frames = batches.encode_batches(q.query, q.params, batch_size=batch_size,
+                                            compression=compression)
+            return Response(stream_with_context(frames), mimetype=batches.mimetype)
+
         return Response(stream_with_context(gen(q.query, compression=compression, params=q.params)), mimetype='application/{0}'.format(mimetype))
 
     @route('/cubes/', methods=['GET', 'POST'], endpoint='querycubes')
@@ -239,6 +255,7 @@ class QueryView(BaseView):
         :form limit: the limiting number of results to return for large results
         :form sort: a string parameter name to sort on
         :form order: the order of the sort, either ``desc`` or ``asc``
+        :form count_mode: how to count the total results, ``separate``, ``window``, or ``estimate``
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -254,7 +271,10 @@ class QueryView(BaseView):
         :json list queryparams_order: the list of parameters used in the query
         :json dict runtime: a dictionary of query time (days, minutes, seconds)
         :json int totalcount: the total count of results
+        :json bool approximate_totalcount: whether the total count is a planner estimate
         :json int count: the count in the current page of results
+        :json dict cursors: the ``previous`` and ``next`` pagination cursors of the page
+        :json bool cached: whether the page was found in the query results cache
         :resheader Content-Type: application/json
         :statuscode 200: no error
         :statuscode 422: invalid input parameters
@@ -403,6 +423,8 @@ class QueryView(BaseView):
         :form limit: the limiting number of results to return for large results
         :form sort: a string parameter name to sort on
         :form order: the order of the sort, either ``desc`` or ``asc``
+        :form count_mode: how to count the total results, ``separate``, ``window``, or ``estimate``
+        :form cursor: a ``cursors`` value of the previous page, to seek the page from
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -418,7 +440,10 @@ class QueryView(BaseView):
         :json list queryparams_order: the list of parameters used in the query
         :json dict runtime: a dictionary of query time (days, minutes, seconds)
         :json int totalcount: the total count of results
+        :json bool approximate_totalcount: whether the total count is a planner estimate
         :json int count: the count in the current page of results
+        :json dict cursors: the ``previous`` and ``next`` pagination cursors of the page
+        :json bool cached: whether the page was found in the query results cache
         :resheader Content-Type: application/json
         :statuscode 200: no error
         :statuscode 422: invalid input parameters
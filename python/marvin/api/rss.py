@@ -26,7 +26,7 @@ import marvin
 from marvin.api.base import BaseView
 from marvin.api.base import arg_validate as av
 from marvin.core.exceptions import MarvinError
-from marvin.utils.general import mangaid2plateifu, parseIdentifier
+from marvin.utils.general import encode_array, mangaid2plateifu, parseIdentifier
 
 
 def _getRSS(name, use_file=True, release=None, **kwargs):
@@ -236,3 +236,77 @@ class RSSView(BaseView):
                     self.results['data'][ext.name] = ext.data.tolist()
 
         return jsonify(self.results)
+
+    @route('/<name>/extensions/<rss_extension>/', methods=['GET', 'POST'],
+           endpoint='getRSSExtension')
+    @av.check_args()
+    def getExtension(self, args, name, rss_extension):
+        """Returns the full array of an RSS extension, for all the fibres.
+
+        The array is returned in binary form (see
+        `~marvin.utils.general.general.encode_array`) so that all the fibres
+        can be retrieved in a single request.
+
+        .. :quickref: RSS; Get the array of an RSS extension for all the fibres.
+
+        :param name: The name of the cube as plate-ifu or mangaid
+        :param rss_extension: The name of the RSS extension (e.g., flux or ivar)
+        :form release: the release of MaNGA
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson json data: dictionary of returned data
+        :json string dtype: the dtype of the array
+        :json list shape: the shape of the array, (nfibers, nwave) for RSS extensions
+        :json string buffer: the base64-encoded bytes of the array
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           GET /marvin/api/rss/8485-1901/extensions/flux/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": {"dtype": ">f4",
+                       "shape": [171, 4563],
+                       "buffer": "AAAAAD8AAAA..."
+              }
+           }
+
+        """
+
+        # Pop any args we don't want going into Rss
+        args = self._pop_args(args, arglist=['name', 'rss_extension'])
+
+        rss, res = _getRSS(name, **args)
+        self.update_results(res)
+
+        if rss:
+
+            ext_name = rss_extension.upper()
+
+            if ext_name not in rss.data or rss.data[ext_name].data is None:
+                self.results['status'] = -1
+                self.results['error'] = 'RSS extension {0!r} not found.'.format(rss_extension)
+            else:
+                self.results['data'] = encode_array(rss.data[ext_name].data)
+
+        return jsonify(self.results)
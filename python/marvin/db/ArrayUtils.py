@@ -12,8 +12,10 @@ Revision History:
 '''
 from __future__ import print_function
 from __future__ import division
-from sqlalchemy import type_coerce
+import numpy as np
+from sqlalchemy import func, type_coerce
 from sqlalchemy.dialects.postgresql import *
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 
 # __getitem__ broken for postgres ARRAY type
@@ -49,3 +51,127 @@ class ARRAY_D(ARRAY):
                 )
             return super_
     comparator_factory = Comparator
+
+
+# Numpy dtypes of the postgres element types that can be decoded directly
+# from the binary output of array_send, keyed by type OID.
+_binary_dtypes = {16: '?', 21: '>i2', 23: '>i4', 20: '>i8', 700: '>f4', 701: '>f8'}
+
+
+def decode_array_send(buffer):
+    ''' Decodes the output of postgres ``array_send`` into a numpy array
+
+    ``array_send`` returns the binary (``COPY BINARY``) representation of an
+    array: a header with the number of dimensions, a null flag, the element
+    type OID, and the size of each dimension, followed by each element
+    prefixed with its length in bytes. For fixed-size element types the
+    elements are decoded at once with a structured dtype.
+
+    Parameters:
+        buffer (bytes):
+            The bytea returned by ``array_send``.
+
+    Returns:
+        A numpy array with the same shape as the postgres array, or None if
+        the element type cannot be decoded. Null elements are returned as NaN.
+
+    '''
+
+    buffer = bytes(buffer)
+
+    ndim, hasnull, oid = np.frombuffer(buffer, dtype='>i4', count=3)
+    if oid not in _binary_dtypes:
+        return None
+
+    dtype = np.dtype(_binary_dtypes[oid])
+
+    if ndim == 0:
+        return np.array([], dtype=dtype.newbyteorder('='))
+
+    dims = np.frombuffer(buffer, dtype='>i4', count=2 * ndim, offset=12)[::2]
+    offset = 12 + 8 * ndim
+
+    if not hasnull:
+        elements = np.frombuffer(buffer, dtype=[('len', '>i4'), ('value', dtype)],
+                                 count=int(np.prod(dims)), offset=offset)
+        return elements['value'].astype(dtype.newbyteorder('=')).reshape(dims)
+
+    # With nulls the elements are not evenly spaced, so they are read one by one.
+    values = np.empty(int(np.prod(dims)), dtype=np.float64)
+    for ii in range(len(values)):
+        length = int(np.frombuffer(buffer, dtype='>i4', count=1, offset=offset)[0])
+        offset += 4
+        if length < 0:
+            values[ii] = np.nan
+        else:
+            values[ii] = np.frombuffer(buffer, dtype=dtype, count=1, offset=offset)[0]
+            offset += length
+
+    return values.reshape(dims)
+
+
+def get_bulk_arrays(session, columns, filters, order_by, cache_region=None):
+    ''' Returns the values of ``columns`` for all matching rows in one query
+
+    On postgres, each column is aggregated server-side with
+    ``array_send(array_agg(column ORDER BY ...))`` so that the whole column
+    is transferred as a single binary buffer and decoded with numpy,
+    instead of building one Python row per table row. On other backends,
+    or for element types that cannot be decoded, the rows are retrieved
+    with a single ordinary query.
+
+    Parameters:
+        session:
+            The SQLAlchemy session.
+        columns (list):
+            The column attributes to retrieve.
+        filters (list):
+            The filter expressions selecting the rows.
+        order_by (list):
+            The columns that define the order of the rows.
+        cache_region (str):
+            The dogpile cache region in which the arrays are cached, if any.
+            On postgres, the decoded arrays are cached with a key made from
+            the SQL of the aggregate query.
+
+    Returns:
+        A list of numpy arrays, one per column, each with the rows in the
+        first axis followed by the dimensions of the column (e.g.,
+        ``(nspaxels, nwave)`` for a spectrum column).
+
+    '''
+
+    dialect = session.get_bind().dialect
+
+    if dialect.name == 'postgresql':
+
+        aggregates = [func.array_send(func.array_agg(aggregate_order_by(column, *order_by)))
+                      for column in columns]
+        query = session.query(*aggregates).filter(*filters)
+
+        def get_arrays():
+            buffers = query.one()
+            if any(buff is None for buff in buffers):
+                return None
+            arrays = [decode_array_send(buff) for buff in buffers]
+            return arrays if all(array is not None for array in arrays) else None
+
+        if cache_region is None:
+            arrays = get_arrays()
+        else:
+            from marvin.db.caching import regions
+            compiled = query.statement.compile(dialect=dialect)
+            key = ' '.join(['bulk_arrays', str(compiled)] +
+                           [str(compiled.params[name]) for name in sorted(compiled.params)])
+            arrays = regions[cache_region].get_or_create(key, get_arrays)
+
+        if arrays is not None:
+            return arrays
+
+    query = session.query(*columns).filter(*filters).order_by(*order_by)
+    if cache_region is not None:
+        query = query.use_cache(cache_region)
+
+    rows = query.all()
+
+    return [np.array([row[ii] for row in rows]) for ii in range(len(columns))]
@@ -14,6 +14,7 @@
 from __future__ import print_function, division, absolute_import
 from marvin import config
 from hashlib import md5
+from dogpile.cache.api import NO_VALUE
 from dogpile.cache.region import make_region
 import os
 import copy
@@ -114,6 +115,40 @@ def make_new_region(name='cache.dbm', backend='file', expiration=3600, redis_exp
     return reg
 
 
+def get_generation(region, name):
+    ''' get the generation of a named group of keys in a cache region
+
+    The generation is part of the cache keys of the group, so that all its
+    values can be invalidated at once with `invalidate_generation`.
+
+    Parameters:
+        region (str):
+            The name of the cache region
+        name (str):
+            The name of the group of keys, e.g. a release
+
+    Returns:
+        The generation of the group, starting at 0
+    '''
+    value = regions[region].get('generation:{0}'.format(name), ignore_expiration=True)
+    return 0 if value is NO_VALUE else value
+
+
+def invalidate_generation(region, name):
+    ''' invalidate all the values of a named group of keys in a cache region
+
+    Increments the generation of the group, so that its existing keys are no
+    longer looked up, and expire from the cache.
+
+    Parameters:
+        region (str):
+            The name of the cache region
+        name (str):
+            The name of the group of keys, e.g. a release
+    '''
+    regions[region].set('generation:{0}'.format(name), get_generation(region, name) + 1)
+
+
 # make a default cache region
 regions['default'] = make_new_region()
 
@@ -132,3 +167,8 @@ regions['maps'] = make_new_region(backend=backend)
 
 # make a modelcube redis cache
 regions['models'] = make_new_region(backend=backend)
+
+# make a cache of query results
+query_expiration = config._custom_config.get('query_cache_expiration', 3600)
+regions['query'] = make_new_region(name='query_results', backend=backend,
+                                   expiration=query_expiration)
@@ -14,6 +14,7 @@ import marvin.db.models.DataModelClasses as datadb
 import numpy as np
 from astropy.io import fits
 from marvin.core.caching_query import RelationshipCache
+from marvin.db.ArrayUtils import get_bulk_arrays
 from marvin.db.database import db
 from marvin.utils.datamodel.dap import datamodel
 from sqlalchemy import Float, ForeignKeyConstraint, and_, case, cast, select, inspect
@@ -346,22 +347,20 @@ class ModelCube(Base):
         For example, ``modelcube.get3DCube('flux')`` will return the original
         flux cube with the same ordering as the FITS data cube.
 
-        Note that this method seems to be really slow retrieving arrays (this
-        is especially serious for large IFUs).
+        The whole column is retrieved in a single query (see
+        `~marvin.db.ArrayUtils.get_bulk_arrays`) and reshaped using the
+        `.CubeShape` of the associated DRP cube.
 
         """
 
         session = db.Session.object_session(self)
-        spaxels = session.query(getattr(ModelSpaxel, extension)).filter(
-            ModelSpaxel.modelcube_pk == self.pk).order_by(ModelSpaxel.x, ModelSpaxel.y).all()
+        spaxels, = get_bulk_arrays(session, [getattr(ModelSpaxel, extension)],
+                                   [ModelSpaxel.modelcube_pk == self.pk],
+                                   [ModelSpaxel.y, ModelSpaxel.x])
 
-        # Assumes cubes are always square (!)
-        nx = ny = int(np.sqrt(len(spaxels)))
-        nwave = len(spaxels[0][0])
+        ny, nx = self.file.cube.shape.shape
 
-        spArray = np.array(spaxels)
-
-        return spArray.transpose().reshape((nwave, ny, nx)).transpose(0, 2, 1)
+        return spaxels.reshape((ny, nx, -1)).transpose(2, 0, 1)
 
 
 class ModelSpaxel(Base):
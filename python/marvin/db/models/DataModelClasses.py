@@ -15,7 +15,7 @@ import numpy as np
 from astropy.io import fits
 from flask_login import UserMixin
 from marvin.core.caching_query import RelationshipCache
-from marvin.db.ArrayUtils import ARRAY_D
+from marvin.db.ArrayUtils import ARRAY_D, get_bulk_arrays
 from marvin.db.database import db
 from sqlalchemy import and_, func, select, inspect  # for aggregate, other functions
 from sqlalchemy.dialects.postgresql import *
@@ -333,22 +333,19 @@ class Cube(Base, ArrayOps):
         For example, ``cube.get3DCube('flux')`` will return the original
         flux cube with the same ordering as the FITS data cube.
 
-        Note that this method seems to be really slow retrieving arrays (this
-        is especially serious for large IFUs).
+        The whole column is retrieved in a single query (see
+        `~marvin.db.ArrayUtils.get_bulk_arrays`) and reshaped using the
+        `.CubeShape` of the cube.
 
         """
 
         session = Session.object_session(self)
-        spaxels = session.query(getattr(Spaxel, extension)).filter(
-            Spaxel.cube_pk == self.pk).order_by(Spaxel.x, Spaxel.y).all()
+        spaxels, = get_bulk_arrays(session, [getattr(Spaxel, extension)],
+                                   [Spaxel.cube_pk == self.pk], [Spaxel.y, Spaxel.x])
 
-        # Assumes cubes are always square (!)
-        nx = ny = int(np.sqrt(len(spaxels)))
-        nwave = len(spaxels[0][0])
+        ny, nx = self.shape.shape
 
-        spArray = np.array(spaxels)
-
-        return spArray.transpose().reshape((nwave, ny, nx)).transpose(0, 2, 1)
+        return spaxels.reshape((ny, nx, -1)).transpose(2, 0, 1)
 
     @hybrid_property
     def plateifu(self):
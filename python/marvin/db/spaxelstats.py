@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# spaxelstats.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+from operator import eq, ge, gt, le, lt, ne
+
+import numpy as np
+from sqlalchemy import (Column, Integer, LargeBinary, MetaData, String, Table, case,
+                        create_engine, func, select)
+
+from marvin import config
+from marvin.core.exceptions import MarvinError
+
+
+__all__ = ('SpaxelStats', 'get_spaxel_stats')
+
+
+_metadata = MetaData()
+
+# the maximum file_pk of each SpaxelProp table when its statistics were built
+_tables = Table('tables', _metadata,
+                Column('spaxelclass', String, primary_key=True),
+                Column('maxfile', Integer))
+
+# the number of good spaxels of each file
+_goodcounts = Table('goodcounts', _metadata,
+                    Column('spaxelclass', String, primary_key=True),
+                    Column('file_pk', Integer, primary_key=True),
+                    Column('goodcount', Integer))
+
+# the bin edges of each property
+_edges = Table('edges', _metadata,
+               Column('spaxelclass', String, primary_key=True),
+               Column('param', String, primary_key=True),
+               Column('edges', LargeBinary))
+
+# the number of values of a property, followed by the number of values
+# greater than or equal to each bin edge, for each file
+_counts = Table('counts', _metadata,
+                Column('spaxelclass', String, primary_key=True),
+                Column('param', String, primary_key=True),
+                Column('file_pk', Integer, primary_key=True),
+                Column('counts', LargeBinary))
+
+# stores opened by get_spaxel_stats
+_stores = {}
+
+
+def _get_table_name(spaxelclass):
+    """Returns the full name of the table of a SpaxelProp model class."""
+
+    return spaxelclass.__table__.fullname
+
+
+def _count_bounds(cumulative, edges, op, value):
+    """Returns the bounds of the number of values of each file satisfying a condition.
+
+    Parameters:
+        cumulative (ndarray):
+            The number of values of each file, followed by the number of values
+            greater than or equal to each of the ``edges``, one row per file.
+        edges (ndarray):
+            The sorted bin edges.
+        op (callable):
+            The comparison operator of the condition, e.g. `operator.gt`.
+        value (float):
+            The value the property is compared to.
+
+    Returns:
+        lower, upper (ndarray):
+            The lower and upper bounds of the number of values of each file
+            satisfying ``op(value of property, value)``.
+
+    """
+
+    # add the number of values greater than infinity
+    cumulative = np.hstack([cumulative, np.zeros((len(cumulative), 1), dtype=cumulative.dtype)])
+    total = cumulative[:, 0]
+
+    # the value is in the bin starting at the k-th edge
+    kk = np.searchsorted(edges, value, side='right')
+    at_edge = kk > 0 and edges[kk - 1] == value
+
+    if op in (ge, lt):
+        if at_edge:
+            lower = upper = cumulative[:, kk]
+        else:
+            lower, upper = cumulative[:, kk + 1], cumulative[:, kk]
+    elif op in (gt, le):
+        lower, upper = cumulative[:, kk + 1], cumulative[:, kk]
+    elif op in (eq, ne):
+        lower, upper = np.zeros_like(total), cumulative[:, kk] - cumulative[:, kk + 1]
+    else:
+        raise MarvinError('cannot compute the bounds of operator {0!r}'.format(op))
+
+    if op in (lt, le, ne):
+        lower, upper = total - upper, total - lower
+
+    return lower, upper
+
+
+class SpaxelStats(object):
+    """Precomputed per-file statistics of SpaxelProp tables, stored in SQLite.
+
+    For each MAPS file, the store keeps the number of good spaxels and, for
+    each property, the number of spaxels whose value is greater than or equal
+    to each of a set of bin edges, which are quantiles of the property over
+    the whole table. These bound the number of spaxels of each file satisfying
+    any condition on the property, which is used to evaluate ``npergood``
+    filters without scanning the SpaxelProp table (see `.select_files`).
+
+    The statistics are built with `.build`, or the ``build_spaxel_stats``
+    script, and must be rebuilt when files are added to the table.
+
+    Parameters:
+        path (str):
+            The path to the SQLite file.
+
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        self.engine = create_engine('sqlite:///{0}'.format(path))
+        _metadata.create_all(self.engine)
+        self._cache = {}
+
+    def __repr__(self):
+        return '<SpaxelStats (path={0!r})>'.format(self.path)
+
+    def build(self, session, spaxelclass, params, bins=64, stride=100, edges=None):
+        """Builds the statistics of a SpaxelProp table.
+
+        Replaces any existing statistics of the table. Runs one grouped query
+        for the good spaxels and one per property. The bin edges are quantiles
+        of the values of every ``stride``-th spaxel.
+
+        Parameters:
+            session (object):
+                The SQLAlchemy session of the database.
+            spaxelclass (object):
+                The SpaxelProp model class.
+            params (list):
+                The names of the columns to compute histograms for.
+            bins (int):
+                The number of bins of each property.
+            stride (int):
+                Take one in ``stride`` spaxels, by primary key, to compute the
+                bin edges.
+            edges (dict):
+                Optional bin edges to use for some of the ``params``, e.g., to
+                include the values most used in filters.
+
+        """
+
+        name = _get_table_name(spaxelclass)
+        edges = edges or {}
+
+        # count the good spaxels of each file
+        good = session.query(spaxelclass.file_pk, func.count(spaxelclass.pk))
+        if 'CleanSpaxelProp' not in spaxelclass.__name__:
+            good = good.filter(spaxelclass.binid != -1)
+        good = good.group_by(spaxelclass.file_pk).all()
+
+        maxfile = session.query(func.max(spaxelclass.file_pk)).scalar()
+
+        histograms = {}
+        for param in params:
+            column = getattr(spaxelclass, param)
+
+            param_edges = edges.get(param, None)
+            if param_edges is None:
+                sample = session.query(column).filter(spaxelclass.pk % stride == 0,
+                                                      column.isnot(None)).all()
+                values = np.array([row[0] for row in sample], dtype=float)
+                values = values[np.isfinite(values)]
+                quantiles = np.linspace(0, 1, bins + 1)
+                param_edges = np.quantile(values, quantiles) if len(values) else []
+            param_edges = np.unique(np.asarray(param_edges, dtype=float))
+
+            # count the values, and the values above each edge, of each file
+            columns = [func.count(column)]
+            columns += [func.sum(case([(column >= float(edge), 1)], else_=0))
+                        for edge in param_edges]
+            rows = session.query(spaxelclass.file_pk, *columns).\
+                group_by(spaxelclass.file_pk).all()
+            histograms[param] = (param_edges, rows)
+
+        with self.engine.begin() as conn:
+            for table in [_tables, _goodcounts, _edges, _counts]:
+                conn.execute(table.delete().where(table.c.spaxelclass == name))
+
+            conn.execute(_tables.insert(), [{'spaxelclass': name, 'maxfile': maxfile}])
+            if good:
+                conn.execute(_goodcounts.insert(),
+                             [{'spaxelclass': name, 'file_pk': file_pk, 'goodcount': count}
+                              for file_pk, count in good])
+
+            for param, (param_edges, rows) in histograms.items():
+                conn.execute(_edges.insert(), [{'spaxelclass': name, 'param': param,
+                                                'edges': param_edges.tobytes()}])
+                if rows:
+                    conn.execute(_counts.insert(),
+                                 [{'spaxelclass': name, 'param': param, 'file_pk': row[0],
+                                   'counts': np.array([int(cc or 0) for cc in row[1:]],
+                                                      dtype=np.int64).tobytes()}
+                                  for row in rows])
+
+        self._cache = {}
+
+    def _load(self, name, param):
+        """Returns the statistics of a property, or None if they were not built."""
+
+        if (name, param) in self._cache:
+            return self._cache[(name, param)]
+
+        stats = None
+        with self.engine.connect() as conn:
+            maxfile = conn.execute(select([_tables.c.maxfile]).where(
+                _tables.c.spaxelclass == name)).scalar()
+            edges = conn.execute(select([_edges.c.edges]).where(
+                (_edges.c.spaxelclass == name) & (_edges.c.param == param))).scalar()
+
+            if maxfile is not None and edges is not None:
+                good = dict(conn.execute(select([_goodcounts.c.file_pk, _goodcounts.c.goodcount]).
+                                         where(_goodcounts.c.spaxelclass == name)).fetchall())
+                rows = conn.execute(select([_counts.c.file_pk, _counts.c.counts]).where(
+                    (_counts.c.spaxelclass == name) & (_counts.c.param == param))).fetchall()
+
+                edges = np.frombuffer(edges, dtype=float)
+                files = np.array([row[0] for row in rows], dtype=np.int64)
+                cumulative = np.array([np.frombuffer(row[1], dtype=np.int64) for row in rows],
+                                      dtype=np.int64).reshape(len(rows), len(edges) + 1)
+                goodcounts = np.array([good.get(file_pk, 0) for file_pk in files], dtype=np.int64)
+                stats = (maxfile, files, goodcounts, edges, cumulative)
+
+        self._cache[(name, param)] = stats
+        return stats
+
+    def select_files(self, session, spaxelclass, column, op, value, percent_op, percent):
+        """Returns the files where a condition is true in a percentage of the good spaxels.
+
+        Evaluates an ``npergood(column op value) percent_op percent`` filter,
+        i.e., selects the files where the number of spaxels satisfying
+        ``op(column, value)`` is positive and satisfies
+        ``percent_op(count, percent * goodcount)``. Files are decided from the
+        bounds on their counts given by the statistics, and only the files
+        whose bounds do not decide the filter are counted exactly in the
+        database. The result is exact.
+
+        Parameters:
+            session (object):
+                The SQLAlchemy session of the database.
+            spaxelclass (object):
+                The SpaxelProp model class.
+            column (object):
+                The column of ``spaxelclass`` in the condition.
+            op (callable):
+                The comparison operator of the condition, e.g. `operator.gt`.
+            value (float):
+                The value the column is compared to.
+            percent_op (callable):
+                The comparison operator of the count of spaxels.
+            percent (float):
+                The fraction of good spaxels the count is compared to.
+
+        Returns:
+            files (list):
+                The primary keys of the selected files, or None if there are no
+                statistics of the column, or they are out of date.
+
+        """
+
+        stats = self._load(_get_table_name(spaxelclass), column.key)
+        if stats is None:
+            return None
+
+        # check that no files were added since the statistics were built
+        maxfile, files, goodcounts, edges, cumulative = stats
+        if session.query(func.max(spaxelclass.file_pk)).scalar() != maxfile:
+            return None
+
+        lower, upper = _count_bounds(cumulative, edges, op, value)
+        threshold = percent * goodcounts
+
+        lower_passes = (lower > 0) & percent_op(lower, threshold)
+        upper_passes = (upper > 0) & percent_op(upper, threshold)
+
+        # the filter is monotonic in the count between the bounds, except at 0
+        if percent_op in (gt, ge):
+            decided = lower_passes == upper_passes
+        elif percent_op in (lt, le):
+            decided = (lower_passes == upper_passes) & (lower > 0)
+        else:
+            decided = np.zeros(len(files), dtype=bool)
+        decided |= lower == upper
+
+        good = goodcounts > 0
+        selected = set(files[good & decided & lower_passes].tolist())
+
+        # count the undecided files exactly
+        undecided = files[good & ~decided].tolist()
+        if undecided:
+            index = dict(zip(files.tolist(), threshold))
+            counts = session.query(spaxelclass.file_pk, func.count(spaxelclass.pk)).\
+                filter(op(column, value), spaxelclass.file_pk.in_(undecided)).\
+                group_by(spaxelclass.file_pk).all()
+            selected.update(file_pk for file_pk, count in counts
+                            if count > 0 and percent_op(count, index[file_pk]))
+
+        return sorted(selected)
+
+
+def get_spaxel_stats(path=None):
+    """Returns the `.SpaxelStats` of the ``spaxel_stats`` file of the custom config.
+
+    Parameters:
+        path (str):
+            The path to the SQLite file. Defaults to the ``spaxel_stats``
+            option of the custom config.
+
+    Returns:
+        stats (`.SpaxelStats`):
+            The statistics, or None if the file is not set or does not exist.
+
+    """
+
+    path = path or config._custom_config.get('spaxel_stats', None)
+    if not path:
+        return None
+
+    path = os.path.realpath(os.path.expanduser(os.path.expandvars(path)))
+    if not os.path.isfile(path):
+        return None
+
+    if path not in _stores:
+        _stores[path] = SpaxelStats(path)
+
+    return _stores[path]
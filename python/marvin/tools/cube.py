@@ -15,6 +15,7 @@ from __future__ import absolute_import, division, print_function
 import warnings
 
 import numpy as np
+from astropy import units
 from astropy.io import fits
 from astropy.wcs import WCS
 
@@ -24,14 +25,20 @@ import marvin.tools.maps
 import marvin.tools.spaxel
 import marvin.utils.general.general
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
-from marvin.tools.quantities import DataCube, Spectrum
+from marvin.tools.quantities import DataCube, LazyDataCube, Map, Spectrum
 from marvin.utils.datamodel.drp import datamodel
-from marvin.utils.general import FuzzyDict, get_nsa_data, gunzip, get_dapall_table
+from marvin.utils.general.maskbit import Maskbit
+from marvin.utils.general import (FuzzyDict, get_nsa_data, gunzip, get_dapall_table,
+                                  get_fits_cache, get_spaxel_cache, SpaxelMajorCache)
 
 from .core import MarvinToolsClass
 from .mixins import GetApertureMixIn, NSAMixIn
 
 
+# Number of wavelength pixels read at once by Cube.collapse and Cube.moment_map.
+_collapse_chunk_size = 256
+
+
 class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
     """A class to interface with MaNGA DRP data cubes.
 
@@ -55,6 +62,9 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
         # don't need to be retrieved again.
         self._extension_data = {}
 
+        # Spaxel-major copy of the datacubes, if it has been built.
+        self._spaxel_cache = None
+
         # Datacubes and spectra
         self._flux = None
         self._spectral_resolution = None
@@ -176,9 +186,13 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
         if data is not None:
             assert isinstance(data, fits.HDUList), 'data is not an HDUList object'
         else:
+            fits_cache = get_fits_cache()
             try:
-                with gunzip(self.filename) as gg:
-                    self.data = fits.open(gg.name)
+                if fits_cache is not None:
+                    self.data = fits_cache.open(self.filename)
+                else:
+                    with gunzip(self.filename) as gg:
+                        self.data = fits.open(gg.name)
             except (IOError, OSError) as err:
                 raise OSError('filename {0} cannot be found: {1}'.format(self.filename, err))
 
@@ -190,6 +204,8 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
         self._wavelength = self.data['WAVE'].data
         self._shape = (self.header['NAXIS2'], self.header['NAXIS1'])
 
+        self._spaxel_cache = get_spaxel_cache(self.filename)
+
         self._do_file_checks(self)
 
     def _load_cube_from_db(self, data=None):
@@ -255,9 +271,27 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
         return
 
     def _get_datacube(self, name):
-        """Returns a `.DataCube`."""
+        """Returns a `.DataCube`.
+
+        If the cube is loaded from a file and ``lazy_datacubes`` is set in
+        the custom config, returns a `.LazyDataCube` that only reads the
+        slices of the extension that are requested.
+
+        """
 
         model = self.datamodel.datacubes[name]
+
+        if self.data_origin == 'file' and marvin.config._custom_config.get('lazy_datacubes',
+                                                                           False):
+            ivar_ext = self._get_ext_name(model, 'ivar')
+            mask_ext = self._get_ext_name(model, 'mask')
+
+            return LazyDataCube(self.data[model.fits_extension()],
+                                np.array(self._wavelength),
+                                ivar_hdu=self.data[ivar_ext] if ivar_ext else None,
+                                mask_hdu=self.data[mask_ext] if mask_ext else None,
+                                unit=model.unit, pixmask_flag=model.pixmask_flag)
+
         cube_data = self._get_extension_data(name)
 
         if cube_data is None:
@@ -453,7 +487,10 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
                         extname = dm.fits_extension(None if key == 'value' else key)
 
                         if dm in self.datamodel.datacubes:
-                            data[key] = self.data[extname].data[:, y, x]
+                            if self._spaxel_cache is not None:
+                                data[key] = self._spaxel_cache.read(self.data, extname, y, x)
+                            else:
+                                data[key] = self.data[extname].data[:, y, x]
                         else:
                             data[key] = self.data[extname].data
 
@@ -529,6 +566,435 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
 
         return cube_quantities
 
+    def get_spectra(self, x=None, y=None, ra=None, dec=None, xyorig=None, datacube='flux'):
+        """Returns the spectra for a set of spaxels as a single `.Spectrum`.
+
+        Unlike :func:`getSpaxel`, no `~marvin.tools.spaxel.Spaxel` objects are
+        created. The value, ivar, and mask of ``datacube`` are retrieved for
+        all the input coordinates at once (a single read of each extension
+        for file access, a single query for DB access, and a single request
+        for API access) and returned stacked in a 2D `.Spectrum` of shape
+        ``(N, nwave)``, where the rows follow the order of the input
+        coordinates.
+
+        Parameters:
+            x,y (int or array):
+                The spaxel coordinates relative to ``xyorig``.
+            ra,dec (float or array):
+                The celestial coordinates of the spaxels. The closest spaxel
+                to each pair of coordinates is used.
+            xyorig ({'center', 'lower'}):
+                The reference point from which ``x`` and ``y`` are measured.
+                Defaults to ``marvin.config.xyorig``.
+            datacube (str):
+                The name of the datacube from which the spectra will be
+                extracted. Defaults to ``'flux'``.
+
+        Returns:
+            spectra (`.Spectrum`):
+                A `.Spectrum` of shape ``(N, nwave)`` with the associated
+                ivar and mask, if available.
+
+        Example:
+            >>> cube = Cube('8485-1901')
+            >>> spectra = cube.get_spectra(x=[0, 1, 2], y=[3, 3, 3], xyorig='lower')
+            >>> spectra.shape
+            (3, 4563)
+
+        """
+
+        model = self.datamodel.datacubes[datacube]
+
+        ii, jj = marvin.utils.general.general.getSpaxelIndices(
+            x=x, y=y, ra=ra, dec=dec, xyorig=xyorig, wcs=self.wcs, shape=self._shape)
+
+        data = {'value': None, 'ivar': None, 'mask': None}
+
+        if self.data_origin == 'file':
+
+            for key in data:
+                ext = None if key == 'value' else key
+                ext_name = self._get_ext_name(model, ext)
+                if ext_name is None:
+                    continue
+
+                # Reuses the full extension if it has already been read.
+                if ext_name in self._extension_data:
+                    data[key] = self._extension_data[ext_name][:, ii, jj].T
+                elif self._spaxel_cache is not None:
+                    data[key] = self._spaxel_cache.read(self.data, ext_name, ii, jj)
+                else:
+                    data[key] = self.data[ext_name].data[:, ii, jj].T
+
+        elif self.data_origin == 'db':
+
+            session = marvin.marvindb.session
+            datadb = marvin.marvindb.datadb
+
+            columns = {}
+            for key in data:
+                ext = None if key == 'value' else key
+                if self._get_ext_name(model, ext) is not None:
+                    columns[key] = getattr(datadb.Spaxel, model.db_column(ext))
+
+            rows = session.query(datadb.Spaxel.x, datadb.Spaxel.y, *columns.values()).filter(
+                datadb.Spaxel.cube == self.data,
+                datadb.Spaxel.x.in_(np.unique(jj).tolist()),
+                datadb.Spaxel.y.in_(np.unique(ii).tolist())).use_cache(self.cache_region).all()
+
+            rows = {(row[0], row[1]): row[2:] for row in rows}
+
+            for nn, key in enumerate(columns):
+                try:
+                    data[key] = np.array([rows[(xx, yy)][nn] for yy, xx in zip(ii, jj)])
+                except KeyError as ee:
+                    raise MarvinError('cannot find spaxel {0} in the DB.'.format(ee))
+
+        elif self.data_origin == 'api':
+
+            params = {'release': self._release,
+                      'x': ','.join(str(xx) for xx in jj),
+                      'y': ','.join(str(yy) for yy in ii),
+                      'datacube': model.name}
+            url = marvin.config.urlmap['api']['getCubeSpectra']['url']
+
+            try:
+                response = self._toolInteraction(url.format(name=self.plateifu), params=params)
+            except Exception as ee:
+                raise MarvinError('found a problem when retrieving the remote '
+                                  'spectra: {0}'.format(str(ee)))
+
+            api_data = response.getData()
+            for key in data:
+                if api_data[key] is not None:
+                    data[key] = np.array(api_data[key])
+
+        return Spectrum(data['value'],
+                        ivar=data['ivar'],
+                        mask=data['mask'],
+                        wavelength=np.array(self._wavelength),
+                        unit=model.unit,
+                        pixmask_flag=model.pixmask_flag)
+
+    def build_spaxel_cache(self, overwrite=False):
+        """Writes a spaxel-major copy of the datacubes next to the cube file.
+
+        Once built, the spectrum of a spaxel is read from the transposed copy
+        as a single contiguous block instead of a strided read across all
+        the wavelength planes of the cube. The copy is used automatically by
+        any `.Cube` loaded from the same file. See `.SpaxelMajorCache`.
+
+        Parameters:
+            overwrite (bool):
+                If True, rebuilds the transposed copy even if it is up to date.
+
+        Returns:
+            spaxel_cache (`.SpaxelMajorCache`):
+                The spaxel-major store for this cube.
+
+        """
+
+        if self.data_origin != 'file':
+            raise MarvinError('the spaxel cache can only be built for '
+                              'cubes loaded from a file.')
+
+        spaxel_cache = SpaxelMajorCache(self.filename)
+        spaxel_cache.build(hdulist=self.data, overwrite=overwrite)
+
+        self._spaxel_cache = spaxel_cache
+
+        return spaxel_cache
+
+    def _get_wave_slice(self, wave_range):
+        """Returns the slice of wavelength pixels within ``wave_range``."""
+
+        wave = np.asarray(self._wavelength)
+
+        if wave_range is None:
+            return slice(0, len(wave))
+
+        assert len(wave_range) == 2 and wave_range[0] < wave_range[1], \
+            'wave_range must be a tuple (min, max).'
+
+        indices = np.where((wave >= wave_range[0]) & (wave <= wave_range[1]))[0]
+        if len(indices) == 0:
+            raise MarvinError('no wavelength pixels in the range {0!r}.'.format(wave_range))
+
+        return slice(indices[0], indices[-1] + 1)
+
+    def _iter_wave_chunks(self, name, wave_slice, chunk_size=None):
+        """Yields ``(wave, dwave, value, ivar, mask)`` for chunks of wavelength.
+
+        For file cubes, only the chunk being processed is read from each
+        extension. For DB and API cubes, the extensions are retrieved once and
+        then processed in chunks.
+
+        """
+
+        model = self.datamodel.datacubes[name]
+        chunk_size = chunk_size or _collapse_chunk_size
+
+        wave = np.asarray(self._wavelength, dtype=float)
+        dwave = np.gradient(wave)
+
+        extensions = {key: self._get_ext_name(model, None if key == 'value' else key)
+                      for key in ['value', 'ivar', 'mask']}
+
+        for w0 in range(wave_slice.start, wave_slice.stop, chunk_size):
+
+            w1 = min(w0 + chunk_size, wave_slice.stop)
+
+            block = {}
+            for key, ext_name in extensions.items():
+                if ext_name is None:
+                    block[key] = None
+                elif self.data_origin == 'file' and ext_name not in self._extension_data:
+                    block[key] = np.asarray(self.data[ext_name].section[w0:w1])
+                else:
+                    ext_data = self._get_extension_data(name, None if key == 'value' else key)
+                    block[key] = np.asarray(ext_data[w0:w1])
+
+            yield wave[w0:w1], dwave[w0:w1], block['value'], block['ivar'], block['mask']
+
+    def _get_good_pixels(self, value, ivar, mask, mask_bits):
+        """Returns a boolean array of the pixels to use in a reduction."""
+
+        good = np.isfinite(value)
+
+        if ivar is not None:
+            good &= ivar > 0
+        if mask is not None and mask_bits:
+            good &= (mask.astype(int) & mask_bits) == 0
+
+        return good
+
+    def _get_continuum(self, name, continuum, mask_bits, chunk_size=None):
+        """Returns the mean continuum level and its variance for each spaxel."""
+
+        nsum = np.zeros(self._shape)
+        csum = np.zeros(self._shape)
+        vsum = np.zeros(self._shape)
+
+        for wave_range in continuum:
+            wave_slice = self._get_wave_slice(wave_range)
+            chunks = self._iter_wave_chunks(name, wave_slice, chunk_size=chunk_size)
+            for __, __, value, ivar, mask in chunks:
+                good = self._get_good_pixels(value, ivar, mask, mask_bits)
+                nsum += good.sum(axis=0)
+                csum += np.where(good, value, 0).sum(axis=0)
+                if ivar is not None:
+                    vsum += np.where(good, 1. / np.where(good, ivar, 1), 0).sum(axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cont = np.where(nsum > 0, csum / nsum, 0)
+            cont_var = np.where(nsum > 0, vsum / nsum**2, 0)
+
+        return cont, cont_var
+
+    def _to_map(self, value, var, good, unit, model, has_ivar):
+        """Returns a `.Map` from the result of a reduction."""
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ivar = np.where(good & (var > 0), 1. / var, 0) if has_ivar else None
+
+        mask = None
+        if model.pixmask_flag is not None:
+            donotuse = Maskbit(model.pixmask_flag).labels_to_value('DONOTUSE')
+            mask = np.where(good, 0, donotuse).astype(int)
+
+        return Map(np.where(good, value, 0), unit=unit, ivar=ivar, mask=mask,
+                   pixmask_flag=model.pixmask_flag)
+
+    def collapse(self, wave_range=None, method='sum', datacube='flux', continuum=None,
+                 mask_labels=('DONOTUSE',), chunk_size=None):
+        """Collapses the cube along the spectral axis into a `.Map`.
+
+        The datacube is processed in chunks of wavelength so that only one
+        chunk, and not the whole cube, is kept in memory at any time (for
+        file cubes, only that chunk is read from the file). Pixels flagged
+        with ``mask_labels`` or with ``ivar=0`` are ignored and the inverse
+        variance is propagated to the output map. Spaxels without any valid
+        pixel are flagged ``DONOTUSE``.
+
+        Parameters:
+            wave_range (tuple):
+                The ``(min, max)`` wavelength range to collapse. If None,
+                uses the whole spectral range.
+            method ({'sum', 'mean', 'integrate'}):
+                How to collapse the cube. ``'integrate'`` multiplies each
+                pixel by its width in wavelength, so that the resulting map
+                has units of the datacube times Angstrom.
+            datacube (str):
+                The name of the datacube to collapse. Defaults to ``'flux'``.
+            continuum (list):
+                A list of ``(min, max)`` wavelength ranges used to compute the
+                mean continuum of each spaxel, which is subtracted from each
+                pixel before collapsing (e.g., for emission line maps).
+            mask_labels (list):
+                The DRP pixmask labels of the pixels to ignore.
+            chunk_size (int):
+                The number of wavelength pixels processed at once.
+
+        Returns:
+            map (`.Map`):
+                The collapsed map.
+
+        Example:
+            >>> cube = Cube('8485-1901')
+            >>> halpha = cube.collapse(wave_range=(6600, 6640), method='integrate',
+            ...                        continuum=[(6500, 6540), (6700, 6740)])
+
+        """
+
+        assert method in ['sum', 'mean', 'integrate'], 'invalid method {0!r}'.format(method)
+
+        model = self.datamodel.datacubes[datacube]
+        mask_bits = self._get_mask_bits(model, mask_labels)
+
+        if continuum is not None:
+            cont, cont_var = self._get_continuum(datacube, continuum, mask_bits,
+                                                 chunk_size=chunk_size)
+        else:
+            cont = cont_var = 0
+
+        nsum = np.zeros(self._shape)
+        wsum = np.zeros(self._shape)
+        fsum = np.zeros(self._shape)
+        vsum = np.zeros(self._shape)
+        has_ivar = False
+
+        wave_slice = self._get_wave_slice(wave_range)
+        chunks = self._iter_wave_chunks(datacube, wave_slice, chunk_size=chunk_size)
+        for __, dwave, value, ivar, mask in chunks:
+
+            good = self._get_good_pixels(value, ivar, mask, mask_bits)
+            weight = dwave if method == 'integrate' else np.ones(len(dwave))
+            weight = np.where(good, weight[:, None, None], 0)
+
+            nsum += good.sum(axis=0)
+            wsum += weight.sum(axis=0)
+            fsum += (weight * np.where(good, value - cont, 0)).sum(axis=0)
+
+            if ivar is not None:
+                has_ivar = True
+                vsum += (weight**2 / np.where(good, ivar, 1)).sum(axis=0)
+
+        good = nsum > 0
+        vsum += wsum**2 * cont_var
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if method == 'mean':
+                value = fsum / wsum
+                var = vsum / wsum**2
+            else:
+                value = fsum
+                var = vsum
+
+        unit = model.unit * units.Angstrom if method == 'integrate' else model.unit
+
+        return self._to_map(value, var, good, unit, model, has_ivar)
+
+    def moment_map(self, wave_range, order=0, datacube='flux', continuum=None,
+                   mask_labels=('DONOTUSE',), chunk_size=None):
+        """Returns a flux-weighted moment map of a wavelength range.
+
+        Like :meth:`collapse`, the datacube is processed in chunks of
+        wavelength, so the memory used does not depend on the size of the
+        cube. The zeroth moment is the integrated flux (the same as
+        ``collapse(method='integrate')``), the first moment the
+        flux-weighted mean wavelength, and the second moment the
+        flux-weighted wavelength dispersion. The inverse variance is
+        propagated for the zeroth and first moments.
+
+        Parameters:
+            wave_range (tuple):
+                The ``(min, max)`` wavelength range of the line.
+            order ({0, 1, 2}):
+                The order of the moment.
+            datacube (str):
+                The name of the datacube to use. Defaults to ``'flux'``.
+            continuum (list):
+                A list of ``(min, max)`` wavelength ranges used to compute the
+                mean continuum of each spaxel, which is subtracted before
+                computing the moment.
+            mask_labels (list):
+                The DRP pixmask labels of the pixels to ignore.
+            chunk_size (int):
+                The number of wavelength pixels processed at once.
+
+        Returns:
+            map (`.Map`):
+                The moment map. Moments 1 and 2 are in Angstrom.
+
+        Example:
+            >>> cube = Cube('8485-1901')
+            >>> centroid = cube.moment_map((6600, 6640), order=1,
+            ...                            continuum=[(6500, 6540), (6700, 6740)])
+
+        """
+
+        assert order in [0, 1, 2], 'order must be 0, 1, or 2.'
+
+        if order == 0:
+            return self.collapse(wave_range=wave_range, method='integrate', datacube=datacube,
+                                 continuum=continuum, mask_labels=mask_labels,
+                                 chunk_size=chunk_size)
+
+        model = self.datamodel.datacubes[datacube]
+        mask_bits = self._get_mask_bits(model, mask_labels)
+
+        if continuum is not None:
+            cont, __ = self._get_continuum(datacube, continuum, mask_bits, chunk_size=chunk_size)
+        else:
+            cont = 0
+
+        # Flux-weighted sums of powers of the wavelength and the corresponding
+        # variance sums, needed to propagate the error of the first moment.
+        fsums = [np.zeros(self._shape) for __ in range(3)]
+        vsums = [np.zeros(self._shape) for __ in range(3)]
+        has_ivar = False
+
+        wave_slice = self._get_wave_slice(wave_range)
+        chunks = self._iter_wave_chunks(datacube, wave_slice, chunk_size=chunk_size)
+        for wave, dwave, value, ivar, mask in chunks:
+
+            good = self._get_good_pixels(value, ivar, mask, mask_bits)
+            flux = np.where(good, value - cont, 0) * dwave[:, None, None]
+
+            if ivar is not None:
+                has_ivar = True
+                var = np.where(good, dwave[:, None, None]**2 / np.where(good, ivar, 1), 0)
+
+            for power in range(3):
+                wave_power = wave[:, None, None]**power
+                fsums[power] += (flux * wave_power).sum(axis=0)
+                if ivar is not None:
+                    vsums[power] += (var * wave_power**2).sum(axis=0)
+
+        good = fsums[0] != 0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+
+            moment1 = fsums[1] / fsums[0]
+
+            if order == 1:
+                value = moment1
+                var = (vsums[2] - 2 * moment1 * vsums[1] + moment1**2 * vsums[0]) / fsums[0]**2
+            else:
+                value = np.sqrt(np.clip(fsums[2] / fsums[0] - moment1**2, 0, None))
+                var = np.zeros(self._shape)
+                has_ivar = False
+
+        return self._to_map(value, var, good, units.Angstrom, model, has_ivar)
+
+    def _get_mask_bits(self, model, mask_labels):
+        """Returns the value of the pixmask bits to ignore."""
+
+        if not mask_labels or model.pixmask_flag is None:
+            return 0
+
+        return int(Maskbit(model.pixmask_flag).labels_to_value(mask_labels))
+
     def getSpaxel(self, x=None, y=None, ra=None, dec=None,
                   maps=False, modelcube=False, **kwargs):
         """Returns the :class:`~marvin.tools.spaxel.Spaxel` matching certain coordinates.
@@ -562,10 +1028,10 @@ class Cube(MarvinToolsClass, NSAMixIn, GetApertureMixIn):
                 will be returned without model information. Default is False.
 
         Returns:
-            spaxels (list):
-                The |spaxel|_ objects for this cube corresponding to the input
-                coordinates. The length of the list is equal to the number
-                of input coordinates.
+            spaxels (|spaxel|_ or `~marvin.tools.spaxel.SpaxelCollection`):
+                The |spaxel|_ for the input coordinates or, if the coordinates
+                are arrays, a `~marvin.tools.spaxel.SpaxelCollection` with the
+                spaxels in the same order as the input coordinates.
 
         .. |spaxel| replace:: :class:`~marvin.tools.spaxel.Spaxel`
 
@@ -14,7 +14,9 @@ from __future__ import absolute_import, division, print_function
 
 import copy
 import inspect
+import os
 import warnings
+from collections import OrderedDict
 
 import astropy.io.fits
 import astropy.wcs
@@ -31,6 +33,8 @@ import marvin.tools.modelcube
 import marvin.tools.quantities.map
 import marvin.tools.spaxel
 import marvin.utils.dap.bpt
+import marvin.utils.dap.export
+import marvin.utils.dap.expression
 import marvin.utils.general.general
 from marvin.utils.datamodel.dap import datamodel
 from marvin.utils.datamodel.dap.base import Channel, Property
@@ -50,6 +54,62 @@ except ImportError:
 __all__ = ['Maps']
 
 
+# Number of property blocks shared between Maps of the same file.
+_property_block_cache_size = 4
+
+_property_blocks = OrderedDict()
+
+
+def _stack_properties(hdulist, properties):
+    """Stacks the value, ivar, and mask of ``properties`` into 3D arrays.
+
+    Returns a dictionary with the ``(n_properties, ny, nx)`` ``value``,
+    ``ivar``, and ``mask`` arrays, in the order of ``properties``, and the
+    original ``dtypes`` of each of them (None if the property does not have
+    that extension, in which case the layer is zero).
+
+    """
+
+    block = {'names': [prop.full() for prop in properties], 'dtypes': {}}
+
+    for key in ['value', 'ivar', 'mask']:
+
+        layers = []
+        dtypes = []
+
+        for prop in properties:
+
+            if ((key == 'ivar' and not prop.has_ivar()) or
+                    (key == 'mask' and not prop.has_mask())):
+                layers.append(None)
+                dtypes.append(None)
+                continue
+
+            extname = prop.name if key == 'value' else prop.name + '_' + key
+            data = hdulist[extname].data
+            layer = data[prop.channel.idx] if prop.channel else data
+
+            layers.append(layer)
+            dtypes.append(layer.dtype.newbyteorder('='))
+
+        valid_dtypes = [dtype for dtype in dtypes if dtype is not None]
+        if len(valid_dtypes) == 0:
+            valid_dtypes = [np.int64 if key == 'mask' else np.float64]
+
+        # Value layers are always present and define the shape of the block.
+        shape = (len(layers),) + layers[0].shape if key == 'value' else block['value'].shape
+
+        stacked = np.zeros(shape, dtype=np.result_type(*valid_dtypes))
+        for ii, layer in enumerate(layers):
+            if layer is not None:
+                stacked[ii] = layer
+
+        block[key] = stacked
+        block['dtypes'][key] = dtypes
+
+    return block
+
+
 class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
     """A class that represents a DAP MAPS file.
 
@@ -93,6 +153,8 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         self.template = template
 
         self._bitmasks = None
+        self._property_block = None
+        self._binid_cache = {}
 
         MarvinToolsClass.__init__(self, input=input, filename=filename,
                                   mangaid=mangaid, plateifu=plateifu,
@@ -163,6 +225,15 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
                     template=copy.deepcopy(self.template, memo),
                     nsa_source=copy.deepcopy(self.nsa_source, memo))
 
+    def __getstate__(self):
+
+        # Property blocks are rebuilt on demand after unpickling.
+        odict = super(Maps, self).__getstate__()
+        odict['_property_block'] = None
+        odict['_binid_cache'] = {}
+
+        return odict
+
     @staticmethod
     def _check_versions(instance):
         """Confirm that drpver and dapver match the ones from the header.
@@ -402,7 +473,17 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         maps_quantities = FuzzyDict({})
 
-        if self.data_origin == 'file' or self.data_origin == 'db':
+        if self.data_origin == 'file' and marvin.config._custom_config.get('maps_property_block',
+                                                                           False):
+
+            for dm, quantity in zip(self.datamodel, self._get_block_quantities(x, y)):
+
+                if spaxel:
+                    quantity._init_bin(spaxel=spaxel, parent=self, datamodel=dm)
+
+                maps_quantities[dm.full()] = quantity
+
+        elif self.data_origin == 'file' or self.data_origin == 'db':
 
             # Stores a dictionary of (table, row)
             _db_rows = {}
@@ -480,6 +561,81 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         return maps_quantities
 
+    def get_property_block(self):
+        """Returns the value, ivar, and mask of all the properties as 3D arrays.
+
+        The maps of all the properties in the datamodel are stacked, once,
+        into contiguous ``(n_properties, ny, nx)`` arrays, so that all the
+        quantities of a spaxel can be retrieved with a single indexing
+        operation. If ``maps_property_block`` is set in the custom config,
+        blocks are used for spaxel quantities and are shared between
+        `.Maps` instances of the same file. Only available for Maps loaded
+        from a file.
+
+        Returns:
+            block (dict):
+                A dictionary with the ``names`` of the properties, and the
+                ``value``, ``ivar``, and ``mask`` arrays. Layers of
+                properties without ivar or mask are zero, and their
+                ``dtypes`` are None.
+
+        """
+
+        if self.data_origin != 'file':
+            raise marvin.core.exceptions.MarvinError(
+                'property blocks are only available for Maps loaded from a file.')
+
+        if self._property_block is not None:
+            return self._property_block
+
+        shared = (marvin.config._custom_config.get('maps_property_block', False) and
+                  self.filename is not None and os.path.exists(self.filename))
+
+        block_key = None
+        if shared:
+            block_key = (os.path.realpath(self.filename),
+                         os.path.getmtime(self.filename), self._dapver)
+            if block_key in _property_blocks:
+                _property_blocks.move_to_end(block_key)
+                self._property_block = _property_blocks[block_key]
+                return self._property_block
+
+        self._property_block = _stack_properties(self.data, self.datamodel)
+
+        if shared:
+            _property_blocks[block_key] = self._property_block
+            while len(_property_blocks) > _property_block_cache_size:
+                _property_blocks.popitem(last=False)
+
+        return self._property_block
+
+    def _get_block_quantities(self, x, y):
+        """Returns the `.AnalysisProperty` of each property using the property block."""
+
+        block = self.get_property_block()
+
+        values = block['value'][:, y, x]
+        ivars = block['ivar'][:, y, x]
+        masks = block['mask'][:, y, x]
+
+        dtypes = block['dtypes']
+
+        quantities = []
+
+        for ii, dm in enumerate(self.datamodel):
+
+            ivar_dtype = dtypes['ivar'][ii]
+            mask_dtype = dtypes['mask'][ii]
+
+            ivar = ivar_dtype.type(ivars[ii]) if ivar_dtype is not None else None
+            mask = mask_dtype.type(masks[ii]) if mask_dtype is not None else None
+
+            quantities.append(
+                AnalysisProperty(dtypes['value'][ii].type(values[ii]), unit=dm.unit,
+                                 ivar=ivar, mask=mask, pixmask_flag=dm.pixmask_flag))
+
+        return quantities
+
     def get_binid(self, property=None):
         """Returns the binid map associated with a property.
 
@@ -493,7 +649,8 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         -------
         binid : `Map`
             A `Map` with the binid associated with ``property`` or the default
-            binid.
+            binid. The map is cached and shared by all the maps with the same
+            binning, so it is read-only.
 
         """
 
@@ -506,7 +663,14 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         else:
             binid = property.binid
 
-        return self.getMap(binid)
+        cache_key = (self.bintype.name, binid.full())
+
+        if cache_key not in self._binid_cache:
+            binid_map = self.getMap(binid)
+            binid_map.flags.writeable = False
+            self._binid_cache[cache_key] = binid_map
+
+        return self._binid_cache[cache_key]
 
     def getCube(self):
         """Returns the :class:`~marvin.tools.cube.Cube` for with this Maps."""
@@ -563,10 +727,10 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
 
         Returns:
-            spaxels (list):
-                The |spaxel|_ objects for this cube/maps corresponding to the
-                input coordinates. The length of the list is equal to the
-                number of input coordinates.
+            spaxels (|spaxel|_ or `~marvin.tools.spaxel.SpaxelCollection`):
+                The |spaxel|_ for the input coordinates or, if the coordinates
+                are arrays, a `~marvin.tools.spaxel.SpaxelCollection` with the
+                spaxels in the same order as the input coordinates.
 
         .. |spaxel| replace:: :class:`~marvin.tools.spaxel.Spaxel`
 
@@ -662,6 +826,38 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         return self.bintype.binned
 
+    def evaluate(self, expression, default_property='emline_gflux', chunk_size=None):
+        """Evaluates an arithmetic expression of properties.
+
+        The expression is parsed once per datamodel and evaluated in a
+        single pass, propagating the inverse variance and combining the
+        masks of all the properties, without creating intermediate maps.
+        See `~marvin.utils.dap.expression.Expression` for the syntax.
+
+        Parameters:
+            expression (str):
+                The expression to evaluate (e.g., ``'log10(nii / ha)'`` or
+                ``'emline_gflux_oiii_5008 / emline_gflux_hb_4862'``).
+            default_property (str):
+                The property whose channels can be used by name (e.g.,
+                ``ha_6564`` or ``ha``).
+            chunk_size (int):
+                The approximate number of spaxels evaluated at once.
+
+        Returns:
+            map (`~marvin.tools.quantities.EnhancedMap`):
+                The map with the result of the expression.
+
+        Example:
+            >>> log_nii_ha = maps.evaluate('log10(nii / ha)')
+
+        """
+
+        parsed = marvin.utils.dap.expression.get_expression(expression, self._dapver,
+                                                            default_property=default_property)
+
+        return parsed.evaluate(self, chunk_size=chunk_size)
+
     def get_unbinned(self):
         """Returns a version of ``self`` corresponding to the unbinned Maps."""
 
@@ -807,7 +1003,24 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         if columns:
             allprops = [p for p in allprops if p in columns]
-        data = np.array([self[p].value[mask].flatten() for p in allprops])
+
+        if self.data_origin == 'file':
+            if self._property_block is not None:
+                # Selects all the columns from the property block at once.
+                block = self._property_block
+                values = block['value'][[block['names'].index(p) for p in allprops]]
+            else:
+                # Reads only the value planes of the requested properties.
+                props = {prop.full(): prop for prop in self.datamodel}
+                values = np.array([self.data[props[p].name].data[props[p].channel.idx]
+                                   if props[p].channel else self.data[props[p].name].data
+                                   for p in allprops])
+            if mask is not None:
+                data = values[:, mask]
+            else:
+                data = values.reshape(len(allprops), -1)
+        else:
+            data = np.array([self[p].value[mask].flatten() for p in allprops])
 
         # add a column for spaxel index
         spaxarr = np.array([np.where(mask.flatten())[0]]) \
@@ -818,3 +1031,43 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         # create the dataframe
         df = pd.DataFrame(data.transpose(), columns=allprops)
         return df
+
+    def to_arrow(self, columns=None, mask=None, include_ivar=False, include_mask=False):
+        """Converts the maps object into an Arrow table with native dtypes.
+
+        Unlike `.to_dataframe`, the MAPS extensions are read directly and
+        the columns keep the dtype of the file. Requires ``pyarrow``. See
+        `~marvin.utils.dap.export.maps_to_arrow` for details.
+
+        Parameters:
+            columns (list):
+                The properties+channels you want to include.
+                Defaults to all of them.
+            mask (array):
+                A 2D boolean mask array for filtering your data output
+            include_ivar,include_mask (bool):
+                If True, adds the ivar and mask columns of the properties.
+
+        Returns:
+            table (`pyarrow.Table`):
+                A table with one row per spaxel.
+
+        """
+
+        return marvin.utils.dap.export.maps_to_arrow(self, columns=columns, mask=mask,
+                                                     include_ivar=include_ivar,
+                                                     include_mask=include_mask)
+
+    def to_parquet(self, path, columns=None, mask=None, include_ivar=False,
+                   include_mask=False, **kwargs):
+        """Writes the maps object to a Parquet file.
+
+        Same as `.to_arrow` but writes the table to ``path``. To write
+        several galaxies to the same file, use
+        `~marvin.utils.dap.export.write_maps_parquet`.
+
+        """
+
+        return marvin.utils.dap.export.write_maps_parquet(self, path, columns=columns,
+                                                          mask=mask, include_ivar=include_ivar,
+                                                          include_mask=include_mask, **kwargs)
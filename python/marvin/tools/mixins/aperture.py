@@ -12,6 +12,9 @@
 import astropy.coordinates
 import astropy.units
 import numpy
+import scipy.sparse
+
+from marvin.utils.general.maskbit import Maskbit
 
 
 try:
@@ -55,6 +58,21 @@ class MarvinAperture(photutils.Aperture if photutils else object):
 
         """
 
+        return numpy.asarray(self.weights.sum(axis=0)).reshape(self.parent._shape)
+
+    @property
+    def weights(self):
+        """Returns the fractional overlap of each aperture with each spaxel.
+
+        The overlaps are returned as a sparse matrix of shape
+        ``(n_apertures, ny * nx)``, in which each row contains the exact
+        fractional overlap of an aperture with the flattened spaxel grid of
+        the parent object. Only the bounding box of each aperture is
+        rasterised, so the cost scales with the area of the apertures and
+        not with the number of apertures times the size of the grid.
+
+        """
+
         assert self.parent is not None, 'no parent set'
 
         if isinstance(self, photutils.SkyAperture):
@@ -62,12 +80,38 @@ class MarvinAperture(photutils.Aperture if photutils else object):
         else:
             aperture = self
 
-        mask = numpy.zeros(self.parent._shape)
+        shape = self.parent._shape
+
+        masks = aperture.to_mask(method='exact')
+        if not isinstance(masks, list):
+            masks = [masks]
+
+        rows = []
+        cols = []
+        data = []
 
-        for ap in aperture.to_mask(method='exact'):
-            mask += ap.to_image(shape=(self.parent._shape))
+        for ii, ap_mask in enumerate(masks):
 
-        return mask
+            slices = ap_mask.get_overlap_slices(shape)
+            if slices[0] is None:
+                continue
+
+            slices_large, slices_small = slices
+            cutout = ap_mask.data[slices_small]
+
+            yy, xx = numpy.mgrid[slices_large]
+            nonzero = cutout > 0
+
+            rows.append(numpy.full(nonzero.sum(), ii))
+            cols.append(numpy.ravel_multi_index((yy[nonzero], xx[nonzero]), shape))
+            data.append(cutout[nonzero])
+
+        if len(data) == 0:
+            return scipy.sparse.csr_matrix((len(masks), shape[0] * shape[1]))
+
+        return scipy.sparse.csr_matrix(
+            (numpy.concatenate(data), (numpy.concatenate(rows), numpy.concatenate(cols))),
+            shape=(len(masks), shape[0] * shape[1]))
 
     def getSpaxels(self, threshold=0.5, lazy=True, mask=None, **kwargs):
         """Returns the spaxels that fall within the aperture.
@@ -89,6 +133,12 @@ class MarvinAperture(photutils.Aperture if photutils else object):
             method. Can be used to define what information is loaded
             in the spaxels.
 
+        Returns
+        -------
+        spaxels : `~marvin.tools.spaxel.SpaxelCollection`
+            The spaxels in the aperture. Their spectra and properties can be
+            accessed for all of them at once (e.g., ``spaxels.flux``).
+
         """
 
         assert threshold > 0 and threshold <= 1, 'invalid threshold value'
@@ -106,6 +156,157 @@ class MarvinAperture(photutils.Aperture if photutils else object):
         return self.parent.getSpaxel(x=spaxel_coords[1], y=spaxel_coords[0],
                                      xyorig='lower', lazy=lazy, **kwargs)
 
+    def integrate(self, tool=None, datacube='flux', properties=None, method='sum',
+                  mask_labels=('DONOTUSE',)):
+        """Returns the spectra or DAP properties integrated over each aperture.
+
+        The spaxels are weighted by their fractional overlap with each
+        aperture (see `.MarvinAperture.weights`) and all the apertures are
+        integrated at once, as a single sparse matrix product, without
+        creating `~marvin.tools.spaxel.Spaxel` objects. Pixels flagged with
+        ``mask_labels`` or with ``ivar=0`` are ignored and the inverse
+        variance is propagated to the output. Apertures without any valid
+        pixel are flagged ``DONOTUSE``.
+
+        Parameters
+        ----------
+        tool : `~marvin.tools.cube.Cube` or `~marvin.tools.maps.Maps`
+            The tool to integrate. Must have the same shape as the parent.
+            Defaults to the parent object.
+        datacube : str
+            For a `~marvin.tools.cube.Cube`, the name of the datacube to
+            integrate.
+        properties : list
+            For a `~marvin.tools.maps.Maps`, the names of the properties to
+            integrate. Defaults to all of them.
+        method : {'sum', 'mean'}
+            Whether to return the weighted sum or the weighted mean of the
+            spaxels in each aperture. ``'mean'`` is usually what is needed
+            for intensive properties such as velocities.
+        mask_labels : list
+            The pixmask labels of the pixels to ignore.
+
+        Returns
+        -------
+        integrated : `~marvin.tools.quantities.Spectrum` or `.FuzzyDict`
+            For a cube, a `~marvin.tools.quantities.Spectrum` of shape
+            ``(n_apertures, nwave)``. For a maps, a dictionary of
+            `~marvin.tools.quantities.AnalysisProperty` of length
+            ``n_apertures`` for each property.
+
+        Examples
+        --------
+
+        The integrated spectra in three circular apertures ::
+
+            >>> cube = marvin.tools.Cube('8485-1901')
+            >>> aperture = cube.getAperture([(10, 10), (17, 17), (20, 25)], 2)
+            >>> aperture.integrate().shape
+            (3, 4563)
+
+        and the mean stellar velocity in each of them ::
+
+            >>> maps = cube.getMaps()
+            >>> velocities = aperture.integrate(maps, properties=['stellar_vel'], method='mean')
+            >>> velocities['stellar_vel']
+            <AnalysisProperty [ 45.8..., -0.6..., -28.9...] km / s>
+
+        """
+
+        from marvin.tools.cube import Cube
+        from marvin.tools.maps import Maps
+        from marvin.tools.quantities import AnalysisProperty, Spectrum
+        from marvin.tools.spaxel import SpaxelCollection
+        from marvin.utils.general.structs import FuzzyDict
+
+        assert method in ['sum', 'mean'], 'invalid method {0!r}'.format(method)
+
+        tool = tool if tool is not None else self.parent
+
+        assert isinstance(tool, (Cube, Maps)), 'tool must be a Cube or a Maps'
+        assert tuple(tool._shape) == tuple(self.parent._shape), \
+            'the shape of tool does not match that of the parent'
+
+        weights = self.weights
+
+        # Only the spaxels covered by at least one aperture are retrieved.
+        covered = numpy.unique(weights.indices)
+        yy, xx = numpy.unravel_index(covered, tool._shape)
+        weights = weights[:, covered]
+
+        if isinstance(tool, Cube):
+            spaxels = SpaxelCollection(xx, yy, cube=tool, maps=False, modelcube=False)
+        else:
+            spaxels = SpaxelCollection(xx, yy, cube=False, maps=tool, modelcube=False)
+
+        if isinstance(tool, Cube):
+
+            model = tool.datamodel.datacubes[datacube]
+            spectra = spaxels.get_spectra(datacube)
+
+            value, ivar, mask = _integrate(weights, spectra.value, spectra.ivar, spectra.mask,
+                                           model.pixmask_flag, mask_labels, method)
+
+            return Spectrum(value, wavelength=spectra.wavelength, unit=spectra.unit,
+                            ivar=ivar, mask=mask, pixmask_flag=model.pixmask_flag)
+
+        if properties is None:
+            properties = [prop.full() for prop in tool.datamodel]
+
+        integrated = FuzzyDict({})
+
+        for name in properties:
+
+            quantity = spaxels.maps[name]
+            pixmask_flag = quantity.pixmask_flag
+
+            value, ivar, mask = _integrate(weights, quantity.value, quantity.ivar,
+                                           quantity.mask, pixmask_flag, mask_labels, method)
+
+            integrated[tool.datamodel[name].full()] = AnalysisProperty(
+                value, unit=quantity.unit, ivar=ivar, mask=mask, pixmask_flag=pixmask_flag)
+
+        return integrated
+
+
+def _integrate(weights, value, ivar, mask, pixmask_flag, mask_labels, method):
+    """Integrates ``value`` for each row of the sparse ``weights`` matrix.
+
+    ``value``, ``ivar``, and ``mask`` have the spaxels in the first axis.
+    Returns the value, ivar (None if ``ivar`` is None), and mask (None if
+    ``pixmask_flag`` is None) for each aperture.
+
+    """
+
+    good = numpy.isfinite(value)
+    if ivar is not None:
+        good &= ivar > 0
+    if mask is not None and mask_labels and pixmask_flag is not None:
+        mask_bits = int(Maskbit(pixmask_flag).labels_to_value(mask_labels))
+        good &= (mask.astype(int) & mask_bits) == 0
+
+    norm = weights.dot(good.astype(float))
+    total = weights.dot(numpy.where(good, value, 0))
+
+    var = None
+    if ivar is not None:
+        var = weights.power(2).dot(numpy.where(good, 1. / numpy.where(good, ivar, 1), 0))
+
+    valid = norm > 0
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        if method == 'mean':
+            total = total / norm
+            var = var / norm**2 if var is not None else None
+        ivar = numpy.where(valid & (var > 0), 1. / var, 0) if var is not None else None
+
+    mask = None
+    if pixmask_flag is not None:
+        donotuse = Maskbit(pixmask_flag).labels_to_value('DONOTUSE')
+        mask = numpy.where(valid, 0, donotuse).astype(int)
+
+    return numpy.where(valid, total, 0), ivar, mask
+
 
 class GetApertureMixIn(object):
 
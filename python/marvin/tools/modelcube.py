@@ -26,14 +26,19 @@ import marvin.tools.maps
 import marvin.tools.spaxel
 import marvin.utils.general.general
 from marvin.core.exceptions import MarvinError
-from marvin.tools.quantities import DataCube, Map, Spectrum
+from marvin.tools.quantities import BinnedDataCube, DataCube, Map, Spectrum
 from marvin.utils.datamodel.dap import Model, datamodel
-from marvin.utils.general import FuzzyDict, gunzip, check_versions
+from marvin.utils.general import (FuzzyDict, gunzip, check_versions, get_fits_cache,
+                                  get_spaxel_cache, SpaxelMajorCache)
 
 from .core import MarvinToolsClass
 from .mixins import DAPallMixIn, GetApertureMixIn, NSAMixIn
 
 
+# Number of wavelengths read at once when building compact datacubes from a file.
+_compact_chunk_size = 512
+
+
 class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
     """A class to interface with MaNGA DAP model cubes.
 
@@ -54,6 +59,12 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
             ``'M11-STELIB-ZSOL', 'MILES-THIN', 'MIUSCAT-THIN'`` (if ``None``,
             defaults to ``'MIUSCAT-THIN'``). For MPL-5 and successive, the only
             option in ``'GAU-MILESHC'`` (``None`` defaults to it).
+        compact (bool or None):
+            If True and the ModelCube is binned, the datacubes (e.g.,
+            ``binned_flux`` or ``full_fit``) are returned as
+            `~marvin.tools.quantities.datacube.BinnedDataCube` objects that
+            store one spectrum per bin. If ``None``, uses the value of
+            ``compact_modelcubes`` in the custom config.
 
     Attributes:
         header (`astropy.io.fits.Header`):
@@ -66,7 +77,7 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
     def __init__(self, input=None, filename=None, mangaid=None, plateifu=None,
                  mode=None, data=None, release=None,
                  drpall=None, download=None, nsa_source='auto',
-                 bintype=None, template=None, template_kin=None):
+                 bintype=None, template=None, template_kin=None, compact=None):
 
         if template_kin is not None:
             warnings.warn('template_kin is deprecated and will be removed in a future version.',
@@ -79,6 +90,12 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         self.datamodel = None
 
         self._bitmasks = None
+        self._binid_cache = {}
+
+        if compact is None:
+            compact = marvin.config._custom_config.get('compact_modelcubes', False)
+        self.compact = compact
+        self._binned_datacubes = {}
 
         MarvinToolsClass.__init__(self, input=input, filename=filename,
                                   mangaid=mangaid, plateifu=plateifu,
@@ -100,6 +117,7 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         # Model extensions
         self._extension_data = {}
+        self._spaxel_cache = None
         self._binned_flux = None
         self._redcorr = None
         self._full_fit = None
@@ -178,9 +196,13 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         if self.data is not None:
             assert isinstance(self.data, fits.HDUList), 'data is not an HDUList object'
         else:
+            fits_cache = get_fits_cache()
             try:
-                with gunzip(self.filename) as gg:
-                    self.data = fits.open(gg.name)
+                if fits_cache is not None:
+                    self.data = fits_cache.open(self.filename)
+                else:
+                    with gunzip(self.filename) as gg:
+                        self.data = fits.open(gg.name)
             except IOError as err:
                 raise IOError('filename {0} cannot be found: {1}'.format(self.filename, err))
 
@@ -192,6 +214,8 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         self._shape = (self.data['FLUX'].header['NAXIS2'],
                        self.data['FLUX'].header['NAXIS1'])
 
+        self._spaxel_cache = get_spaxel_cache(self.filename)
+
         self.plateifu = self.header['PLATEIFU']
         self.mangaid = self.header['MANGAID']
 
@@ -344,10 +368,10 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
                 corresponding DAP Maps properties for this spaxel.
 
         Returns:
-            spaxels (list):
-                The |spaxel|_ objects for this cube/maps corresponding to the
-                input coordinates. The length of the list is equal to the
-                number of input coordinates.
+            spaxels (|spaxel|_ or `~marvin.tools.spaxel.SpaxelCollection`):
+                The |spaxel|_ for the input coordinates or, if the coordinates
+                are arrays, a `~marvin.tools.spaxel.SpaxelCollection` with the
+                spaxels in the same order as the input coordinates.
 
         .. |spaxel| replace:: :class:`~marvin.tools.spaxel.Spaxel`
 
@@ -363,6 +387,35 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
             x=x, y=y, ra=ra, dec=dec,
             cube=cube, maps=maps, modelcube=self, **kwargs)
 
+    def build_spaxel_cache(self, overwrite=False):
+        """Writes a spaxel-major copy of the model datacubes next to the file.
+
+        Once built, the binned flux and models of a spaxel are read from the
+        transposed copy as contiguous blocks. The copy is used automatically
+        by any `.ModelCube` loaded from the same file. See
+        `.SpaxelMajorCache`.
+
+        Parameters:
+            overwrite (bool):
+                If True, rebuilds the transposed copy even if it is up to date.
+
+        Returns:
+            spaxel_cache (`.SpaxelMajorCache`):
+                The spaxel-major store for this model cube.
+
+        """
+
+        if self.data_origin != 'file':
+            raise MarvinError('the spaxel cache can only be built for '
+                              'model cubes loaded from a file.')
+
+        spaxel_cache = SpaxelMajorCache(self.filename)
+        spaxel_cache.build(hdulist=self.data, overwrite=overwrite)
+
+        self._spaxel_cache = spaxel_cache
+
+        return spaxel_cache
+
     def _get_extension_data(self, name, ext=None):
         """Returns the data from an extension."""
 
@@ -431,7 +484,10 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
                     if self.data_origin == 'file':
 
                         extname = dm.fits_extension(None if key == 'value' else key)
-                        data[key] = self.data[extname].data[:, y, x]
+                        if self._spaxel_cache is not None:
+                            data[key] = self._spaxel_cache.read(self.data, extname, y, x)
+                        else:
+                            data[key] = self.data[extname].data[:, y, x]
 
                     elif self.data_origin == 'db':
 
@@ -496,7 +552,8 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         -------
         binid : `Map`
             A `Map` with the binid associated with ``model`` or the default
-            binid.
+            binid. The map is cached and shared by all the datacubes with the
+            same binning, so it is read-only.
 
         """
 
@@ -507,10 +564,16 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         else:
             binid_prop = self.datamodel.parent.default_binid
 
+        cache_key = (self.bintype.name, binid_prop.full())
+        if cache_key in self._binid_cache:
+            return self._binid_cache[cache_key]
+
         # Before MPL-6, the modelcube does not include the binid extension,
         # so we need to get the binid map from the associated MAPS.
         if (parse(self._dapver) < parse('2.1')):
-            return self.getMaps().get_binid()
+            binid_map = self.getMaps().get_binid()
+            self._binid_cache[cache_key] = binid_map
+            return binid_map
 
         if self.data_origin == 'file':
 
@@ -521,18 +584,18 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         elif self.data_origin == 'db':
 
+            from marvin.db.ArrayUtils import get_bulk_arrays
+
             mdb = marvin.marvindb
 
             table = mdb.dapdb.ModelSpaxel
             column = getattr(table, binid_prop.db_column())
 
-            binid_list = mdb.session.query(column).filter(
-                table.modelcube_pk == self.data.pk).order_by(table.x, table.y).all()
-
-            nx = ny = int(np.sqrt(len(binid_list)))
-            binid_array = np.array(binid_list)
+            binid_array, = get_bulk_arrays(mdb.session, [column],
+                                           [table.modelcube_pk == self.data.pk],
+                                           [table.y, table.x])
 
-            binid_map_data = binid_array.transpose().reshape((ny, nx)).transpose(1, 0)
+            binid_map_data = binid_array.reshape(self._shape)
 
         elif self.data_origin == 'api':
 
@@ -559,27 +622,73 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         binid_map = Map(binid_map_data, unit=binid_prop.unit)
         binid_map._datamodel = binid_prop
+        binid_map.flags.writeable = False
+
+        self._binid_cache[cache_key] = binid_map
 
         return binid_map
 
+    def _use_compact(self):
+        """Returns True if datacubes must be returned as `.BinnedDataCube`."""
+
+        return bool(self.compact) and self.is_binned()
+
+    def _get_extension_source(self, name, ext=None):
+        """Returns the data of an extension, or its section if it can be read in chunks."""
+
+        ext_name = self.datamodel[name].fits_extension(ext)
+
+        if (self.data_origin == 'file' and ext_name not in self._extension_data and
+                self._use_compact()):
+            hdu = self.data[ext_name]
+            if 'data' not in hdu.__dict__ and hdu.fileinfo() is not None:
+                return hdu.section
+
+        return self._get_extension_data(name, ext)
+
+    def _get_datacube(self, name, model, value, ivar=None, mask=None):
+        """Returns a `.DataCube` or, in compact mode, a `.BinnedDataCube`.
+
+        In compact mode, models that are not constant within the bins of their
+        binid (e.g., the full fit of hybrid binning, which includes emission
+        lines fitted to each spaxel) are returned as a `.DataCube`.
+
+        """
+
+        binid = self.get_binid(model)
+
+        kwargs = dict(ivar=ivar, mask=mask, redcorr=self._redcorr, unit=model.unit,
+                      pixmask_flag=model.pixmask_flag)
+
+        if self._use_compact() and name not in self._binned_datacubes:
+            try:
+                self._binned_datacubes[name] = BinnedDataCube.from_datacube(
+                    value, np.array(self._wavelength), binid.value,
+                    chunk_size=_compact_chunk_size, **kwargs)
+            except ValueError:
+                self._binned_datacubes[name] = None
+
+        if self._binned_datacubes.get(name, None) is not None:
+            return self._binned_datacubes[name]
+
+        # sections of the FITS extensions, used in compact mode, are read in full
+        for key, array in [('ivar', ivar), ('mask', mask)]:
+            kwargs[key] = array[:] if array is not None else None
+
+        return DataCube(value[:], np.array(self._wavelength), binid=binid, **kwargs)
+
     @property
     def binned_flux(self):
         """Returns the binned flux datacube."""
 
         model = self.datamodel['binned_flux']
 
-        binned_flux_array = self._get_extension_data('flux')
-        binned_flux_ivar = self._get_extension_data('flux', 'ivar')
-        binned_flux_mask = self._get_extension_data('flux', 'mask')
+        binned_flux_array = self._get_extension_source('flux')
+        binned_flux_ivar = self._get_extension_source('flux', 'ivar')
+        binned_flux_mask = self._get_extension_source('flux', 'mask')
 
-        return DataCube(binned_flux_array,
-                        np.array(self._wavelength),
-                        ivar=binned_flux_ivar,
-                        mask=binned_flux_mask,
-                        redcorr=self._redcorr,
-                        binid=self.get_binid(model),
-                        unit=model.unit,
-                        pixmask_flag=model.pixmask_flag)
+        return self._get_datacube('binned_flux', model, binned_flux_array,
+                                  ivar=binned_flux_ivar, mask=binned_flux_mask)
 
     @property
     def full_fit(self):
@@ -587,17 +696,10 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         model = self.datamodel['full_fit']
 
-        model_array = self._get_extension_data('full_fit')
-        model_mask = self._get_extension_data('flux', 'mask')
+        model_array = self._get_extension_source('full_fit')
+        model_mask = self._get_extension_source('flux', 'mask')
 
-        return DataCube(model_array,
-                        np.array(self._wavelength),
-                        ivar=None,
-                        mask=model_mask,
-                        redcorr=self._redcorr,
-                        binid=self.get_binid(model),
-                        unit=model.unit,
-                        pixmask_flag=model.pixmask_flag)
+        return self._get_datacube('full_fit', model, model_array, mask=model_mask)
 
     @property
     def emline_fit(self):
@@ -605,20 +707,13 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         model = self.datamodel['emline_fit']
 
-        emline_array = self._get_extension_data('emline_fit')
+        emline_array = self._get_extension_source('emline_fit')
         if model.has_mask():
-            emline_mask = self._get_extension_data('emline_fit', 'mask')
+            emline_mask = self._get_extension_source('emline_fit', 'mask')
         else:
             emline_mask = None
 
-        return DataCube(emline_array,
-                        np.array(self._wavelength),
-                        ivar=None,
-                        mask=emline_mask,
-                        redcorr=self._redcorr,
-                        binid=self.get_binid(model),
-                        unit=model.unit,
-                        pixmask_flag=model.pixmask_flag)
+        return self._get_datacube('emline_fit', model, emline_array, mask=emline_mask)
 
     @property
     def stellarcont_fit(self):
@@ -627,24 +722,19 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
         isMPL8 = check_versions(self._dapver, datamodel['MPL-8'].release)
 
         if isMPL8:
-            array = self._get_extension_data('stellar_fit')
+            array = self._get_extension_source('stellar_fit')
             model = self.datamodel['stellar_fit']
-            mask = self._get_extension_data('stellar_fit', 'mask')
+            mask = self._get_extension_source('stellar_fit', 'mask')
         else:
+            # The emission-line models may not share the binning of the full
+            # fit, so the continuum is always computed on the full arrays.
             array = (self._get_extension_data('full_fit') -
                      self._get_extension_data('emline_fit') -
                      self._get_extension_data('emline_base_fit'))
             model = self.datamodel['full_fit']
             mask = self._get_extension_data('flux', 'mask')
 
-        return DataCube(array,
-                        np.array(self._wavelength),
-                        ivar=None,
-                        mask=mask,
-                        redcorr=self._redcorr,
-                        binid=self.get_binid(model),
-                        unit=model.unit,
-                        pixmask_flag=model.pixmask_flag)
+        return self._get_datacube('stellarcont_fit', model, array, mask=mask)
 
     @property
     def lsf(self):
@@ -656,20 +746,13 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn, GetApertureMixIn):
 
         model = self.datamodel['lsf']
 
-        lsf_array = self._get_extension_data('lsf')
+        lsf_array = self._get_extension_source('lsf')
         if model.has_mask():
-            lsf_mask = self._get_extension_data('lsf', 'mask')
+            lsf_mask = self._get_extension_source('lsf', 'mask')
         else:
             lsf_mask = None
 
-        return DataCube(lsf_array,
-                        np.array(self._wavelength),
-                        ivar=None,
-                        mask=lsf_mask,
-                        redcorr=self._redcorr,
-                        binid=self.get_binid(model),
-                        unit=model.unit,
-                        pixmask_flag=model.pixmask_flag)
+        return self._get_datacube('lsf', model, lsf_array, mask=lsf_mask)
 
     def getCube(self):
         """Returns the associated `~marvin.tools.cube.Cube`."""
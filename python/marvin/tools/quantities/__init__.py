@@ -2,6 +2,6 @@
 
 from .analysis_props import AnalysisProperty
 from .base_quantity import QuantityMixIn
-from .datacube import DataCube
+from .datacube import BinnedDataCube, DataCube, LazyDataCube
 from .map import EnhancedMap, Map
 from .spectrum import Spectrum
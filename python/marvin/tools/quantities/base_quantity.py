@@ -18,7 +18,7 @@ import astropy.units as units
 import numpy
 
 import marvin.core.exceptions
-from marvin.tools.spaxel import Spaxel
+from marvin.tools.spaxel import SpaxelCollection
 from marvin.utils.general import maskbit
 from marvin.utils.general.general import _sort_dir
 
@@ -62,7 +62,7 @@ class BinInfo(object):
         return self._parent.is_binned()
 
     def get_bin_spaxels(self, lazy=True):
-        """Returns a list of the spaxels associated with this bin.
+        """Returns the spaxels associated with this bin.
 
         Parameters
         ----------
@@ -72,9 +72,9 @@ class BinInfo(object):
 
         Returns
         -------
-        spaxels : list
-            A list of all the `.Spaxel` instances associated with this
-            quantity binid.
+        spaxels : `.SpaxelCollection`
+            A collection of all the spaxels associated with this quantity
+            binid.
 
         """
 
@@ -83,17 +83,13 @@ class BinInfo(object):
                 'coordinates ({}, {}) do not correspond to a valid binid.'.format(self._spaxel.x,
                                                                                   self._spaxel.y))
 
-        spaxel_coords = zip(*numpy.where(self.binid_map.value == self.binid))
-        spaxels = []
+        yy, xx = numpy.where(self.binid_map.value == self.binid)
 
-        for ii, jj in spaxel_coords:
-            spaxels.append(Spaxel(x=jj, y=ii, plateifu=self._spaxel.plateifu,
-                                  release=self._spaxel.release, cube=self._spaxel._cube,
-                                  maps=self._spaxel._maps, modelcube=self._spaxel._modelcube,
-                                  bintype=self._spaxel.bintype, template=self._spaxel.template,
-                                  lazy=lazy))
-
-        return spaxels
+        return SpaxelCollection(xx, yy, plateifu=self._spaxel.plateifu,
+                                release=self._spaxel.release, cube=self._spaxel._cube,
+                                maps=self._spaxel._maps, modelcube=self._spaxel._modelcube,
+                                bintype=self._spaxel.bintype, template=self._spaxel.template,
+                                lazy=lazy)
 
 
 class QuantityMixIn(object):
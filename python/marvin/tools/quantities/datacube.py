@@ -211,3 +211,383 @@ class DataCube(units.Quantity, QuantityMixIn):
                            binid=self.binid, pixmask_flag=self.pixmask_flag)
 
         return new_obj
+
+
+def _loaded_method(name):
+    """Returns a method that calls ``name`` on the loaded `DataCube`."""
+
+    def method(self, *args, **kwargs):
+        return getattr(self._get_loaded(), name)(*args, **kwargs)
+
+    method.__name__ = name
+
+    return method
+
+
+class LazyDataCube(object):
+    """A `DataCube` that reads its data from the FITS file only when sliced.
+
+    `LazyDataCube` keeps a reference to the FITS extensions of the value,
+    ivar, and mask of a datacube and resolves slices through
+    `~astropy.io.fits.ImageHDU.section`, so that only the bytes of the
+    requested wavelength or spatial range are read from disk. Slicing
+    returns the same object as slicing the equivalent `DataCube` (a
+    `DataCube`, or a `.Spectrum` for a single spaxel) with the ivar, mask,
+    wavelength, and binid aligned.
+
+    Only basic indexing (integers and slices) is resolved lazily. Any other
+    index is applied to the fully loaded `DataCube`, which can also be
+    retrieved with :meth:`load`. Any other attribute of `DataCube` (e.g.,
+    ``value``, ``ivar``, ``mask``, or ``error``), arithmetic and comparison
+    operators, numpy functions, and ufuncs load the full datacube once and
+    are then applied to it, returning the same values and units as for the
+    `DataCube`. A `LazyDataCube` is not an instance of `DataCube` or
+    `~astropy.units.Quantity`, though; use :meth:`load` where one is
+    required. Reads are fastest when the file is not compressed, for
+    example when the ``use_file_cache`` option is set.
+
+    Parameters:
+        hdu (`~astropy.io.fits.ImageHDU`):
+            The extension with the value of the datacube. The first axis
+            must be the wavelength dimension.
+        wavelength (`~numpy.ndarray`):
+            A 1-D array with the wavelength of each spectral measurement.
+        ivar_hdu,mask_hdu (`~astropy.io.fits.ImageHDU`):
+            The extensions with the associated inverse variance and mask.
+        kwargs (dict):
+            Other parameters (e.g., ``unit``, ``redcorr``, ``binid``,
+            ``pixmask_flag``) to be passed to `DataCube`.
+
+    Example:
+        >>> flux = LazyDataCube(hdulist['FLUX'], hdulist['WAVE'].data,
+        ...                     ivar_hdu=hdulist['IVAR'], mask_hdu=hdulist['MASK'])
+        >>> window = flux[1000:1100, 10:20, 10:20]  # reads only this region
+
+    """
+
+    def __init__(self, hdu, wavelength, ivar_hdu=None, mask_hdu=None, **kwargs):
+
+        assert hdu.header['NAXIS'] == 3, 'the extension must contain a 3D array.'
+
+        self.hdu = hdu
+        self.ivar_hdu = ivar_hdu
+        self.mask_hdu = mask_hdu
+
+        self.wavelength = np.asarray(wavelength)
+        self.shape = tuple(hdu.header['NAXIS{0}'.format(axis)] for axis in [3, 2, 1])
+
+        assert len(self.wavelength) == self.shape[0], \
+            'wavelength and value spectral dimensions do not match'
+
+        self._kwargs = kwargs
+
+    def __repr__(self):
+
+        return '<LazyDataCube (extension={0!r}, shape={1!r})>'.format(self.hdu.name, self.shape)
+
+    def __len__(self):
+
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        """The number of dimensions of the datacube."""
+
+        return len(self.shape)
+
+    @property
+    def unit(self):
+        """The unit of the datacube."""
+
+        return self._kwargs.get('unit', units.dimensionless_unscaled)
+
+    def _read(self, hdu, sl):
+        """Returns ``sl`` of ``hdu`` as a 3D array."""
+
+        if hdu is None:
+            return None
+
+        return np.array(hdu.section[sl])
+
+    def _to_datacube(self, sl):
+        """Reads the 3D block ``sl`` into a `DataCube`."""
+
+        kwargs = self._kwargs.copy()
+
+        if kwargs.get('redcorr', None) is not None:
+            kwargs['redcorr'] = np.asarray(kwargs['redcorr'])[sl[0]]
+        if kwargs.get('binid', None) is not None:
+            kwargs['binid'] = np.asarray(kwargs['binid'])[sl[1:]]
+
+        return DataCube(self._read(self.hdu, sl), self.wavelength[sl[0]],
+                        ivar=self._read(self.ivar_hdu, sl),
+                        mask=self._read(self.mask_hdu, sl), **kwargs)
+
+    def load(self):
+        """Reads the full datacube and returns it as a `DataCube`."""
+
+        return self._to_datacube((slice(None),) * 3)
+
+    def _get_loaded(self):
+        """Returns the full datacube, loading it the first time."""
+
+        loaded = self.__dict__.get('_loaded', None)
+        if loaded is None:
+            loaded = self.__dict__['_loaded'] = self.load()
+
+        return loaded
+
+    def __getattr__(self, name):
+
+        # private attributes are never delegated, e.g., before __init__ sets them
+        if name.startswith('_'):
+            raise AttributeError('{0!r} object has no attribute {1!r}'.format(
+                self.__class__.__name__, name))
+
+        return getattr(self._get_loaded(), name)
+
+    def __array__(self, dtype=None):
+
+        return np.asarray(self._get_loaded(), dtype=dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+
+        def loaded(array):
+            return array._get_loaded() if isinstance(array, LazyDataCube) else array
+
+        inputs = tuple(loaded(array) for array in inputs)
+        if 'out' in kwargs:
+            kwargs['out'] = tuple(loaded(array) for array in kwargs['out'])
+
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+
+        def loaded(arg):
+            if isinstance(arg, LazyDataCube):
+                return arg._get_loaded()
+            elif isinstance(arg, (list, tuple)):
+                return type(arg)(loaded(item) for item in arg)
+            return arg
+
+        return func(*loaded(args), **{key: loaded(value) for key, value in kwargs.items()})
+
+    __add__ = _loaded_method('__add__')
+    __radd__ = _loaded_method('__radd__')
+    __sub__ = _loaded_method('__sub__')
+    __rsub__ = _loaded_method('__rsub__')
+    __mul__ = _loaded_method('__mul__')
+    __rmul__ = _loaded_method('__rmul__')
+    __truediv__ = _loaded_method('__truediv__')
+    __rtruediv__ = _loaded_method('__rtruediv__')
+    __pow__ = _loaded_method('__pow__')
+    __neg__ = _loaded_method('__neg__')
+    __pos__ = _loaded_method('__pos__')
+    __abs__ = _loaded_method('__abs__')
+    __lt__ = _loaded_method('__lt__')
+    __le__ = _loaded_method('__le__')
+    __gt__ = _loaded_method('__gt__')
+    __ge__ = _loaded_method('__ge__')
+
+    def __getitem__(self, sl):
+
+        sl = sl if isinstance(sl, tuple) else (sl,)
+
+        basic = all(isinstance(ss, (slice, int, np.integer)) for ss in sl)
+        if not basic or len(sl) > self.ndim:
+            return self.load().__getitem__(sl)
+
+        sl = sl + (slice(None),) * (self.ndim - len(sl))
+
+        # Integers are read as slices of length one to keep a 3D block, and
+        # then removed by slicing the DataCube, so that the output is the same
+        # as slicing a fully loaded DataCube.
+        block = []
+        squeeze = []
+        for ss, size in zip(sl, self.shape):
+            if isinstance(ss, slice):
+                block.append(ss)
+                squeeze.append(slice(None))
+            else:
+                ss = int(ss) + size if ss < 0 else int(ss)
+                if ss < 0 or ss >= size:
+                    raise IndexError('index {0} is out of bounds for size {1}'.format(ss, size))
+                block.append(slice(ss, ss + 1))
+                squeeze.append(0)
+
+        datacube = self._to_datacube(tuple(block))
+
+        if all(isinstance(ss, slice) for ss in squeeze):
+            return datacube
+
+        return datacube.__getitem__(tuple(squeeze))
+
+
+class BinnedDataCube(LazyDataCube):
+    """A binned `DataCube` that stores a single spectrum per bin.
+
+    In binned DAP outputs all the spaxels in a bin share the same spectrum.
+    `BinnedDataCube` keeps only the ``(nbins, nwave)`` value, ivar, and mask
+    of each unique binid, and the binid map that assigns a bin to each
+    spaxel. Slicing it expands only the requested region and returns the
+    same object as slicing the equivalent `DataCube`, while per-bin
+    operations can work on :attr:`spectra` directly.
+
+    Spaxels that do not belong to any bin (binid of -1) are treated as
+    another bin, so they are expanded with the spectrum of the first of them.
+    Use :meth:`from_datacube` to build a `BinnedDataCube` from full
+    ``(nwave, ny, nx)`` arrays.
+
+    Parameters:
+        value (`~numpy.ndarray`):
+            A 2-D array with the ``(nbins, nwave)`` spectrum of each bin.
+        wavelength (`~numpy.ndarray`):
+            A 1-D array with the wavelength of each spectral measurement.
+        binid (`~numpy.ndarray`):
+            The 2-D binid map of the datacube.
+        bins (`~numpy.ndarray`):
+            The sorted, unique binids of the rows of ``value``. All the
+            values in ``binid`` must be included.
+        ivar,mask (`~numpy.ndarray`):
+            The ``(nbins, nwave)`` inverse variance and mask of each bin.
+        kwargs (dict):
+            Other parameters (e.g., ``unit``, ``redcorr``, ``pixmask_flag``)
+            to be passed to `DataCube`.
+
+    Example:
+        >>> fit = BinnedDataCube.from_datacube(full_fit, wave, binid)
+        >>> fit.spectra.shape  # one spectrum per bin
+        (1245, 4563)
+        >>> spectrum = fit[:, 17, 17]  # the spectrum of the bin of a spaxel
+
+    """
+
+    def __init__(self, value, wavelength, binid, bins, ivar=None, mask=None, **kwargs):
+
+        self.value = np.asarray(value)
+        self.ivar = np.asarray(ivar) if ivar is not None else None
+        self.mask = np.asarray(mask) if mask is not None else None
+
+        self.bins = np.asarray(bins)
+        self.binid = np.asarray(binid)
+
+        assert self.value.ndim == 2 and self.binid.ndim == 2, 'invalid value or binid shape.'
+        assert len(self.bins) == self.value.shape[0], 'bins and value do not match.'
+        for array in [self.ivar, self.mask]:
+            assert array is None or array.shape == self.value.shape, 'invalid ivar or mask shape.'
+
+        # The row of each spaxel in the arrays of bins.
+        self._index = self.get_bin_index(self.binid)
+
+        self.wavelength = np.asarray(wavelength)
+        self.shape = (self.value.shape[1],) + self.binid.shape
+
+        assert len(self.wavelength) == self.shape[0], \
+            'wavelength and value spectral dimensions do not match'
+
+        kwargs.pop('binid', None)
+        self._kwargs = kwargs
+
+    def __repr__(self):
+
+        return '<BinnedDataCube (nbins={0}, shape={1!r})>'.format(self.nbins, self.shape)
+
+    @classmethod
+    def from_datacube(cls, value, wavelength, binid, ivar=None, mask=None, chunk_size=None,
+                      **kwargs):
+        """Creates a `BinnedDataCube` from full ``(nwave, ny, nx)`` arrays.
+
+        The spectrum of each bin is taken from its first spaxel. ``value``,
+        ``ivar``, and ``mask`` can be arrays or any object that returns an
+        array when sliced along the wavelength axis (e.g., the ``section`` of
+        a FITS extension), in which case they are read in chunks of
+        ``chunk_size`` wavelengths so that the full datacube is never kept in
+        memory. Other parameters are passed to `BinnedDataCube`.
+
+        Raises a `ValueError` if the spaxels of a bin do not all have the same
+        spectrum, e.g., for models fitted to each spaxel of a binned datacube.
+
+        """
+
+        binid = np.asarray(binid)
+
+        bins, first, inverse = np.unique(binid.ravel(), return_index=True, return_inverse=True)
+        yy, xx = np.unravel_index(first, binid.shape)
+
+        nwave = len(wavelength)
+        chunk_size = chunk_size or nwave
+
+        arrays = {}
+        for key, array in [('value', value), ('ivar', ivar), ('mask', mask)]:
+
+            if array is None:
+                arrays[key] = None
+                continue
+
+            compact = None
+            for w0 in range(0, nwave, chunk_size):
+                block = np.asarray(array[w0:min(w0 + chunk_size, nwave)])
+                if compact is None:
+                    compact = np.empty((len(bins), nwave), dtype=block.dtype)
+                compact[:, w0:w0 + block.shape[0]] = block[:, yy, xx].T
+
+                expanded = compact[inverse, w0:w0 + block.shape[0]].T.reshape(block.shape)
+                if not np.array_equal(block, expanded, equal_nan=True):
+                    raise ValueError('the spaxels of a bin do not share the same {0}.'
+                                     .format(key))
+
+            arrays[key] = compact
+
+        return cls(arrays['value'], wavelength, binid, bins, ivar=arrays['ivar'],
+                   mask=arrays['mask'], **kwargs)
+
+    @property
+    def nbins(self):
+        """The number of bins."""
+
+        return len(self.bins)
+
+    @property
+    def n_spaxels(self):
+        """The number of spaxels in each bin."""
+
+        return np.bincount(self._index.ravel(), minlength=self.nbins)
+
+    @property
+    def spectra(self):
+        """The spectrum of each bin as a ``(nbins, nwave)`` `.Spectrum`."""
+
+        return Spectrum(self.value, wavelength=self.wavelength, ivar=self.ivar, mask=self.mask,
+                        unit=self.unit, pixmask_flag=self._kwargs.get('pixmask_flag', None))
+
+    def get_bin_index(self, binid):
+        """Returns the row in :attr:`spectra` of one or more binids."""
+
+        index = np.searchsorted(self.bins, binid)
+        found = self.bins[np.minimum(index, self.nbins - 1)] == binid
+
+        if not np.all(found):
+            missing = np.unique(np.asarray(binid)[~found])
+            raise ValueError('binids {0!r} not found.'.format(missing))
+
+        return index
+
+    def _expand(self, array, sl):
+        """Expands the bins of ``array`` into the 3D block ``sl``."""
+
+        if array is None:
+            return None
+
+        return np.moveaxis(array[:, sl[0]][self._index[sl[1:]]], -1, 0)
+
+    def _to_datacube(self, sl):
+        """Expands the 3D block ``sl`` into a `DataCube`."""
+
+        kwargs = self._kwargs.copy()
+
+        if kwargs.get('redcorr', None) is not None:
+            kwargs['redcorr'] = np.asarray(kwargs['redcorr'])[sl[0]]
+
+        return DataCube(self._expand(self.value, sl), self.wavelength[sl[0]],
+                        ivar=self._expand(self.ivar, sl), mask=self._expand(self.mask, sl),
+                        binid=self.binid[sl[1:]], **kwargs)
@@ -231,8 +231,10 @@ class Map(units.Quantity, QuantityMixIn):
 
         unit = prop.unit
 
-        obj = cls(value, unit=unit, ivar=ivar, mask=mask, binid=binid,
-                  dtype=dtype, copy=copy)
+        obj = cls(value, unit=unit, ivar=ivar, mask=mask, dtype=dtype, copy=copy)
+
+        # The binid array is cached by the Maps and shared, read-only, by all its maps.
+        obj.binid = binid.value if binid is not None else None
 
         obj._datamodel = prop
         obj._maps = maps
@@ -286,21 +288,22 @@ class Map(units.Quantity, QuantityMixIn):
             fullname_mask = prop.db_column(ext='mask')
             props.append(getattr(table, fullname_mask))
 
-        n_props = len(props)
+        from marvin.db.ArrayUtils import get_bulk_arrays
 
         ivar = None
         mask = None
-        tmp = mdb.session.query(*props).filter(table.file_pk == maps.data.pk).use_cache(
-            maps.cache_region).order_by(table.spaxel_index).all()
+        arrays = get_bulk_arrays(mdb.session, props, [table.file_pk == maps.data.pk],
+                                 [table.spaxel_index], cache_region=maps.cache_region)
+
+        # spaxel_index runs along y first, hence the transposition.
+        ny, nx = maps.data.cube.shape.shape
+        arrays = [array.reshape((nx, ny)).T for array in arrays]
 
-        shape = (int(np.sqrt(len(tmp))), int(np.sqrt(len(tmp))), n_props)
-        newtmp = np.array(tmp).reshape(shape).T
-        value = newtmp[0, :, :]
+        value = arrays.pop(0)
         if prop.ivar:
-            ivar = newtmp[1, :, :]
+            ivar = arrays.pop(0)
         if prop.mask:
-            mask = newtmp[2, :, :]
-            mask = mask.astype(int)
+            mask = arrays.pop(0).astype(int)
 
         return value, ivar, mask
 
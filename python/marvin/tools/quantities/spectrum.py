@@ -111,7 +111,17 @@ class Spectrum(Quantity, QuantityMixIn):
         new_obj.ivar = self.ivar.__getitem__(sl) if self.ivar is not None else self.ivar
         new_obj._std = self._std.__getitem__(sl) if self._std is not None else self._std
         new_obj.mask = self.mask.__getitem__(sl) if self.mask is not None else self.mask
-        new_obj.wavelength = self.wavelength.__getitem__(sl) \
+
+        # For stacks of spectra (see Cube.get_spectra), the wavelength is
+        # only sliced along the last (spectral) axis.
+        sl_wave = sl
+        if self.ndim > 1:
+            if isinstance(sl, tuple) and len(sl) == self.ndim:
+                sl_wave = sl[-1]
+            else:
+                sl_wave = slice(None)
+
+        new_obj.wavelength = self.wavelength.__getitem__(sl_wave) \
             if self.wavelength is not None else self.wavelength
 
         return new_obj
@@ -10,33 +10,40 @@
 
 from __future__ import print_function, division, absolute_import, unicode_literals
 
+import base64
+import datetime
+import hashlib
+import json
 import os
 import re
 import warnings
-import datetime
 from collections import Counter, defaultdict
 from functools import wraps
 from operator import eq, ge, gt, le, lt, ne
 
 import numpy as np
 import six
+from dogpile.cache.api import NO_VALUE
 from marvin import config, log
 from marvin.api.api import Interaction
 from marvin.core import marvin_pickle
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
-from marvin.tools.results import Results, remote_mode_only
-from marvin.utils.general import temp_setattr, getKeywordArgs
+from marvin.db.caching import get_generation, invalidate_generation, regions
+from marvin.db.spaxelstats import get_spaxel_stats
+from marvin.tools.results import ColumnarBatches, Results, remote_mode_only
+from marvin.utils.general import temp_setattr, getKeywordArgs, get_dapall_path, get_drpall_path
+from marvin.utils.general.summary import SummaryQuery
 from marvin.utils.datamodel.query import datamodel
 from marvin.utils.datamodel.query.base import query_params
+from sqlalchemy_boolean_search import (BooleanSearchException, parse_boolean_search)
 
 if config.db:
     from marvin import marvindb
     from marvin.utils.general.structs import string_folding_wrapper
-    from sqlalchemy import bindparam, func, and_
+    from sqlalchemy import bindparam, func, and_, or_, tuple_
     from sqlalchemy.dialects import postgresql
     from sqlalchemy.orm import aliased
     from sqlalchemy.sql.expression import desc
-    from sqlalchemy_boolean_search import (BooleanSearchException, parse_boolean_search)
 
 try:
     import cPickle as pickle
@@ -67,13 +74,14 @@ def doQuery(**kwargs):
     start = kwargs.pop('start', None)
     end = kwargs.pop('end', None)
     query_type = kwargs.pop('query_type', None)
+    cursor = kwargs.pop('cursor', None)
     # get Query keyword arguments and check input kwargs
     qwargs = getKeywordArgs(Query)
     good_kwargs = {k: v for k, v in kwargs.items() if k in qwargs}
     # run the query
     q = Query(**good_kwargs)
     try:
-        res = q.run(start=start, end=end, query_type=query_type)
+        res = q.run(start=start, end=end, query_type=query_type, cursor=cursor)
     except TypeError as e:
         warnings.warn('Cannot run, query object is None: {0}.'.format(e), MarvinUserWarning)
         res = None
@@ -81,6 +89,44 @@ def doQuery(**kwargs):
     return q, res
 
 
+def _encode_cursor(fingerprint, key, index, direction='next'):
+    ''' Encodes a pagination cursor as an opaque url-safe string
+
+    Parameters:
+        fingerprint (str):
+            A hash identifying the query the cursor belongs to
+        key (tuple):
+            The values of the keyset columns of the row at the cursor
+        index (int):
+            The index of the page that starts (or ends) at the cursor
+        direction ({'next', 'previous'}):
+            Whether the cursor seeks the page after or before the row
+
+    Returns:
+        The cursor token
+
+    '''
+    cursor = {'q': fingerprint, 'k': list(key), 'i': index, 'd': direction}
+    token = json.dumps(cursor, default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(token).decode('ascii')
+
+
+def _decode_cursor(token):
+    ''' Decodes a pagination cursor, returning None if the token is not valid '''
+    if not token:
+        return None
+
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(str(token)).decode('utf-8'))
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(cursor, dict) or set(cursor) != set(['q', 'k', 'i', 'd']):
+        return None
+
+    return cursor
+
+
 def update_config(f):
     """Decorator that updates query object with new config drpver and dapver versions."""
 
@@ -104,7 +150,10 @@ class Query(object):
     as well as, a list of desired parameters to return.
 
     Query will use a local database if it finds on.  Otherwise a remote query uses
-    the API to run a query on the Utah Server and return the results.
+    the API to run a query on the Utah Server and return the results.  Without a
+    database, local queries (or auto queries without access to the API) on the
+    DRPall and DAPall parameters, including ``radial``, run over the local summary
+    files, if they exist.
 
     The Query returns a list of tupled parameters and passed them into the
     Marvin Results object.  The parameters are a combination of user-defined
@@ -139,6 +188,14 @@ class Query(object):
             The number limit on the number of returned results
         count_threshold (int):
             The threshold number to begin paginating results.  Default is 1000.
+        count_mode ({'separate', 'window', 'estimate'}):
+            How local database queries get their total count of rows, when it is not
+            in the query history.  "separate" runs a count query before the query.
+            "window" counts the rows in the same statement as the page of results,
+            with a ``count(*) over ()`` window, so that expensive joins, e.g. of
+            spaxel queries, are only run once.  "estimate" uses the count of rows
+            estimated by the database planner, and flags the ``totalcount`` of the
+            Results as approximate.  Default is "separate".
         nexus (str):
             The name of the database table to use as the nexus point for building
             the join table tree.  Can only be set in local mode.
@@ -152,7 +209,7 @@ class Query(object):
     def __init__(self, search_filter=None, return_params=None, return_type=None, targets=None,
                  quality=None, mode=None, return_all=False, default_params=None, nexus='cube',
                  sort='mangaid', order='asc', caching=True, limit=100, count_threshold=1000,
-                 verbose=False, release=None):
+                 count_mode='separate', verbose=False, release=None):
 
         # basic parameters
         self.release = release or config.release
@@ -180,6 +237,10 @@ class Query(object):
         self._caching = caching
         self.count_threshold = count_threshold
         self.limit = limit
+        assert count_mode in ['separate', 'window', 'estimate'], \
+            'count_mode must be one of "separate", "window", or "estimate"'
+        self.count_mode = count_mode
+        self._count_approximate = False
         self.verbose = verbose
 
         # add db specific parameters
@@ -188,6 +249,16 @@ class Query(object):
             self.session = marvindb.session
             self._modelgraph = marvindb.modelgraph
 
+        # keyset pagination
+        self._keyset = None
+        self._cursors = {}
+        self._page_keys = 0
+        self._page_seek = None
+        self._page_window = False
+
+        # whether the last page was found in the results cache
+        self._cache_hit = None
+
         # timings
         self._run_time = None
         self._final_time = None
@@ -197,7 +268,7 @@ class Query(object):
 
         # initialize a query
         if self.data_origin == 'file':
-            raise MarvinError('Cannot currently query a file')
+            self._init_file_query()
         elif self.data_origin == 'db':
             self._init_local_query()
         elif self.data_origin == 'api':
@@ -226,23 +297,46 @@ class Query(object):
             self._do_remote()
         if self.mode == 'auto':
             try:
-                self._do_local()
+                self._do_local(summary_files=False)
             except MarvinError as e:
-                log.debug('local mode failed. Trying remote now.')
-                self._do_remote()
+                # without a URL map, fall back to the local summary files
+                if not config.urlmap and self._has_drpall_file():
+                    log.debug('local mode failed. Using the summary files.')
+                    self._do_local()
+                else:
+                    log.debug('local mode failed. Trying remote now.')
+                    self._do_remote()
 
         # Sanity check to make sure data_origin has been properly set.
         assert self.data_origin in ['file', 'db', 'api'], 'data_origin is not properly set.'
 
-    def _do_local(self):
-        ''' Sets up to perform queries locally. '''
+    def _do_local(self, summary_files=True):
+        ''' Sets up to perform queries locally.
 
-        if not config.db:
-            warnings.warn('No local database found. Cannot perform queries.', MarvinUserWarning)
-            raise MarvinError('No local database found.  Query cannot be run in local mode')
-        else:
+        Without a database, queries run over the DRPall and DAPall files if
+        ``summary_files`` is True and the drpall file exists.
+
+        '''
+
+        if config.db:
             self.mode = 'local'
             self.data_origin = 'db'
+        elif summary_files and self._has_drpall_file():
+            self.mode = 'local'
+            self.data_origin = 'file'
+        else:
+            warnings.warn('No local database found. Cannot perform queries.', MarvinUserWarning)
+            raise MarvinError('No local database found.  Query cannot be run in local mode')
+
+    def _has_drpall_file(self):
+        ''' Checks if the drpall file for the query release exists locally '''
+
+        try:
+            path = get_drpall_path(self._drpver)
+        except Exception:
+            return False
+
+        return path is not None and os.path.exists(path)
 
     def _do_remote(self):
         ''' Sets up to perform queries remotely. '''
@@ -268,6 +362,51 @@ class Query(object):
         # build the query
         self._build_query()
 
+    def _init_file_query(self):
+        ''' Initialize a query over the DRPall and DAPall summary files '''
+
+        # the summary query returns the values of the (shared) list of parameters
+        self.query = SummaryQuery(self._drpver, self._dapver, release=self.release,
+                                  params=self.params, drpall=get_drpall_path(self._drpver),
+                                  dapall=get_dapall_path(self._drpver, self._dapver))
+
+        # set default parameters
+        self._set_defaultparams()
+
+        # get user-defined input parameters
+        returns = self.return_params or []
+        returns = [returns] if not isinstance(returns, list) else returns
+        self.return_params = [self.query.get_full_name(rp) for rp in returns]
+        self._add_columns(self.return_params)
+
+        # add the search filter and any functions in it
+        if self.search_filter:
+            if not isinstance(self.search_filter, six.string_types):
+                raise MarvinError('Input parameters must be a natural language string!')
+            try:
+                parsed = parse_boolean_search(self.search_filter)
+            except BooleanSearchException as e:
+                raise MarvinError('Your boolean expression contained a syntax '
+                                  'error: {0}'.format(e))
+
+            self._check_parsed(parsed)
+            self.filter_params.update(parsed.params)
+            self._add_columns(self.query.filter(parsed))
+
+            for fxn in self._parsed.functions:
+                if fxn.fxn_name != 'radial':
+                    raise MarvinError('{0} queries cannot be run on the summary '
+                                      'files.'.format(fxn.fxn_name))
+                self._radial_query(fxn)
+
+        # check for targets and quality flags to add in the filter
+        self._check_targets()
+        self._check_quality()
+
+        # rows from the DAPall have a bintype and template
+        if any(param.split('.')[0] in ['dapall', 'file'] for param in self.params):
+            self._add_columns(['bintype.name', 'template.name'])
+
     def _init_remote_query(self):
         ''' Initialize a remote API query '''
 
@@ -291,7 +430,11 @@ class Query(object):
                                'return_all': self.return_all,
                                'caching': self._caching}
 
-    def run(self, start=None, end=None, query_type=None):
+        # only send the count mode when needed, for servers that do not accept it
+        if self.count_mode != 'separate':
+            self._remote_params['count_mode'] = self.count_mode
+
+    def run(self, start=None, end=None, query_type=None, cursor=None):
         ''' Runs a Query
 
         Runs a query either locally or remotely.
@@ -303,6 +446,10 @@ class Query(object):
                 An ending index when slicing the query
             query_type (str):
                 The type of SQLAlchemy to submit. Can be "raw", "core", "orm"
+            cursor (str):
+                A pagination cursor from the ``cursors`` of previous Results of
+                this query.  When it marks the start (or end) of the requested
+                slice, the database seeks to it instead of skipping ``start`` rows.
 
         Returns:
             An instance of the :class:`~marvin.tools.query.results.Results`
@@ -318,13 +465,17 @@ class Query(object):
         '''
 
         if self.data_origin == 'api':
-            results = self._run_remote(start=start, end=end, query_type=query_type)
+            results = self._run_remote(start=start, end=end, query_type=query_type,
+                                       cursor=cursor)
         elif self.data_origin == 'db':
-            results = self._run_local(start=start, end=end, query_type=query_type)
+            results = self._run_local(start=start, end=end, query_type=query_type,
+                                      cursor=cursor)
+        elif self.data_origin == 'file':
+            results = self._run_file(start=start, end=end)
 
         return results
 
-    def _run_remote(self, start=None, end=None, query_type=None):
+    def _run_remote(self, start=None, end=None, query_type=None, cursor=None):
         ''' Run a remote Query
 
         Runs a query remotely.  Creates a dictionary of all input parameters and
@@ -338,6 +489,8 @@ class Query(object):
                 An ending index when slicing the query
             query_type (str):
                 The type of SQLAlchemy to submit. Can be "raw", "core", "orm"
+            cursor (str):
+                A pagination cursor to seek the slice from
 
         Returns:
             An instance of the :class:`~marvin.tools.query.results.Results`
@@ -352,14 +505,24 @@ class Query(object):
         url = config.urlmap['api']['querycubes']['url']
 
         # Update the remote params
-        self._remote_params.update({'start': start, 'end': end, 'query_type': query_type})
+        self._remote_params.update({'start': start, 'end': end, 'query_type': query_type,
+                                    'cursor': cursor})
+
+        # stream all the results in batches, if requested
+        batches = None
+        batch_size = config._custom_config.get('stream_batch_size', None)
+        if self.return_all and batch_size:
+            self._remote_params['batch_size'] = batch_size
+            if config._custom_config.get('columnar_results', False):
+                batches = ColumnarBatches()
 
         # set the start time of query
         starttime = datetime.datetime.now()
 
         # Request the query
         try:
-            ii = Interaction(route=url, params=self._remote_params, stream=True, datastream=self.return_all)
+            ii = Interaction(route=url, params=self._remote_params, stream=True,
+                             datastream=self.return_all, batches=batches)
         except Exception as e:
             raise MarvinError('API Query call failed: {0}'.format(e))
         else:
@@ -409,6 +572,9 @@ class Query(object):
         chunk = results.get('chunk', self.limit)
         totalcount = results.get('totalcount', None)
         runtime = results.get('runtime', None)
+        cursors = results.get('cursors', None)
+        cached = results.get('cached', None)
+        approximate = results.get('approximate_totalcount', False)
 
         # set some parameters when only data is available
         if len(results) == 1 and 'data' in results:
@@ -427,11 +593,12 @@ class Query(object):
         self.params = params
         remotes = dict(response_time=response_time, params=params, query=query, results=data,
                        totalcount=totalcount, count=count, runtime=runtime, chunk=int(chunk),
+                       cursors=cursors, cached=cached, approximate_totalcount=approximate,
                        mode=self.mode, queryobj=self)
 
         return remotes
 
-    def _run_local(self, start=None, end=None, query_type=None):
+    def _run_local(self, start=None, end=None, query_type=None, cursor=None):
         ''' Run a local database Query
 
         Parameters:
@@ -441,6 +608,8 @@ class Query(object):
                 An ending index when slicing the query
             query_type (str):
                 The type of SQLAlchemy to submit. Can be "raw", "core", "orm"
+            cursor (str):
+                A pagination cursor to seek the slice from
 
         Returns:
             An instance of the :class:`~marvin.tools.query.results.Results`
@@ -466,11 +635,22 @@ class Query(object):
         # check for query and get count
         totalcount = self._get_query_count()
 
-        # slice the query
-        query = self._slice_query(start=start, end=end, totalcount=totalcount)
+        if totalcount is None:
+            # count the rows in the same statement as the page
+            query = self.query
+            totalcount, results = self._get_windowed_page(start=start, end=end, cursor=cursor,
+                                                          query_type=query_type)
+        else:
+            # slice the query
+            query = self._slice_query(start=start, end=end, totalcount=totalcount)
 
-        # run the query and get the results
-        results = self._get_results(query, query_type=query_type, totalcount=totalcount)
+            def get_rows():
+                # seek from the cursor if possible, run the query and get the results
+                page = self._page_query(query, self._start, self._end, cursor=cursor)
+                rows = self._get_results(page, query_type=query_type, totalcount=totalcount)
+                return self._set_cursors(rows, self._start)
+
+            results = self._get_cached_page(get_rows, self._start, self._end, cursor=cursor)
 
         # get the runtime
         endtime = datetime.datetime.now()
@@ -479,7 +659,51 @@ class Query(object):
         # convert to Marvin Results
         final = Results(results=results, query=query, count=self._count, mode=self.mode,
                         returntype=self.return_type, queryobj=self, totalcount=totalcount,
-                        chunk=self.limit, runtime=self._run_time, start=self._start, end=self._end)
+                        chunk=self.limit, runtime=self._run_time, start=self._start, end=self._end,
+                        cursors=self._cursors, cached=self._cache_hit,
+                        approximate_totalcount=self._count_approximate)
+
+        # get the final time
+        posttime = datetime.datetime.now()
+        self._final_time = (posttime - starttime)
+
+        return final
+
+    def _run_file(self, start=None, end=None):
+        ''' Run a Query over the summary files
+
+        Parameters:
+            start (int):
+                A starting index when slicing the query
+            end (int):
+                An ending index when slicing the query
+
+        Returns:
+            An instance of the :class:`~marvin.tools.query.results.Results`
+            class containing the results of your Query.
+
+        '''
+
+        # Check for adding a sort
+        self._sort_query()
+
+        # set the start time of query
+        starttime = datetime.datetime.now()
+
+        # get the count, slice the query, and get the results
+        totalcount = self.query.count()
+        query = self._slice_query(start=start, end=end, totalcount=totalcount)
+        results = query.all()
+
+        # get the runtime
+        endtime = datetime.datetime.now()
+        self._run_time = (endtime - starttime)
+
+        # convert to Marvin Results
+        final = Results(results=results, query=query, count=self._count, mode=self.mode,
+                        data_origin=self.data_origin, returntype=self.return_type,
+                        queryobj=self, totalcount=totalcount, chunk=self.limit,
+                        runtime=self._run_time, start=self._start, end=self._end)
 
         # get the final time
         posttime = datetime.datetime.now()
@@ -490,6 +714,10 @@ class Query(object):
     def _sort_query(self):
         ''' Sort the SQLA query object by a given parameter '''
 
+        if self.data_origin == 'file':
+            self.query.order_by(self.sort, order=self.order or 'asc')
+            return
+
         if not isinstance(self.sort, type(None)):
             # check any shortcut names
             self.sort = self._marvinform._param_form_lookup.get_real_name(self.sort)
@@ -503,6 +731,7 @@ class Query(object):
 
             # check if sort param actually in the parameter list
             if sortparam.class_ not in self._modellist:
+                self._keyset = None
                 return
 
             # If order is specified, then do the sort
@@ -512,34 +741,377 @@ class Query(object):
                 # Check if order by already applied
                 if 'ORDER' in str(self.query.statement):
                     self.query = self.query.order_by(None)
+
+                # break ties with the primary keys so that pages can be seeked by key
+                self._keyset = self._get_keyset(sortparam)
+                keyset = self._keyset or [sortparam]
+
                 # Do the sorting
                 if 'desc' in self.order:
-                    self.query = self.query.order_by(desc(sortparam))
+                    self.query = self.query.order_by(*[desc(col) for col in keyset])
                 else:
-                    self.query = self.query.order_by(sortparam)
+                    self.query = self.query.order_by(*keyset)
+
+    def _get_keyset(self, sortparam):
+        ''' Returns the sort column followed by the primary keys of the queried tables
+
+        Returns None for grouped queries, whose rows are not unique on the
+        primary keys.
+
+        '''
+
+        if 'GROUP BY' in str(self.query.statement):
+            return None
+
+        keyset = [sortparam]
+        for model in self._modellist:
+            keyset.extend(col for col in model.__mapper__.primary_key if col not in keyset)
+
+        return keyset
+
+    def _get_fingerprint(self):
+        ''' Returns a hash identifying the filter and sorting of the query '''
+        items = [self.release, self.search_filter, self.targets, self.quality,
+                 self.sort, self.order]
+        return hashlib.md5(json.dumps(items, default=str).encode('utf-8')).hexdigest()
+
+    def _page_query(self, query, start, end, cursor=None):
+        ''' Seeks a sliced query from a pagination cursor
+
+        When the cursor was made by this query at the start (for "next") or the end
+        (for "previous") of the slice, replaces the OFFSET of the slice with a filter
+        on the keyset columns, i.e. the sort column and the primary keys.  Rows with
+        a NULL sort value, which sort last in ascending order, are kept when seeking
+        in ascending order.  Adds the keyset columns to the query, so that the cursors
+        of the returned page can be set with `._set_cursors`.
+
+        Parameters:
+            query (object):
+                The sliced SQLA query object
+            start (int):
+                The starting index of the slice
+            end (int):
+                The ending index of the slice
+            cursor (str):
+                A cursor from a previous page of this query
+
+        Returns:
+            The SQLA query object for the page
+
+        '''
+
+        self._page_keys = 0
+        self._page_seek = None
+
+        if not self._keyset or start is None or end is None:
+            return query
+
+        # check the cursor belongs to this query and page
+        cursor = _decode_cursor(cursor)
+        if cursor and cursor['q'] == self._get_fingerprint() and \
+                len(cursor['k']) == len(self._keyset) and None not in cursor['k']:
+            index = start if cursor['d'] == 'next' else end
+            if cursor['i'] == index and cursor['d'] in ['next', 'previous']:
+                # seek forwards, or backwards in reverse order, from the key
+                ascending = ('desc' in self.order) == (cursor['d'] == 'previous')
+                key = tuple_(*self._keyset)
+                seek = key > tuple_(*cursor['k']) if ascending else key < tuple_(*cursor['k'])
+                if ascending:
+                    # NULL sort values come last in ascending order, after any key
+                    seek = or_(seek, self._keyset[0].is_(None))
+                order = self._keyset if ascending else [desc(col) for col in self._keyset]
+                query = query.limit(None).offset(None).filter(seek).order_by(None).\
+                    order_by(*order).limit(end - start)
+                self._page_seek = cursor['d']
+
+        labels = [col.label('keyset_{0}'.format(i)) for i, col in enumerate(self._keyset)]
+        self._page_keys = len(labels)
+
+        return query.add_columns(*labels)
+
+    def _set_cursors(self, rows, start):
+        ''' Strips the keyset columns from a page of rows and sets its cursors
+
+        Parameters:
+            rows (list):
+                The rows returned by a query from `._page_query`
+            start (int):
+                The index of the first row
+
+        Returns:
+            The rows, without the keyset columns
+
+        '''
+
+        nkeys = self._page_keys
+        if not nkeys:
+            self._cursors = {}
+            return rows
+
+        keys = [tuple(row[-nkeys:]) for row in rows]
+        rows = [tuple(row[:-nkeys]) for row in rows]
+        if self._page_seek == 'previous':
+            keys.reverse()
+            rows.reverse()
+
+        self._cursors = {}
+        if rows:
+            fingerprint = self._get_fingerprint()
+            self._cursors['previous'] = _encode_cursor(fingerprint, keys[0], start, 'previous')
+            self._cursors['next'] = _encode_cursor(fingerprint, keys[-1], start + len(rows),
+                                                   'next')
+
+        return rows
+
+    def _get_page(self, start, end, cursor=None, session=None):
+        ''' Returns the rows between start and end of the query
+
+        Seeks the page from the cursor when possible, and updates the cursors
+        of the query.  Used by the local pagination of `~marvin.tools.results.Results`.
+
+        Parameters:
+            start (int):
+                The starting index of the page
+            end (int):
+                The ending index of the page
+            cursor (str):
+                A cursor from a previous page of this query
+            session (object):
+                The SQLA session to run the query with, e.g. when running from
+                another thread.  Defaults to the session of the query.
+
+        Returns:
+            A list of tupled results
+
+        '''
+
+        def get_rows():
+            query = self.query if session is None else self.query.with_session(session)
+            query = self._page_query(query.slice(start, end), start, end, cursor=cursor)
+            return self._set_cursors(query.all(), start)
+
+        return self._get_cached_page(get_rows, start, end, cursor=cursor)
+
+    def _get_cache_key(self, start=None, end=None, cursor=None):
+        ''' Returns the key of a page of the query in the results cache
+
+        The key is a hash of the normalized SQL of the query, the release, the
+        return parameters and the page, prefixed with the release and its
+        generation in the cache, so that the pages of a release can be invalidated
+        with `.invalidate_cache`.
+
+        Parameters:
+            start (int):
+                The starting index of the page
+            end (int):
+                The ending index of the page
+            cursor (str):
+                The cursor the page is seeked from
+
+        Returns:
+            The cache key string
+
+        '''
+
+        sql = ' '.join(self.show().split())
+        items = [sql, self.release, self.return_params, start, end, cursor]
+        digest = hashlib.md5(json.dumps(items, default=str).encode('utf-8')).hexdigest()
+        generation = get_generation('query', self.release)
+        return 'query:{0}:{1}:{2}'.format(self.release, generation, digest)
+
+    def _get_cached_page(self, get_rows, start=None, end=None, cursor=None):
+        ''' Returns a page of rows from the results cache, or gets and caches it
+
+        Only used when the ``query_cache`` option of the custom config is set and
+        ``caching`` is on.  Pages larger than ``query_cache_max_rows`` are not
+        cached.  Sets whether the page was found in the cache in ``_cache_hit``.
+
+        Parameters:
+            get_rows (callable):
+                Runs the query for the page, sets its cursors, and returns the rows
+            start,end,cursor:
+                See `._get_cache_key`
+
+        Returns:
+            A list of tupled results
+
+        '''
+
+        if not self._caching or not config._custom_config.get('query_cache', False):
+            self._cache_hit = None
+            return get_rows()
+
+        region = regions['query']
+        key = self._get_cache_key(start=start, end=end, cursor=cursor)
+        page = region.get(key)
+        if page is not NO_VALUE:
+            self._cache_hit = True
+            self._cursors = page['cursors']
+            return page['results']
+
+        rows = get_rows()
+        self._cache_hit = False
+
+        max_rows = config._custom_config.get('query_cache_max_rows', 10000)
+        if max_rows is None or len(rows) <= max_rows:
+            region.set(key, {'results': [tuple(row) for row in rows], 'cursors': self._cursors})
+
+        return rows
+
+    @staticmethod
+    def invalidate_cache(release=None):
+        ''' Invalidates the cached results of all the queries of a release
+
+        Parameters:
+            release (str):
+                The release whose results to invalidate.  Defaults to the current release.
+
+        '''
+
+        invalidate_generation('query', release or config.release)
 
     def _get_query_count(self):
         ''' Get the SQL query count of rows
 
         First checks the query history table to look up if this query has
-        already been run and a count produced.
+        already been run and a count produced.  Otherwise, counts the rows
+        as set by the ``count_mode``.
 
         Returns:
-            The total count of rows for the query
+            The total count of rows for the query, or None if the rows are
+            to be counted with the page of results
 
         '''
 
         totalcount = None
+        self._count_approximate = False
         if marvindb.isdbconnected:
             qm = self._check_history(check_only=True)
             totalcount = qm.count if qm else None
 
+        if totalcount is None and self.count_mode == 'window':
+            return None
+
+        if totalcount is None and self.count_mode == 'estimate':
+            totalcount = self._get_estimated_count()
+            self._count_approximate = totalcount is not None
+
         # run count if it doesn't exist
         if totalcount is None:
             totalcount = self.query.count()
 
         return totalcount
 
+    def _get_estimated_count(self):
+        ''' Get the count of rows of the query estimated by the database planner
+
+        Runs an EXPLAIN of the query, which does not execute it, and returns the
+        number of rows the planner expects the query to return.
+
+        Returns:
+            The estimated count of rows, or None if the query could not be explained
+
+        '''
+
+        sql = str(self._get_sql(self.query))
+        try:
+            with marvindb.db.engine.connect() as conn:
+                plan = conn.execute('EXPLAIN (FORMAT JSON) {0}'.format(sql)).scalar()
+        except Exception as e:
+            warnings.warn('Could not estimate the count of the query: {0}'.format(e),
+                          MarvinUserWarning)
+            return None
+
+        if isinstance(plan, six.string_types):
+            plan = json.loads(plan)
+
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def _get_windowed_page(self, start=None, end=None, cursor=None, query_type=None):
+        ''' Run a page of the query and count all of its rows in the same statement
+
+        Adds a ``count(*) over ()`` window column to the sliced query, so that the
+        total count of rows is returned with each row of the page, instead of
+        running a separate count query.  Queries not sliced by a start and end
+        get their first ``count_threshold`` (or ``limit``) rows, which are all the
+        results when the total count is within the threshold, and are cut to the
+        first ``limit`` rows otherwise.  The query is counted separately when the page
+        is empty or seeked backwards from a cursor.
+
+        Parameters:
+            start (int):
+                A starting index when slicing the query
+            end (int):
+                An ending index when slicing the query
+            cursor (str):
+                A pagination cursor to seek the slice from
+            query_type (str):
+                The type of SQLAlchemy to submit. Can be "raw", "core", "orm"
+
+        Returns:
+            The total count of rows for the query, and a list of tupled results
+
+        '''
+
+        first = False
+        if self.return_all is True:
+            warnings.warn('Warning: Attempting to return all results. '
+                          'This may take a long time or crash.', MarvinUserWarning)
+            start = None
+            end = None
+        elif start is not None and end is not None and (end - start) <= self.count_threshold:
+            warnings.warn('Getting subset of data {0} to {1}'.format(start, end),
+                          MarvinUserWarning)
+        else:
+            first = True
+            start = 0
+            end = max(self.count_threshold, self.limit)
+
+        # run the page of the query with a count of all its rows
+        window = func.count().over().label('window_count')
+        query = self._page_query(self.query.slice(start, end).add_columns(window), start, end,
+                                 cursor=cursor)
+        self._page_window = True
+        try:
+            rows = self._get_results(query, query_type=query_type,
+                                     totalcount=end - start if end else self.count_threshold)
+        finally:
+            self._page_window = False
+
+        # get the total count, from the rows of the page if possible
+        index = -(self._page_keys + 1)
+        if not rows or self._page_seek == 'previous':
+            totalcount = self.query.count()
+        elif self._page_seek == 'next':
+            totalcount = start + rows[0][index]
+        else:
+            totalcount = rows[0][index]
+
+        # only keep the first page of large results
+        if first and totalcount > self.count_threshold:
+            warnings.warn('Results contain more than {0} entries.  Only returning first '
+                          '{1}'.format(self.count_threshold, self.limit), MarvinUserWarning)
+            end = self.limit
+            rows = rows[:end]
+        elif first:
+            start = None
+            end = None
+
+        rows = self._set_cursors(rows, start or 0)
+        rows = [tuple(row[:-1]) for row in rows]
+
+        # check history
+        if self.data_origin == 'db' and marvindb.isdbconnected:
+            __ = self._check_history(totalcount=totalcount)
+
+        # set updated start, end, count, and total
+        self._start = start
+        self._end = end
+        self._count = (end - start) if end else totalcount
+        self._total = totalcount
+
+        return totalcount, rows
+
     def _check_history(self, check_only=None, totalcount=None):
         ''' Check the query against the query history schema
 
@@ -574,6 +1146,8 @@ class Query(object):
                 self.session.add(qm)
             else:
                 qm.n_run += 1
+                if qm.count is None:
+                    qm.count = totalcount
 
         return qm
 
@@ -605,8 +1179,8 @@ class Query(object):
         # self.totalcount = count if not self.totalcount else self.totalcount
 
         # check history
-        if marvindb.isdbconnected:
-            __ = self._check_history(totalcount=totalcount)
+        if self.data_origin == 'db' and marvindb.isdbconnected:
+            __ = self._check_history(totalcount=None if self._count_approximate else totalcount)
 
         if count > self.count_threshold and self.return_all is False:
             # res = res[0:self.limit]
@@ -679,7 +1253,9 @@ class Query(object):
         elif query_type == 'orm':
             # use the orm query
             yield_num = int(10**(np.floor(np.log10(totalcount))))
-            results = string_folding_wrapper(query.yield_per(yield_num), keys=self.params)
+            keys = self.params + (['window_count'] if self._page_window else []) + \
+                ['keyset_{0}'.format(i) for i in range(self._page_keys)]
+            results = string_folding_wrapper(query.yield_per(yield_num), keys=keys)
             res = list(results)
 
         return res
@@ -761,7 +1337,7 @@ class Query(object):
                 sql = self.__getattribute__(prop)
 
             return str(sql)
-        elif self.data_origin == 'api':
+        elif self.data_origin in ['api', 'file']:
             sql = self.search_filter
             return sql
 
@@ -1424,7 +2000,9 @@ class Query(object):
             quality_filter = self._create_quality_filter(daplabels, flag='DAPQUAL', quality_filter=quality_filter)
 
         # parse the filter and add to the main
-        if quality_filter:
+        if quality_filter and self.data_origin == 'file':
+            self._add_filter(quality_filter)
+        elif quality_filter:
             spaxelprop = marvindb.dapdb.__getattribute__('Clean{0}'.format(self.datamodel.dap_datamodel.property_table))
             models = [marvindb.datadb.Cube, marvindb.dapdb.File, spaxelprop]
             self._add_filter(quality_filter, modellist=models)
@@ -1501,9 +2079,13 @@ class Query(object):
 
         '''
 
-        modellist = modellist if modellist else marvindb.datadb
         # parse the filter and add to the main
         parsed = parse_boolean_search(strfilter)
+        if self.data_origin == 'file':
+            self._add_columns(self.query.filter(parsed))
+            return
+
+        modellist = modellist if modellist else marvindb.datadb
         f = parsed.filter(modellist)
         self.query = self.query.filter(and_(f))
 
@@ -1517,6 +2099,10 @@ class Query(object):
 
         # get new columns not already added
         columns = [columns] if not isinstance(columns, list) else columns
+        if self.data_origin == 'file':
+            self.params.extend([c for c in columns if c not in self.params])
+            return
+
         new_columns = list(set(columns) - set(self.params))
         if any(new_columns):
             colattrs = self._marvinform._param_form_lookup.mapToColumn([c for c in new_columns])
@@ -1709,6 +2295,11 @@ class Query(object):
 
         Syntax: fxn_name(expression) operator value
 
+        If the ``spaxel_stats`` file of the custom config has statistics of the
+        parameter (see `~marvin.db.spaxelstats.SpaxelStats`), the query is filtered
+        on the files selected from them, instead of joining subqueries that count
+        the spaxels of every file.
+
         Parameters:
             fxn (str):
                 The function condition used in the query filter
@@ -1730,19 +2321,55 @@ class Query(object):
         percent = float(value) / 100.
         op = opdict[ops]
 
-        # Retrieve the necessary subqueries
-        bincount = self._get_good_spaxels()
-        valcount = self._get_count_of(condition)
+        # select the files from the precomputed spaxel statistics, if possible
+        files = self._get_npergood_files(condition, op, percent)
 
-        # Join to the main query
-        self.query = self.query.join(bincount, bincount.c.binfile == self._spaxelclass.file_pk).\
-            join(valcount, valcount.c.valfile == self._spaxelclass.file_pk).\
-            filter(op(valcount.c.valcount, percent * bincount.c.goodcount))
+        if files is not None:
+            self.query = self.query.filter(self._spaxelclass.file_pk.in_(files))
+        else:
+            # Retrieve the necessary subqueries
+            bincount = self._get_good_spaxels()
+            valcount = self._get_count_of(condition)
+
+            # Join to the main query
+            self.query = self.query.\
+                join(bincount, bincount.c.binfile == self._spaxelclass.file_pk).\
+                join(valcount, valcount.c.valfile == self._spaxelclass.file_pk).\
+                filter(op(valcount.c.valcount, percent * bincount.c.goodcount))
 
         # Group the results by main default datadb parameters, so as not to include all spaxels
         newdefs = [d for d in self.default_params if 'spaxelprop' not in d]
         self.query = self._group_by(params=newdefs)
 
+    def _get_npergood_files(self, expression, op, percent):
+        ''' Selects the files of an npergood condition from the spaxel statistics
+
+        Parameters:
+            expression (str):
+                The filter expression of the condition
+            op (callable):
+                The operator comparing the count of spaxels to the good spaxels
+            percent (float):
+                The fraction of good spaxels
+
+        Returns:
+            The list of the file primary keys satisfying the condition, or None
+            if there are no up-to-date statistics of the parameter
+
+        '''
+
+        stats = get_spaxel_stats()
+        if stats is None:
+            return None
+
+        param, ops, value = self._parse_expression(expression)
+        attribute = self._marvinform._param_form_lookup.mapToColumn(param)
+        if attribute.class_ is not self._spaxelclass:
+            return None
+
+        return stats.select_files(self.session, self._spaxelclass, attribute, opdict[ops],
+                                  float(value), op, percent)
+
     def _parse_fxn(self, fxn):
         ''' Parse a fxn condition '''
         return fxn.fxn_name, fxn.condition, fxn.operator, fxn.value
@@ -1787,6 +2414,10 @@ class Query(object):
         # add RA, Dec as returned columns
         self._add_columns(['cube.ra', 'cube.dec'])
 
+        if self.data_origin == 'file':
+            self.query.cone(ra, dec, radius)
+            return
+
         # Join to the main query
         cone_filter = func.q3c_radial_query(marvindb.datadb.Cube.ra, marvindb.datadb.Cube.dec, ra, dec, radius)
         self.query = self.query.filter(cone_filter)
@@ -6,12 +6,13 @@
 
 from __future__ import print_function
 
+import concurrent.futures
 import copy
 import datetime
 import json
 import os
 import warnings
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from functools import wraps
 from operator import add
 
@@ -44,7 +45,7 @@ except ImportError:
     pd = None
     warnings.warn('Could not import pandas.', MarvinUserWarning)
 
-__all__ = ['Results', 'ResultSet']
+__all__ = ['Results', 'ResultSet', 'ColumnarResultSet']
 
 breadcrumb = MarvinBreadCrumb()
 
@@ -332,6 +333,258 @@ class ResultSet(list):
             return list.sort(self)
 
 
+def _rows_to_array(rows, names):
+    ''' Converts a list of row tuples into a numpy structured array
+
+    Numeric, boolean, and string columns keep a native numpy dtype.  Columns
+    with null or mixed values are stored as objects.
+
+    '''
+
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+
+    arrays = []
+    for column in columns:
+        array = np.array(column)
+        # numpy converts mixed values to strings
+        mixed = (array.dtype.kind in 'US' and
+                 not all(isinstance(value, (six.string_types, bytes)) for value in column))
+        if array.dtype.kind not in 'biufUS' or array.ndim != 1 or mixed:
+            array = np.empty(len(column), dtype=object)
+            array[:] = column
+        arrays.append(array)
+
+    data = np.empty(len(rows), dtype=[(str(name), array.dtype)
+                                      for name, array in zip(names, arrays)])
+    for name, array in zip(names, arrays):
+        data[str(name)] = array
+
+    return data
+
+
+def _concatenate_arrays(arrays):
+    ''' Concatenates structured arrays with the same fields, promoting their dtypes '''
+
+    if len(arrays) == 1:
+        return arrays[0]
+
+    names = arrays[0].dtype.names
+    dtype = []
+    for name in names:
+        dtypes = [array.dtype[name] for array in arrays]
+        kinds = set(dt.kind for dt in dtypes)
+        mixed = len(kinds) > 1 and (kinds & set('US'))
+        dtype.append((name, np.dtype(object) if mixed else np.result_type(*dtypes)))
+
+    data = np.empty(sum(len(array) for array in arrays), dtype=dtype)
+    start = 0
+    for array in arrays:
+        for name in names:
+            data[name][start:start + len(array)] = array[name]
+        start += len(array)
+
+    return data
+
+
+class ColumnarBatches(object):
+    ''' Collects the batches of a streamed query as numpy structured arrays
+
+    Used as the store of a `~marvin.api.batches.BatchDecoder`, so that each
+    batch of rows is converted to arrays as it arrives.
+
+    '''
+
+    def __init__(self):
+        self._arrays = []
+
+    def __len__(self):
+        return sum(len(array) for array in self._arrays)
+
+    def append_batch(self, rows):
+        names = ['f{0}'.format(ii) for ii in range(len(rows[0]))] if rows else []
+        if names:
+            self._arrays.append(_rows_to_array([tuple(row) for row in rows], names))
+
+    def to_array(self, names):
+        ''' Returns the rows as a single structured array with fields ``names`` '''
+
+        if not self._arrays:
+            return _rows_to_array([], names)
+
+        data = _concatenate_arrays(self._arrays)
+        data.dtype.names = tuple(str(name) for name in names)
+        return data
+
+
+class ColumnarResultSet(ResultSet):
+    ''' A Set of Results stored by column
+
+    A `ResultSet` whose values are kept in a numpy structured array, with one
+    field per column, instead of a list of ResultRow objects.  Rows are only
+    created, as ResultRow objects, when they are accessed, while column access,
+    sorting, slicing, and conversion to tables use the arrays directly.  Used
+    when the ``columnar_results`` config option is set.
+
+    Parameters:
+        data (`~numpy.ndarray`):
+            A structured array with a field for each column (using the
+            remote names of the columns). Required.
+        row_class (class):
+            The ResultRow class of the rows, as returned by `marvintuple`.
+        kwargs:
+            See `ResultSet`.
+
+    '''
+
+    _chunk_size = 10000
+
+    def __init__(self, data, row_class=None, **kwargs):
+        self.data = data
+        self._row_class = row_class or marvintuple('ResultRow', list(data.dtype.names),
+                                                   results=kwargs.get('results', None))
+        kwargs['count'] = kwargs.get('count', None) or len(data)
+        ResultSet.__init__(self, [], **kwargs)
+
+    def __reduce__(self):
+        # rows are not stored in the list, only in the array of the state
+        return (self.__class__.__new__, (self.__class__,), self.__dict__)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for ii in range(0, len(self.data), self._chunk_size):
+            for values in self.data[ii:ii + self._chunk_size].tolist():
+                yield self._row_class(*values)
+
+    def __reversed__(self):
+        return reversed(self.to_list())
+
+    def __contains__(self, row):
+        return any(row == item for item in self)
+
+    def __eq__(self, other):
+        return isinstance(other, list) and self.to_list() == list(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        old = repr(self.to_list()).replace('),', '),\n')
+        return ('<ResultSet(set={0.current_page}/{0.pages}, index={0.index}:{0.end_index}, '
+                'count_in_set={0.count}, total={0.total})>\n{1}'.format(self, old))
+
+    def __getitem__(self, value):
+        if isinstance(value, six.string_types) and self.columns and str(value) in self.columns:
+            rows = self.data[self.columns[str(value)].remote].tolist()
+            if rows:
+                return rows[0] if len(rows) == 1 else rows
+            raise ValueError('{0} not found in the list'.format(value))
+        elif isinstance(value, (int, np.integer)):
+            return self._row_class(*self.data[value].tolist())
+        elif isinstance(value, slice):
+            return self._new_set(self.data[value], index=int(value.start or 0))
+        elif isinstance(value, np.ndarray):
+            return np.array(self.to_list())[value]
+
+        return ResultSet.__getitem__(self, value)
+
+    def __add__(self, other):
+
+        if not isinstance(other, ColumnarResultSet) or self.index == other.index or \
+                self.data.dtype.names != other.data.dtype.names:
+            return ResultSet.__add__(self._to_result_set(), other)
+
+        # row-wise add
+
+        # warn if the subsets are not consecutive
+        if abs(self.index - other.index) > self.count:
+            warnings.warn('You are combining non-consectuive sets! '
+                          'The indexing and ordering will be messed up')
+
+        first, second = (self, other) if self.index < other.index else (other, self)
+
+        # filter out any rows that already exist in the set
+        existing = set(first.data.tolist())
+        keep = np.array([values not in existing for values in second.data.tolist()], dtype=bool)
+        data = _concatenate_arrays([first.data, second.data[keep]])
+
+        self.count = len(data)
+        self.index = min(self.index, other.index)
+
+        return self._new_set(data, index=self.index, count=self.count)
+
+    def _new_set(self, data, index=0, count=None):
+        ''' Creates a new columnar set with the same columns and results '''
+        return ColumnarResultSet(data, row_class=self._row_class, index=index,
+                                 count=count or len(data), total=self.total,
+                                 columns=self.columns, results=self._results)
+
+    def _to_result_set(self):
+        ''' Returns the set as a `ResultSet` of ResultRow objects '''
+        return ResultSet(self.to_list(), index=self.index, count=self.count, total=self.total,
+                         columns=self.columns, results=self._results)
+
+    def append(self, row):
+        self.extend([row])
+
+    def extend(self, rows):
+        rows = rows.data if isinstance(rows, ColumnarResultSet) else \
+            _rows_to_array([tuple(row) for row in rows], self.data.dtype.names)
+        self.data = _concatenate_arrays([self.data, rows])
+
+    def _unsupported(self, *args, **kwargs):
+        raise MarvinError('columnar result sets cannot be modified in place. '
+                          'Use to_list() to get a list of rows.')
+
+    insert = pop = remove = __setitem__ = __delitem__ = _unsupported
+
+    def __iadd__(self, rows):
+        self.extend(rows)
+        return self
+
+    def to_dict(self, name=None, format_type='listdict'):
+        ''' Convert the ResultSet into a dictionary
+
+        See `ResultSet.to_dict`.
+
+        '''
+
+        if format_type != 'dictlist':
+            return ResultSet.to_dict(self, name=name, format_type=format_type)
+
+        keys = [name] if name else self.columns.list_params('remote')
+        return {key: self.data[key].tolist() for key in keys}
+
+    def to_list(self):
+        ''' Converts to a standard Python list object '''
+        return list(iter(self))
+
+    def sort(self, name=None, reverse=False):
+        ''' Sort the results
+
+        In-place sorting of the result set, using a stable sort of the arrays.
+        When no name is specified, sorts by all the columns, in order.
+
+        Parameters:
+            name (str):
+                Column name to sort on.  Default is None.
+            reverse (bool):
+                If True, sorts in reverse (descending) order.
+
+        '''
+
+        values = self.data[self.columns[name].remote] if name else self.data
+        if reverse:
+            # reverse the order of the values, but not of the equal ones
+            index = (len(values) - 1 - np.argsort(values[::-1], kind='stable'))[::-1]
+        else:
+            index = np.argsort(values, kind='stable')
+        self.data = self.data[index]
+
+
 class Results(object):
     ''' A class to handle results from queries on the MaNGA dataset
 
@@ -360,11 +613,24 @@ class Results(object):
             For paginated results, the starting index value of the results.  Defaults to 0.
         end (int):
             For paginated results, the ending index value of the resutls.  Defaults to start+chunk.
+        cursors (dict):
+            For paginated results, the opaque ``previous`` and ``next`` cursors of the
+            current page, used to seek the adjacent pages instead of offsetting.
+        cached (bool):
+            Whether the page of results was found in the query results cache, or
+            None if the cache was not used.
+        approximate_totalcount (bool):
+            If True, the ``totalcount`` is the count of rows estimated by the database
+            planner, rather than an exact count.
 
     Attributes:
         count (int):  The count of objects in your current page of results
         totalcount (int): The total number of results in the query
+        approximate_totalcount (bool): Whether the totalcount is an estimate
         query_time (datetime): A datetime TimeDelta representation of the query runtime
+        cursors (dict): The pagination cursors of the current page
+        cache_hits (int): The number of pages found in the query results cache
+        cache_misses (int): The number of pages not found in the query results cache
 
     Returns:
         results: An object representing the Results entity
@@ -384,7 +650,8 @@ class Results(object):
     def __init__(self, results=None, mode=None, data_origin=None, release=None, count=None,
                  totalcount=None, runtime=None, response_time=None, chunk=None, start=None,
                  end=None, queryobj=None, query=None, search_filter=None, return_params=None,
-                 return_type=None, limit=None, params=None, **kwargs):
+                 return_type=None, limit=None, params=None, cursors=None, cached=None,
+                 approximate_totalcount=False, **kwargs):
 
         # basic parameters
         self.results = results
@@ -406,6 +673,7 @@ class Results(object):
         self.datamodel = datamodel[self.release]
         self.count = count if count else len(self.results)
         self.totalcount = totalcount if totalcount else self.count
+        self.approximate_totalcount = bool(approximate_totalcount)
         self._runtime = runtime
         self.query_time = self._getRunTime() if self._runtime is not None else None
         self.response_time = response_time
@@ -414,8 +682,23 @@ class Results(object):
         self.chunk = chunk
         self.start = start
         self.end = end
-        self.sortcol = None
-        self.order = None
+        self.sortcol = self._queryobj.sort if self._queryobj else None
+        self.order = self._queryobj.order if self._queryobj else None
+        self.cursors = cursors or {}
+
+        # query results cache counters
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._count_cache(cached)
+
+        # store the values by column
+        self._columnar = config._custom_config.get('columnar_results', False)
+
+        # background prefetching of pages
+        self._prefetcher = None
+        self._prefetched = OrderedDict()
+        self._prefetch_depth = 0
+        self._prefetch_rows = None
 
         # drop breadcrumb
         breadcrumb.drop(message='Initializing MarvinResults {0}'.format(self.__class__),
@@ -426,6 +709,11 @@ class Results(object):
             self._set_page()
             self._create_result_set(index=self.start)
 
+        # start prefetching the next pages, if requested in the config
+        depth = config._custom_config.get('results_prefetch', 0)
+        if depth and self.count < self.totalcount:
+            self.prefetch(depth, max_rows=config._custom_config.get('results_prefetch_rows', None))
+
         # Auto convert to Marvin Object
         if self.return_type:
             self.convertToTool(self.return_type)
@@ -461,6 +749,8 @@ class Results(object):
         # return the string query or compile the real query
         if isstr:
             return self.query
+        elif self.data_origin == 'file':
+            return self.search_filter
         else:
             return str(self.query.statement.compile(compile_kwargs={'literal_binds': True}))
 
@@ -541,6 +831,12 @@ class Results(object):
             >>>  (u'4-4602', u'1901', -9999.0)]
         '''
         remotename = self._check_column(name, 'remote')
+
+        # the prefetched pages follow the previous sort
+        resorted = (remotename, order) != (self.sortcol, self.order)
+        if resorted:
+            self._cancel_prefetch()
+
         self.sortcol = remotename
         self.order = order
 
@@ -561,6 +857,9 @@ class Results(object):
 
             self._interaction(url, params, create_set=True, calltype='Sort')
 
+        if resorted:
+            self._schedule_prefetch()
+
         return self.results
 
     def toTable(self):
@@ -589,7 +888,12 @@ class Results(object):
             >>>   4-4602     1901      -9999.0
         '''
         try:
-            tabres = Table(rows=self.results, names=self.columns.full)
+            if isinstance(self.results, ColumnarResultSet):
+                data = self.results.data
+                tabres = Table([data[name] for name in data.dtype.names],
+                               names=self.columns.full, copy=False)
+            else:
+                tabres = Table(rows=self.results, names=self.columns.full)
         except ValueError as e:
             raise MarvinError('Could not make astropy Table from results: {0}'.format(e))
         return tabres
@@ -708,9 +1012,14 @@ class Results(object):
             3  1-22942   7992  12705  8.470360e+10  0.104958
             4  1-22948   7992   9102  1.023530e+11  0.119399
         '''
-        res = self.results.to_list() if self.results else []
         try:
-            dfres = pd.DataFrame(res)
+            if isinstance(self.results, ColumnarResultSet):
+                data = self.results.data
+                dfres = pd.DataFrame({name: data[name] for name in data.dtype.names},
+                                     columns=list(data.dtype.names))
+            else:
+                res = self.results.to_list() if self.results else []
+                dfres = pd.DataFrame(res)
         except (ValueError, NameError) as e:
             raise MarvinError('Could not make pandas dataframe from results: {0}'.format(e))
         return dfres
@@ -734,7 +1043,27 @@ class Results(object):
         ntnames = self.columns.list_params('remote')
         # dynamically create a new ResultRow Class
         rows = rows if rows else self.results
-        row_is_dict = isinstance(rows[0], dict)
+        row_is_dict = not isinstance(rows, ColumnarBatches) and isinstance(rows[0], dict)
+
+        # store the values by column
+        if isinstance(rows, ColumnarBatches) or (
+                self._columnar and not (isinstance(rows, ResultSet) and
+                                        not isinstance(rows, ColumnarResultSet))):
+            if isinstance(rows, ColumnarBatches):
+                data = rows.to_array(ntnames)
+            elif isinstance(rows, ColumnarResultSet):
+                data = rows.data
+            elif row_is_dict:
+                data = _rows_to_array([tuple(row[name] for name in ntnames) for row in rows],
+                                      ntnames)
+            else:
+                data = _rows_to_array(rows, ntnames)
+            nt = marvintuple('ResultRow', ntnames, results=self)
+            self.count = len(data)
+            self.results = ColumnarResultSet(data, row_class=nt, count=self.count,
+                                             total=self.totalcount, index=index, results=self)
+            return
+
         if not isinstance(rows, ResultSet):
             nt = marvintuple('ResultRow', ntnames, results=self)
             if row_is_dict:
@@ -802,8 +1131,8 @@ class Results(object):
         dict_results = self.results.to_dict()
 
         # set bad pickled attributes to None
-        attrs = ['results', 'datamodel', 'columns', '_queryobj']
-        vals = [dict_results, None, None, None]
+        attrs = ['results', 'datamodel', 'columns', '_queryobj', '_prefetcher', '_prefetched']
+        vals = [dict_results, None, None, None, None, OrderedDict()]
         isnotstr = not isinstance(self.query, six.string_types)
         if isnotstr:
             attrs += ['query']
@@ -916,6 +1245,39 @@ class Results(object):
 
         '''
 
+        remotes = self._request(url, params, calltype=calltype)
+        output = remotes['results']
+        self.response_time = remotes['response_time']
+        self._runtime = remotes['runtime']
+        self.query_time = self._getRunTime()
+        self.cursors = remotes.get('cursors') or {}
+        self._count_cache(remotes.get('cached'))
+        index = kwargs.get('index', None)
+        if create_set:
+            self._create_result_set(index=index, rows=output)
+        else:
+            return output
+
+    def _request(self, url, params, calltype=''):
+        ''' Send a remote request and return the parameters of the response
+
+        Parameters:
+            url (str):
+                The url of the request
+            params (dict):
+                A dictionary of parameters (get or post) to send with the request
+            calltype (str):
+                The method call sending the request
+
+        Returns:
+            A dict of the remote parameters, as returned by
+            `~marvin.tools.query.Query._get_remote_parameters`
+
+        Raises:
+            MarvinError: Raises on any HTTP Request error
+
+        '''
+
         # check if the returnparams parameter is in the proper format
         if 'returnparams' in params:
             return_params = params.get('returnparams', None)
@@ -928,22 +1290,215 @@ class Results(object):
         # check if we're getting all results
         datastream = calltype == 'getAll'
 
+        # stream all the results in batches, if requested
+        batches = None
+        batch_size = config._custom_config.get('stream_batch_size', None)
+        if datastream and batch_size:
+            params['batch_size'] = batch_size
+            batches = ColumnarBatches() if self._columnar else None
+
         # send the request
         try:
-            ii = Interaction(route=url, params=params, stream=True, datastream=datastream)
+            ii = Interaction(route=url, params=params, stream=True, datastream=datastream,
+                             batches=batches)
         except MarvinError as e:
             raise MarvinError('API Query {0} call failed: {1}'.format(calltype, e))
+
+        return self._queryobj._get_remote_parameters(ii)
+
+    def _fetch_page(self, start, end, cursor=None, limit=None, calltype='', threaded=False,
+                    sort=None, order=None):
+        ''' Fetch a page of results, locally or remotely
+
+        Seeks the page of a database query from the pagination cursor, if it
+        marks the start or end of the page, instead of offsetting the query.
+        Does not modify the Results, so that it can run in the background.
+
+        Parameters:
+            start (int):
+                The starting index of the page
+            end (int):
+                The ending index of the page
+            cursor (str):
+                The pagination cursor to seek from
+            limit (int):
+                The limit to send with a remote request
+            calltype (str):
+                The method call fetching the page
+            threaded (bool):
+                If True, local database queries use the session of the current thread
+            sort,order (str):
+                The sort column and order of a remote request.  Default to the
+                current ``sortcol`` and ``order``
+
+        Returns:
+            A dict with the ``results``, ``cursors`` and ``cached`` flag of the page, plus
+            the ``response_time`` and ``runtime`` of remote requests
+
+        '''
+
+        if self.mode == 'local':
+            if not self._queryobj or self._queryobj.data_origin != 'db':
+                return {'results': self.query.slice(start, end).all()}
+
+            session = None
+            if threaded:
+                from marvin import marvindb
+                session = marvindb.db.Session()
+
+            rows = self._queryobj._get_page(start, end, cursor=cursor, session=session)
+            return {'results': rows, 'cursors': self._queryobj._cursors,
+                    'cached': self._queryobj._cache_hit}
+
+        # Fail if no route map initialized
+        if not config.urlmap:
+            raise MarvinError('No URL Map found.  Cannot make remote call')
+
+        # Get the query route
+        url = config.urlmap['api']['getsubset']['url']
+        params = {'searchfilter': self.search_filter, 'returnparams': self.return_params,
+                  'start': start, 'end': end, 'limit': limit,
+                  'sort': sort or self.sortcol, 'order': order or self.order, 'cursor': cursor}
+        if self._queryobj and self._queryobj.count_mode != 'separate':
+            params['count_mode'] = self._queryobj.count_mode
+        return self._request(url, params, calltype=calltype)
+
+    def _get_page(self, start, end, cursor=None, limit=None, calltype=''):
+        ''' Retrieve a page of results and set it as the current result set
+
+        Uses the prefetched page if there is one, otherwise fetches it.  Errors
+        raised while prefetching the page are raised here.
+
+        Parameters:
+            start (int):
+                The starting index of the page
+            end (int):
+                The ending index of the page
+            cursor,limit,calltype:
+                See `._fetch_page`
+
+        '''
+
+        if self._prefetcher is None:
+            page = self._fetch_page(start, end, cursor=cursor, limit=limit, calltype=calltype)
         else:
-            remotes = self._queryobj._get_remote_parameters(ii)
-            output = remotes['results']
-            self.response_time = remotes['response_time']
-            self._runtime = remotes['runtime']
+            # keep only the prefetched pages that follow this one
+            future = self._prefetched.pop((start, end), None)
+            self._cancel_prefetch(end)
+            if future is None or future.cancelled():
+                future = self._prefetcher.submit(self._fetch_page, start, end, cursor, limit,
+                                                 calltype, True, self.sortcol, self.order)
+            page = future.result()
+
+        self.results = page['results']
+        self.cursors = page.get('cursors') or {}
+        self._count_cache(page.get('cached'))
+        if 'response_time' in page:
+            self.response_time = page['response_time']
+            self._runtime = page['runtime']
             self.query_time = self._getRunTime()
-            index = kwargs.get('index', None)
-            if create_set:
-                self._create_result_set(index=index, rows=output)
+
+        if self.results:
+            self._create_result_set(index=start)
+
+    def _count_cache(self, cached):
+        ''' Counts a page as a hit or a miss of the query results cache, if it was used '''
+        if cached is True:
+            self.cache_hits += 1
+        elif cached is False:
+            self.cache_misses += 1
+
+    def prefetch(self, depth=1, max_rows=None):
+        ''' Fetch the next pages of results in the background
+
+        Turns on prefetching of the pages that follow the current one.  While
+        a page is being used, the next ``depth`` pages are fetched, in order,
+        by a background thread, so that `.getNext`, `.extendSet`, and `.loop`
+        return them without waiting for the database or the API.  Errors raised
+        while fetching a page are raised when the page is retrieved.
+
+        Parameters:
+            depth (int):
+                The number of pages to fetch ahead of the current one.  Set
+                to 0 to turn prefetching off.
+            max_rows (int):
+                The maximum number of prefetched rows to hold in memory.  No
+                page is prefetched if it would exceed the limit.  Defaults to
+                no limit.
+
+        Example:
+            >>> r = q.run()
+            >>> r.prefetch(depth=2)
+            >>> r.loop(chunk=1000)
+
+        '''
+
+        assert depth >= 0, 'the prefetch depth cannot be negative.'
+
+        self._cancel_prefetch()
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=False)
+            self._prefetcher = None
+
+        self._prefetch_depth = int(depth)
+        self._prefetch_rows = max_rows
+
+        if self._prefetch_depth > 0:
+            self._prefetcher = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            self._schedule_prefetch()
+
+    def _schedule_prefetch(self):
+        ''' Queue the fetching of the pages after the current one '''
+
+        if self._prefetcher is None or not self.chunk or self.end is None:
+            return
+
+        start = self.end
+        previous = self.cursors.get('next')
+        nrows = 0
+        for (pstart, pend), future in self._prefetched.items():
+            start, previous = pend, future
+            nrows += pend - pstart
+
+        while len(self._prefetched) < self._prefetch_depth and start < self.totalcount:
+            end = min(start + self.chunk, self.totalcount)
+            nrows += end - start
+            if self._prefetch_rows is not None and nrows > self._prefetch_rows:
+                break
+
+            previous = self._prefetcher.submit(self._prefetch_page, start, end, previous,
+                                               self.sortcol, self.order)
+            self._prefetched[(start, end)] = previous
+            start = end
+
+    def _prefetch_page(self, start, end, previous, sort, order):
+        ''' Fetch a page in the background, seeking from the previous page if possible
+
+        The sort column and order are those of the results when the page was queued.
+
+        '''
+
+        cursor = previous
+        if isinstance(previous, concurrent.futures.Future):
+            # the previous page is always finished, since pages are fetched in order
+            failed = previous.cancelled() or previous.exception() is not None
+            cursor = None if failed else (previous.result().get('cursors') or {}).get('next')
+
+        return self._fetch_page(start, end, cursor=cursor, limit=self.chunk,
+                                calltype='getNext', threaded=True, sort=sort, order=order)
+
+    def _cancel_prefetch(self, start=None):
+        ''' Cancel the prefetched pages, except the consecutive pages from start '''
+
+        kept = OrderedDict()
+        for (pstart, pend), future in self._prefetched.items():
+            if start is not None and pstart == start:
+                kept[(pstart, pend)] = future
+                start = pend
             else:
-                return output
+                future.cancel()
+
+        self._prefetched = kept
 
     def _check_column(self, name, name_type):
         ''' Check if a name exists as a column '''
@@ -996,6 +1551,10 @@ class Results(object):
             params = {'searchfilter': self.search_filter, 'format_type': 'list',
                       'return_all': True, 'returnparams': self.return_params}
             output = self._interaction(url, params, calltype='getList')
+        elif to_ndarray and isinstance(self.results, ColumnarResultSet):
+            # return a copy of the column array
+            column = self.results.data[self._check_column(name, 'remote')]
+            return column.copy() if len(column) else None
         else:
             # only deal with current page
             output = self.results[name] if self.results.count > 1 else [self.results[name]]
@@ -1186,26 +1745,13 @@ class Results(object):
 
         # This grabs the next chunk
         log.info('Retrieving next {0}, from {1} to {2}'.format(self.chunk, newstart, newend))
-        if self.mode == 'local':
-            self.results = self.query.slice(newstart, newend).all()
-            if self.results:
-                self._create_result_set(index=newstart)
-        elif self.mode == 'remote':
-            # Fail if no route map initialized
-            if not config.urlmap:
-                raise MarvinError('No URL Map found.  Cannot make remote call')
-
-            # Get the query route
-            url = config.urlmap['api']['getsubset']['url']
-            params = {'searchfilter': self.search_filter, 'returnparams': self.return_params,
-                      'start': newstart, 'end': newend, 'limit': chunk,
-                      'sort': self.sortcol, 'order': self.order}
-            self._interaction(url, params, calltype='getNext', create_set=True,
-                              index=newstart)
+        self._get_page(newstart, newend, cursor=self.cursors.get('next'), limit=chunk,
+                       calltype='getNext')
 
         self.start = newstart
         self.end = newend
         self.count = len(self.results)
+        self._schedule_prefetch()
 
         if self.return_type:
             self.convertToTool(self.return_type)
@@ -1263,27 +1809,13 @@ class Results(object):
 
         # This grabs the previous chunk
         log.info('Retrieving previous {0}, from {1} to {2}'.format(self.chunk, newstart, newend))
-        if self.mode == 'local':
-            self.results = self.query.slice(newstart, newend).all()
-            if self.results:
-                self._create_result_set(index=newstart)
-        elif self.mode == 'remote':
-            # Fail if no route map initialized
-            if not config.urlmap:
-                raise MarvinError('No URL Map found.  Cannot make remote call')
-
-            # Get the query route
-            url = config.urlmap['api']['getsubset']['url']
-
-            params = {'searchfilter': self.search_filter, 'returnparams': self.return_params,
-                      'start': newstart, 'end': newend, 'limit': chunk,
-                      'sort': self.sortcol, 'order': self.order}
-            self._interaction(url, params, calltype='getPrevious', create_set=True,
-                              index=newstart)
+        self._get_page(newstart, newend, cursor=self.cursors.get('previous'), limit=chunk,
+                       calltype='getPrevious')
 
         self.start = newstart
         self.end = newend
         self.count = len(self.results)
+        self._schedule_prefetch()
 
         if self.return_type:
             self.convertToTool(self.return_type)
@@ -1334,24 +1866,12 @@ class Results(object):
         self.start = start
         self.end = end
         self.chunk = limit
-        if self.mode == 'local':
-            self.results = self.query.slice(start, end).all()
-            if self.results:
-                self._create_result_set(index=start)
-        elif self.mode == 'remote':
-            # Fail if no route map initialized
-            if not config.urlmap:
-                raise MarvinError('No URL Map found.  Cannot make remote call')
-
-            # Get the query route
-            url = config.urlmap['api']['getsubset']['url']
-
-            params = {'searchfilter': self.search_filter, 'returnparams': self.return_params,
-                      'start': start, 'end': end, 'limit': limit,
-                      'sort': self.sortcol, 'order': self.order}
-            self._interaction(url, params, calltype='getSubset', create_set=True, index=start)
+        # a cursor is only used if the subset starts at the end of the current page
+        self._get_page(start, end, cursor=self.cursors.get('next'), limit=limit,
+                       calltype='getSubset')
 
         self.count = len(self.results)
+        self._schedule_prefetch()
         if self.return_type:
             self.convertToTool(self.return_type)
 
@@ -1401,7 +1921,9 @@ class Results(object):
         ''' Converts the list of results into Marvin Tool objects
 
         Creates a list of Marvin Tool objects from a set of query results.
-        The new list is stored in the Results.objects property.
+        The new list is stored in the Results.objects property. For spaxels,
+        the list contains a `~marvin.tools.spaxel.Spaxel` for each result,
+        taken from a `~marvin.tools.spaxel.SpaxelCollection` per galaxy.
         If the Query.returntype parameter is specified, then the Results object
         will automatically convert the results to the desired Tool on initialization.
 
@@ -1472,18 +1994,17 @@ class Results(object):
             assert 'spaxelprop.x' in paramlist and 'spaxelprop.y' in paramlist, \
                    'Parameters must include spaxelprop.x and y in order to convert to Marvin Spaxel.'
 
-            self.objects = []
-
             tab = self.toTable()
-            uniq_plateifus = list(set(self.getListOf('plateifu')))
+            self.objects = [None] * len(tab)
 
-            for plateifu in uniq_plateifus:
+            # One collection per galaxy, whose spaxels are placed in the row of their result.
+            for plateifu in OrderedDict.fromkeys(tab['cube.plateifu'].tolist()):
                 c = self._get_object(Cube, plateifu=plateifu, mode=mode)
-                univals = tab['cube.plateifu'] == plateifu
-                x = tab[univals]['spaxelprop.x'].tolist()
-                y = tab[univals]['spaxelprop.y'].tolist()
-                spaxels = c[y, x]
-                self.objects.extend(spaxels)
+                rows = np.nonzero(tab['cube.plateifu'] == plateifu)[0]
+                x = tab['spaxelprop.x'][rows].tolist()
+                y = tab['spaxelprop.y'][rows].tolist()
+                for row, spaxel in zip(rows, c.getSpaxel(x=x, y=y, xyorig='lower')):
+                    self.objects[row] = spaxel
         elif tooltype == 'rss':
             self.objects = [self._get_object(RSS, plateifu=res.plateifu, mode=mode) for res in self.results[0:limit]]
         elif tooltype == 'modelcube':
@@ -14,6 +14,7 @@ from __future__ import division, print_function
 
 import os
 import warnings
+from collections import OrderedDict
 
 import astropy.io.ascii
 import astropy.table
@@ -26,6 +27,7 @@ import marvin
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
 from marvin.utils.datamodel.drp import datamodel_rss
 from marvin.utils.datamodel.drp.base import Spectrum as SpectrumDataModel
+from marvin.utils.general import decode_array, get_fits_cache
 
 from .core import MarvinToolsClass
 from .cube import Cube
@@ -71,6 +73,9 @@ class RSS(MarvinToolsClass, NSAMixIn, list):
         #: when accessed. Otherwise, they need to be loaded via `.RSSFiber.load`.
         self.autoload = autoload
 
+        # The full arrays of the extensions, retrieved at once by load_all.
+        self._bulk_data = None
+
         if self.data_origin == 'file':
             self._load_rss_from_file(data=self.data)
         elif self.data_origin == 'db':
@@ -142,12 +147,76 @@ class RSS(MarvinToolsClass, NSAMixIn, list):
         return Cube(plateifu=self.plateifu, mode=self.mode, release=self.release)
 
     def load_all(self):
-        """Loads all the `.RSSFiber` associated to this `.RSS` instance."""
+        """Loads all the `.RSSFiber` associated to this `.RSS` instance.
+
+        Each extension is read only once, as a ``(nfibers, nwave)`` array (in
+        remote mode, with a single API request per extension), and the fibres
+        that are not loaded yet are filled in place from the rows of those
+        arrays. The ivar, mask, and other spectra of each fibre are views of
+        the full arrays, so only the flux is copied.
+
+        """
+
+        # Retrieves all the extensions, which RSSFiber.load then uses.
+        self._get_bulk_data()
 
-        for rssfiber in self:
+        for rssfiber in list.__iter__(self):
             if not rssfiber.loaded:
                 rssfiber.load()
 
+    def _get_extension_names(self):
+        """Returns the names of all the extensions used by the datamodel."""
+
+        ext_names = []
+
+        for extension in self.datamodel.rss + self.datamodel.spectra:
+
+            ext_names.append(extension.fits_extension())
+
+            if extension.has_mask():
+                ext_names.append(extension.fits_extension('mask'))
+
+            if hasattr(extension, 'has_ivar') and extension.has_ivar():
+                ext_names.append(extension.fits_extension('ivar'))
+            elif hasattr(extension, 'has_std') and extension.has_std():
+                ext_names.append(extension.fits_extension('std'))
+
+        return list(OrderedDict.fromkeys(ext_names))
+
+    def _get_bulk_data(self):
+        """Returns an `~astropy.io.fits.HDUList` with the full arrays of all the extensions.
+
+        For file RSS this is the HDUList of the file. In remote mode, each
+        extension is retrieved with a single request and kept for the
+        following calls.
+
+        """
+
+        if self.data_origin == 'file':
+            return self.data
+
+        if self._bulk_data is not None:
+            return self._bulk_data
+
+        url = marvin.config.urlmap['api']['getRSSExtension']['url']
+
+        rss_data = fits.HDUList([fits.PrimaryHDU()])
+
+        for ext_name in self._get_extension_names():
+
+            try:
+                response = self._toolInteraction(url.format(name=self.plateifu,
+                                                            rss_extension=ext_name.lower()))
+            except Exception as ee:
+                raise MarvinError('found a problem retrieving RSS extension {!r} for '
+                                  'plateifu={!r}: {}'.format(ext_name, self.plateifu, str(ee)))
+
+            rss_data.append(fits.ImageHDU(data=decode_array(response.getData()), name=ext_name))
+
+        self._bulk_data = rss_data
+
+        return rss_data
+
     def select_fibers(self, exposure_no=None, set=None, mjd=None):
         """Selects fibres that match one or multiple of the input parameters.
 
@@ -202,8 +271,12 @@ class RSS(MarvinToolsClass, NSAMixIn, list):
         if data is not None:
             assert isinstance(data, fits.HDUList), 'data is not an HDUList object'
         else:
+            fits_cache = get_fits_cache()
             try:
-                self.data = fits.open(self.filename)
+                if fits_cache is not None:
+                    self.data = fits_cache.open(self.filename)
+                else:
+                    self.data = fits.open(self.filename)
             except (IOError, OSError) as err:
                 raise OSError('filename {0} cannot be found: {1}'.format(self.filename, err))
 
@@ -287,6 +360,22 @@ class RSS(MarvinToolsClass, NSAMixIn, list):
                                  obsinfo=exp_obsinfo, pixmask_flag=self.header['MASKNAME']))
 
 
+def _spectrum_view(cls, value, wavelength, unit=None, ivar=None, mask=None):
+    """Returns ``value`` as an instance of ``cls``, a `.Spectrum`, without copying it."""
+
+    obj = astropy.units.Quantity(value, unit=unit, copy=False).view(cls)
+
+    if isinstance(wavelength, astropy.units.Quantity):
+        obj.wavelength = wavelength
+    else:
+        obj.wavelength = numpy.asarray(wavelength) * astropy.units.Angstrom
+
+    obj.ivar = ivar
+    obj.mask = mask
+
+    return obj
+
+
 class RSSFiber(Spectrum):
     """A `~astropy.units.Quantity` representing a fibre observation.
 
@@ -390,12 +479,16 @@ class RSSFiber(Spectrum):
 
         assert self.loaded is False, 'object already loaded.'
 
+        data_origin = self.rss.data_origin
+
         # Depending on whether the parent RSS is a file or API-populated, we
         # select the data to use.
-        if self.rss.data_origin == 'file':
+        if self.rss.data_origin == 'file' or self.rss._bulk_data is not None:
 
-            # If the data origin is a file we use the HDUList in rss.data
-            rss_data = self.rss.data
+            # If the data origin is a file, or all the extensions have already
+            # been retrieved by RSS.load_all, we use the full arrays.
+            rss_data = self.rss._get_bulk_data()
+            data_origin = 'file'
 
         elif self.rss.data_origin == 'api':
 
@@ -430,7 +523,7 @@ class RSSFiber(Spectrum):
 
             # Retrieve the value (and mask and ivar, if associated) for each extension.
             value, ivar, mask = self._get_extension_data(extension, rss_data,
-                                                         data_origin=self.rss.data_origin)
+                                                         data_origin=data_origin)
 
             if extension.name == 'flux':
 
@@ -441,8 +534,8 @@ class RSSFiber(Spectrum):
 
             else:
 
-                new_spectrum = Spectrum(value, self.wavelength, ivar=ivar, mask=mask,
-                                        unit=extension.unit)
+                new_spectrum = _spectrum_view(Spectrum, value, self.wavelength,
+                                              unit=extension.unit, ivar=ivar, mask=mask)
                 setattr(self, extension.name, new_spectrum)
 
                 self._spectra.append(extension.name)
@@ -468,27 +561,27 @@ class RSSFiber(Spectrum):
         # not a row-stacked array, so we consider it a 1D array.
         is_extension_data_1D = isinstance(extension, SpectrumDataModel) or data_origin == 'api'
 
-        value = data[extension.fits_extension()].data
+        # If this is an RSS, gets the right row in the stacked spectra. Rows
+        # are views of the full arrays.
+        def get_row(ext_name):
+            array = data[ext_name].data
+            return array if is_extension_data_1D else array[self.fiberid, :]
+
+        value = get_row(extension.fits_extension())
 
         if extension.has_mask():
-            mask = data[extension.fits_extension('mask')].data
+            mask = get_row(extension.fits_extension('mask'))
         else:
             mask = None
 
         if hasattr(extension, 'has_ivar') and extension.has_ivar():
-            ivar = data[extension.fits_extension('ivar')].data
+            ivar = get_row(extension.fits_extension('ivar'))
         elif hasattr(extension, 'has_std') and extension.has_std():
-            std = data[extension.fits_extension('std')].data
+            std = get_row(extension.fits_extension('std'))
             ivar = 1. / (std**2)
         else:
             ivar = None
 
-        # If this is an RSS, gets the right row in the stacked spectra.
-        if not is_extension_data_1D:
-            value = value[self.fiberid, :]
-            mask = mask[self.fiberid, :] if mask is not None else None
-            ivar = ivar[self.fiberid, :] if ivar is not None else None
-
         return value, ivar, mask
 
     @property
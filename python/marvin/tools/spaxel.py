@@ -16,6 +16,7 @@ import inspect
 import itertools
 import warnings
 
+import astropy.table
 import numpy as np
 
 import marvin
@@ -28,6 +29,7 @@ import marvin.utils.general.general
 from marvin.core.exceptions import MarvinBreadCrumb, MarvinError, MarvinUserWarning
 from marvin.utils.datamodel.dap import datamodel as dap_datamodel
 from marvin.utils.datamodel.drp import datamodel as drp_datamodel
+from marvin.utils.general.maskbit import Maskbit
 from marvin.utils.general.structs import FuzzyDict
 
 
@@ -382,3 +384,384 @@ class Spaxel(object):
             qual_flags.append(self.datamodel.dap.bitmasks['MANGA_DAPQUAL'])
 
         return qual_flags
+
+
+class SpaxelCollection(object):
+    """An array-backed collection of spaxels from the same galaxy.
+
+    Instead of a list of `.Spaxel` objects, each one with its own
+    quantities, a `.SpaxelCollection` only stores the ``x`` and ``y``
+    coordinates of the spaxels and the parent tools. The spectra and the
+    DAP properties of all the spaxels are retrieved at once, when first
+    accessed, and kept as ``(N, nwave)`` and ``(N, nproperties)`` arrays.
+
+    The collection behaves like a list of spaxels: ``len(collection)``
+    returns the number of spaxels, and indexing with an integer returns
+    the `.Spaxel` for that position, which is created on demand and kept
+    for later use. Indexing with a slice, a list of indices, or a boolean
+    array returns a new `.SpaxelCollection` with the selected spaxels.
+
+    Parameters:
+        x,y (array):
+            The ``x`` and ``y`` coordinates of the spaxels in the cube
+            (0-indexed).
+        cube,maps,modelcube:
+            The parent tools, as in `.Spaxel`. Tools passed as ``True`` are
+            instantiated the first time they are needed.
+        lazy (bool):
+            Whether the `.Spaxel` objects returned when indexing the
+            collection must be lazily loaded.
+        kwargs (dict):
+            Arguments to be passed to `.Spaxel` and to the parent tools
+            when (and if) they are initialised.
+
+    Example:
+        >>> cube = Cube('8485-1901')
+        >>> spaxels = cube.getSpaxel(x=[10, 11, 12], y=[15, 15, 15], xyorig='lower',
+        ...                          maps=True)
+        >>> spaxels.flux.shape
+        (3, 4563)
+        >>> spaxels.maps['emline_gflux_ha_6564']
+        <AnalysisProperty [ 1.15..., 1.46..., 1.71...] 1e-17 erg / (cm2 s spaxel)>
+
+    """
+
+    def __init__(self, x, y, cube=True, maps=True, modelcube=True, lazy=False, **kwargs):
+
+        if not cube and not maps and not modelcube:
+            raise MarvinError('no inputs defined.')
+
+        self.x = np.atleast_1d(np.asarray(x, dtype=int))
+        self.y = np.atleast_1d(np.asarray(y, dtype=int))
+
+        assert self.x.shape == self.y.shape and self.x.ndim == 1, \
+            'x and y must be 1D arrays of the same size.'
+
+        self._cube = cube
+        self._maps = maps
+        self._modelcube = modelcube
+
+        for attr in ['mangaid', 'plateifu', 'release', 'bintype', 'template']:
+
+            value = kwargs.pop(attr, None) or \
+                getattr(cube, attr, None) or \
+                getattr(maps, attr, None) or \
+                getattr(modelcube, attr, None)
+
+            setattr(self, attr, value)
+
+        self._lazy = lazy
+        self._kwargs = kwargs
+
+        self._spaxels = {}
+        self._spectra = {}
+        self._maps_block = None
+        self._maps_columns = {}
+
+    def __len__(self):
+
+        return len(self.x)
+
+    def __iter__(self):
+
+        for ii in range(len(self)):
+            yield self[ii]
+
+    def __repr__(self):
+
+        return '<Marvin SpaxelCollection (plateifu={0}, n_spaxels={1})>'.format(
+            self.plateifu, len(self))
+
+    def __getitem__(self, index):
+
+        if isinstance(index, (int, np.integer)):
+
+            if index < 0:
+                index += len(self)
+            if index < 0 or index >= len(self):
+                raise IndexError('spaxel index out of range.')
+
+            if index not in self._spaxels:
+                self._spaxels[index] = Spaxel(
+                    self.x[index], self.y[index], cube=self._cube, maps=self._maps,
+                    modelcube=self._modelcube, lazy=self._lazy, plateifu=self.plateifu,
+                    mangaid=self.mangaid, release=self.release, bintype=self.bintype,
+                    template=self.template, **self._kwargs)
+
+            return self._spaxels[index]
+
+        if not isinstance(index, slice):
+            index = np.asarray(index)
+
+        subset = SpaxelCollection(self.x[index], self.y[index], cube=self._cube,
+                                  maps=self._maps, modelcube=self._modelcube,
+                                  lazy=self._lazy, plateifu=self.plateifu,
+                                  mangaid=self.mangaid, release=self.release,
+                                  bintype=self.bintype, template=self.template, **self._kwargs)
+
+        # The subset reuses the arrays that have already been retrieved.
+        subset._spectra = {name: spectra[index] for name, spectra in self._spectra.items()}
+        subset._maps_columns = {name: {key: array[index] for key, array in column.items()}
+                                for name, column in self._maps_columns.items()}
+        if self._maps_block is not None:
+            subset._maps_block = {key: self._maps_block[key][index]
+                                  for key in ['value', 'ivar', 'mask']}
+            subset._maps_block.update(names=self._maps_block['names'],
+                                      dtypes=self._maps_block['dtypes'])
+
+        return subset
+
+    def _get_tool(self, tool):
+        """Returns the parent tool, instantiating it if necessary."""
+
+        tool_classes = {'cube': marvin.tools.cube.Cube,
+                        'maps': marvin.tools.maps.Maps,
+                        'modelcube': marvin.tools.modelcube.ModelCube}
+
+        assert tool in tool_classes, 'invalid tool {0!r}'.format(tool)
+
+        value = getattr(self, '_' + tool)
+
+        if isinstance(value, tool_classes[tool]):
+            return value
+
+        if value is False or value is None:
+            raise MarvinError('this SpaxelCollection was created without {0}.'.format(tool))
+
+        tool_input = (value if value is not True else None) or self.plateifu or self.mangaid
+
+        kwargs = self._kwargs.copy()
+        if tool != 'cube':
+            kwargs.update(bintype=self.bintype, template=self.template)
+
+        # Stores the instance so that it is shared by the spaxels in the collection.
+        setattr(self, '_' + tool, tool_classes[tool](tool_input, release=self.release, **kwargs))
+
+        return getattr(self, '_' + tool)
+
+    def get_spectra(self, datacube='flux'):
+        """Returns the spectra of all the spaxels as a single `.Spectrum`.
+
+        The spectra are retrieved with `.Cube.get_spectra` the first time
+        they are requested and kept for subsequent calls.
+
+        Parameters:
+            datacube (str):
+                The name of the datacube from which the spectra will be
+                extracted. Defaults to ``'flux'``.
+
+        Returns:
+            spectra (`.Spectrum`):
+                A `.Spectrum` of shape ``(N, nwave)`` in the order of the
+                spaxels in the collection.
+
+        """
+
+        if datacube not in self._spectra:
+            self._spectra[datacube] = self._get_tool('cube').get_spectra(
+                x=self.x, y=self.y, xyorig='lower', datacube=datacube)
+
+        return self._spectra[datacube]
+
+    @property
+    def flux(self):
+        """The ``(N, nwave)`` flux `.Spectrum` of the spaxels."""
+
+        return self.get_spectra('flux')
+
+    @property
+    def maps(self):
+        """A dictionary-like access to the DAP properties of the spaxels.
+
+        ``collection.maps[name]`` returns an `.AnalysisProperty` of length
+        N with the value, ivar, and mask of the property in each spaxel.
+        ``name`` is matched against the Maps datamodel as in
+        `.Maps.getMap`.
+
+        """
+
+        return _SpaxelCollectionMaps(self)
+
+    def _get_maps_block(self):
+        """Returns the ``(N, nproperties)`` arrays of the Maps properties.
+
+        For file Maps, all the properties are gathered at once from
+        `.Maps.get_property_block`. Returns None otherwise.
+
+        """
+
+        if self._maps_block is not None:
+            return self._maps_block
+
+        maps = self._get_tool('maps')
+        if maps.data_origin != 'file':
+            return None
+
+        block = maps.get_property_block()
+
+        self._maps_block = {key: block[key][:, self.y, self.x].T
+                            for key in ['value', 'ivar', 'mask']}
+        self._maps_block.update(names=block['names'], dtypes=block['dtypes'])
+
+        return self._maps_block
+
+    def _get_property(self, name):
+        """Returns the `.AnalysisProperty` for ``name`` in all the spaxels."""
+
+        from marvin.tools.quantities import AnalysisProperty
+
+        maps = self._get_tool('maps')
+        prop = maps.datamodel[name]
+        full_name = prop.full()
+
+        block = self._get_maps_block()
+
+        if block is not None:
+
+            idx = block['names'].index(full_name)
+            data = {}
+            for key in ['value', 'ivar', 'mask']:
+                dtype = block['dtypes'][key][idx]
+                data[key] = block[key][:, idx].astype(dtype) if dtype is not None else None
+
+        else:
+
+            if full_name not in self._maps_columns:
+                map_ = maps.getMap(full_name, exact=True)
+                nspaxels = len(self)
+                self._maps_columns[full_name] = {
+                    'value': map_.value[self.y, self.x],
+                    'ivar': (map_.ivar[self.y, self.x] if map_.ivar is not None
+                             else np.full(nspaxels, np.nan)),
+                    'mask': (map_.mask[self.y, self.x] if map_.mask is not None
+                             else np.zeros(nspaxels, dtype=int))}
+
+            column = self._maps_columns[full_name]
+            data = {'value': column['value'],
+                    'ivar': column['ivar'] if prop.has_ivar() else None,
+                    'mask': column['mask'].astype(int) if prop.has_mask() else None}
+
+        return AnalysisProperty(data['value'], unit=prop.unit, ivar=data['ivar'],
+                                mask=data['mask'], pixmask_flag=prop.pixmask_flag)
+
+    def stack(self, datacube='flux', method='mean', mask_labels=('DONOTUSE',)):
+        """Combines the spectra of the spaxels into a single spectrum.
+
+        Pixels flagged with ``mask_labels`` or with ``ivar=0`` are ignored
+        and the inverse variance is propagated to the output spectrum.
+        Wavelengths without any valid pixel are flagged ``DONOTUSE``.
+
+        Parameters:
+            datacube (str):
+                The name of the datacube to stack. Defaults to ``'flux'``.
+            method ({'mean', 'sum'}):
+                How to combine the spectra.
+            mask_labels (list):
+                The DRP pixmask labels of the pixels to ignore.
+
+        Returns:
+            spectrum (`.Spectrum`):
+                The stacked 1D spectrum.
+
+        """
+
+        assert method in ['sum', 'mean'], 'invalid method {0!r}'.format(method)
+
+        from marvin.tools.quantities import Spectrum
+
+        cube = self._get_tool('cube')
+        model = cube.datamodel.datacubes[datacube]
+
+        spectra = self.get_spectra(datacube)
+
+        value = spectra.value
+        good = cube._get_good_pixels(value, spectra.ivar, spectra.mask,
+                                     cube._get_mask_bits(model, mask_labels))
+
+        nsum = good.sum(axis=0)
+        fsum = np.where(good, value, 0).sum(axis=0)
+
+        var = None
+        if spectra.ivar is not None:
+            var = (1. / np.where(good, spectra.ivar, 1) * good).sum(axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if method == 'mean':
+                fsum = fsum / nsum
+                var = var / nsum**2 if var is not None else None
+            ivar = np.where((nsum > 0) & (var > 0), 1. / var, 0) if var is not None else None
+
+        mask = None
+        if model.pixmask_flag is not None:
+            donotuse = Maskbit(model.pixmask_flag).labels_to_value('DONOTUSE')
+            mask = np.where(nsum > 0, 0, donotuse).astype(int)
+
+        return Spectrum(np.where(nsum > 0, fsum, 0), wavelength=spectra.wavelength,
+                        unit=spectra.unit, ivar=ivar, mask=mask,
+                        pixmask_flag=model.pixmask_flag)
+
+    def to_table(self, properties=None, include_ivar=False, include_mask=False):
+        """Returns an `~astropy.table.Table` with the properties of the spaxels.
+
+        Parameters:
+            properties (list):
+                The names of the Maps properties to include. Defaults to all
+                of them.
+            include_ivar,include_mask (bool):
+                If True, adds ``<property>_ivar`` and ``<property>_mask``
+                columns for the properties that have them.
+
+        Returns:
+            table (`~astropy.table.Table`):
+                A table with one row per spaxel, with its ``x`` and ``y``
+                and a column for each property.
+
+        """
+
+        maps = self._get_tool('maps')
+
+        if properties is None:
+            properties = [prop.full() for prop in maps.datamodel]
+
+        table = astropy.table.Table()
+        table['x'] = self.x
+        table['y'] = self.y
+
+        for name in properties:
+
+            quantity = self._get_property(name)
+            full_name = maps.datamodel[name].full()
+
+            table[full_name] = quantity.value
+            table[full_name].unit = quantity.unit
+
+            if include_ivar and quantity.ivar is not None:
+                table[full_name + '_ivar'] = quantity.ivar
+            if include_mask and quantity.mask is not None:
+                table[full_name + '_mask'] = quantity.mask
+
+        return table
+
+
+class _SpaxelCollectionMaps(object):
+    """Dictionary-like access to the properties of a `.SpaxelCollection`."""
+
+    def __init__(self, collection):
+
+        self._collection = collection
+
+    def __getitem__(self, name):
+
+        return self._collection._get_property(name)
+
+    def __iter__(self):
+
+        return iter(self.keys())
+
+    def __len__(self):
+
+        return len(self.keys())
+
+    def keys(self):
+
+        return [prop.full() for prop in self._collection._get_tool('maps').datamodel]
@@ -10,22 +10,27 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
+from collections import OrderedDict
 from packaging.version import parse
+import concurrent.futures
 import warnings
 
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
+import six
 
 from mpl_toolkits.axes_grid1 import ImageGrid
 
 from marvin.core.exceptions import MarvinDeprecationWarning, MarvinError
+from marvin.utils.general.maskbit import Maskbit
 from marvin.utils.plot import bind_to_figure
 
 
 __ALL__ = ('get_snr', 'kewley_sf_nii', 'kewley_sf_sii', 'kewley_sf_oi',
            'kewley_comp_nii', 'kewley_agn_sii', 'kewley_agn_oi',
-           'bpt_kewley06')
+           'bpt_kewley06', 'bpt_classes', 'classify_kewley06', 'bpt_classify',
+           'bpt_classify_many', 'get_class_fractions')
 
 
 def get_snr(snr_min, emission_line, default=3):
@@ -461,3 +466,286 @@ def _bind_to_figure(self, fig=None):
         new_figure.axes[0].set_ylabel('log([OIII]/H$\\beta$)')
 
     return new_figure
+
+
+# int8 codes of the global Kewley+06 classes returned by bpt_classify.
+bpt_classes = OrderedDict([('invalid', 0), ('sf', 1), ('comp', 2), ('seyfert', 3),
+                           ('liner', 4), ('ambiguous', 5)])
+
+
+def _get_line(maps, emline, snr=1):
+    """Returns a line flux with NaNs where `.get_masked` would mask it.
+
+    For Maps loaded from a file, the flux, ivar, and mask are read directly
+    from the ``EMLINE_GFLUX`` extensions instead of creating a `.Map`.
+
+    """
+
+    if maps.data_origin != 'file':
+        gflux = get_masked(maps, emline, snr=snr)
+        return np.where(gflux.mask, np.nan, gflux.data.astype(np.float64))
+
+    prop = maps.datamodel['emline_gflux_' + emline]
+    idx = prop.channel.idx
+
+    value = maps.data[prop.name].data[idx]
+    ivar = maps.data[prop.name + '_ivar'].data[idx]
+    bits = maps.data[prop.name + '_mask'].data[idx]
+
+    labels = prop.parent.get_default_plot_params()['default']['bitmasks']
+    mask = Maskbit(prop.pixmask_flag).get_mask(labels, mask=bits, dtype=bool)
+
+    mask |= value <= 0
+    mask |= np.abs(value * np.sqrt(ivar)) < snr
+    mask |= ivar == 0
+
+    return np.where(mask, np.nan, value.astype(np.float64))
+
+
+def _curve(boundary, xx):
+    """Evaluates ``boundary(xx)``, with NaNs where it is not defined."""
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curve = boundary(xx)
+
+    curve[~np.isfinite(curve)] = np.nan
+
+    return curve
+
+
+def classify_kewley06(log_oiii_hb, log_nii_ha, log_sii_ha, log_oi_ha=None, use_oi=True):
+    """Classifies line ratios using the Kewley+06 boundaries.
+
+    A vectorised version of the global classification of `.bpt_kewley06`
+    that works on plain arrays of logarithmic line ratios, in which invalid
+    values are NaN. Each boundary is evaluated once for the whole array.
+
+    Parameters:
+        log_oiii_hb,log_nii_ha,log_sii_ha,log_oi_ha (`~numpy.ndarray`):
+            Arrays with the same shape with the logarithm of the
+            OIII/Hbeta, NII/Halpha, SII/Halpha, and OI/Halpha ratios.
+            ``log_oi_ha`` is only required if ``use_oi=True``.
+        use_oi (bool):
+            If ``True``, uses the OI diagnostic diagram for classification.
+
+    Returns:
+        classes (`~numpy.ndarray`):
+            An ``int8`` array with the code in `.bpt_classes` of the global
+            classification of each element.
+
+    """
+
+    log_oiii_hb = np.asarray(log_oiii_hb, dtype=np.float64)
+    log_nii_ha = np.asarray(log_nii_ha, dtype=np.float64)
+    log_sii_ha = np.asarray(log_sii_ha, dtype=np.float64)
+
+    invalid = ~(np.isfinite(log_oiii_hb) & np.isfinite(log_nii_ha) & np.isfinite(log_sii_ha))
+
+    # Comparisons with NaN are False, which matches filling the masked
+    # comparisons of bpt_kewley06 with False. The only exception are the
+    # AGN conditions, which are an OR and need to be masked explicitly.
+    sf_nii = _curve(kewley_sf_nii, log_nii_ha)
+    comp_nii = _curve(kewley_comp_nii, log_nii_ha)
+    sf_sii = _curve(kewley_sf_sii, log_sii_ha)
+    agn_sii = _curve(kewley_agn_sii, log_sii_ha)
+
+    sf_mask_nii = (log_oiii_hb < sf_nii) & (log_nii_ha < 0.05)
+    sf_mask_sii = (log_oiii_hb < sf_sii) & (log_sii_ha < 0.32)
+
+    comp_mask = ((log_oiii_hb > sf_nii) & (log_nii_ha < 0.05) &
+                 (log_oiii_hb < comp_nii) & (log_nii_ha < 0.465))
+
+    agn_mask = (np.isfinite(log_oiii_hb) & np.isfinite(comp_nii) &
+                ((log_oiii_hb > comp_nii) | (log_nii_ha > 0.465)))
+    agn_mask &= (np.isfinite(log_oiii_hb) & np.isfinite(sf_sii) &
+                 ((log_oiii_hb > sf_sii) | (log_sii_ha > 0.32)))
+
+    seyfert_mask = agn_sii < log_oiii_hb
+    liner_mask = agn_sii > log_oiii_hb
+
+    if use_oi:
+
+        assert log_oi_ha is not None, 'log_oi_ha is required if use_oi=True.'
+        log_oi_ha = np.asarray(log_oi_ha, dtype=np.float64)
+
+        invalid |= ~np.isfinite(log_oi_ha)
+
+        sf_oi = _curve(kewley_sf_oi, log_oi_ha)
+        agn_oi = _curve(kewley_agn_oi, log_oi_ha)
+
+        sf_mask_sii &= (log_oiii_hb < sf_oi) & (log_oi_ha < -0.59)
+        agn_mask &= (np.isfinite(log_oiii_hb) & np.isfinite(sf_oi) &
+                     ((log_oiii_hb > sf_oi) | (log_oi_ha > -0.59)))
+
+        seyfert_mask &= agn_oi < log_oiii_hb
+        liner_mask &= agn_oi > log_oiii_hb
+
+    sf_mask = sf_mask_nii & sf_mask_sii
+    comp_mask &= sf_mask_sii
+    seyfert_mask &= agn_mask
+    liner_mask &= agn_mask
+
+    # Later assignments take precedence. The global classes are unique so the
+    # order only matters for spaxels that are also invalid.
+    classes = np.full(np.shape(log_oiii_hb), bpt_classes['ambiguous'], dtype=np.int8)
+    classes[liner_mask] = bpt_classes['liner']
+    classes[seyfert_mask] = bpt_classes['seyfert']
+    classes[comp_mask] = bpt_classes['comp']
+    classes[sf_mask] = bpt_classes['sf']
+    classes[invalid] = bpt_classes['invalid']
+
+    return classes
+
+
+def bpt_classify(maps, snr_min=3, use_oi=True):
+    """Returns the Kewley+06 classification of each spaxel as an ``int8`` map.
+
+    Produces the same global classification as `.bpt_kewley06` without
+    creating a figure or the individual classification masks. For Maps
+    loaded from a file the emission line maps are read directly from the
+    extensions.
+
+    Parameters:
+        maps (`~marvin.tools.maps.Maps`):
+            The Maps with the emission line maps to classify.
+        snr_min (float or dict):
+            The signal-to-noise cutoff for the emission lines. See
+            `.bpt_kewley06`.
+        use_oi (bool):
+            If ``True``, uses the OI diagnostic diagram for classification.
+
+    Returns:
+        classes (`~numpy.ndarray`):
+            A 2D ``int8`` array with the code in `.bpt_classes` of each
+            spaxel.
+
+    Example:
+        >>> classes = bpt_classify(Maps(plateifu='8485-1901'))
+        >>> sf = classes == bpt_classes['sf']
+
+    """
+
+    oiii = _get_line(maps, 'oiii_5008', snr=get_snr(snr_min, 'oiii'))
+    nii = _get_line(maps, 'nii_6585', snr=get_snr(snr_min, 'nii'))
+    ha = _get_line(maps, 'ha_6564', snr=get_snr(snr_min, 'ha'))
+    hb = _get_line(maps, 'hb_4862', snr=get_snr(snr_min, 'hb'))
+
+    sii = (_get_line(maps, 'sii_6718', snr=get_snr(snr_min, 'sii')) +
+           _get_line(maps, 'sii_6732', snr=get_snr(snr_min, 'sii')))
+
+    log_oi_ha = None
+    if use_oi:
+        oi = _get_line(maps, 'oi_6302', snr=get_snr(snr_min, 'oi'))
+        log_oi_ha = np.log10(oi / ha)
+
+    return classify_kewley06(np.log10(oiii / hb), np.log10(nii / ha), np.log10(sii / ha),
+                             log_oi_ha=log_oi_ha, use_oi=use_oi)
+
+
+def get_class_fractions(classes):
+    """Returns the fraction of the valid spaxels in each class.
+
+    Parameters:
+        classes (`~numpy.ndarray`):
+            An array of class codes, as returned by `.bpt_classify`.
+
+    Returns:
+        fractions (dict):
+            A dictionary with the fraction of the valid (i.e., not
+            ``'invalid'``) spaxels in each class, and the number of valid
+            spaxels as ``'n_valid'``. Fractions are NaN if there are no valid
+            spaxels.
+
+    """
+
+    counts = np.bincount(np.ravel(classes).astype(np.intp), minlength=len(bpt_classes))
+    n_valid = int(counts.sum() - counts[bpt_classes['invalid']])
+
+    fractions = OrderedDict()
+    for name, code in bpt_classes.items():
+        if name == 'invalid':
+            continue
+        fractions[name] = counts[code] / n_valid if n_valid > 0 else np.nan
+
+    fractions['n_valid'] = n_valid
+
+    return fractions
+
+
+def _classify_one(item, snr_min, use_oi, fractions, maps_kwargs):
+    """Classifies a Maps, or a plate-ifu or path to open. Runs in the workers."""
+
+    from marvin.tools.maps import Maps
+
+    close = isinstance(item, six.string_types)
+    maps = Maps(item, **maps_kwargs) if close else item
+
+    try:
+        classes = bpt_classify(maps, snr_min=snr_min, use_oi=use_oi)
+        plateifu = maps.plateifu
+    finally:
+        if close and maps.data_origin == 'file':
+            maps.data.close()
+
+    return plateifu, get_class_fractions(classes) if fractions else classes
+
+
+def bpt_classify_many(galaxies, snr_min=3, use_oi=True, fractions=False, processes=None,
+                      **kwargs):
+    """Classifies the spaxels of many galaxies, optionally in a process pool.
+
+    Each galaxy is classified with `.bpt_classify`, which does not create
+    any figure. If ``processes`` is not 1, galaxies are distributed across
+    a `~concurrent.futures.ProcessPoolExecutor`. Maps loaded from a file are
+    sent to the workers as their path; other Maps are sent as their
+    plate-ifu and reopened in the worker with ``kwargs``.
+
+    Parameters:
+        galaxies (list):
+            A list of `~marvin.tools.maps.Maps`, plate-ifus, or paths to
+            MAPS files.
+        snr_min,use_oi:
+            See `.bpt_classify`.
+        fractions (bool):
+            If ``True``, returns the fraction of the valid spaxels in each
+            class (see `.get_class_fractions`) instead of the classification
+            maps.
+        processes (int):
+            The number of worker processes. If ``None``, uses the number of
+            CPUs. If 1, galaxies are classified sequentially in this process.
+        kwargs (dict):
+            Other parameters to pass to `~marvin.tools.maps.Maps` when opening
+            a galaxy (e.g., ``bintype`` or ``release``).
+
+    Returns:
+        classifications (`~collections.OrderedDict`):
+            A dictionary, in the order of ``galaxies``, of plate-ifu to the
+            ``int8`` classification map or the class fractions.
+
+    Example:
+        >>> fractions = bpt_classify_many(['8485-1901', '7443-12701'], fractions=True)
+        >>> fractions['8485-1901']['sf']
+        0.67
+
+    """
+
+    from marvin.tools.maps import Maps
+
+    galaxies = list(galaxies)
+
+    if processes == 1 or len(galaxies) <= 1:
+        results = [_classify_one(item, snr_min, use_oi, fractions, kwargs) for item in galaxies]
+        return OrderedDict(results)
+
+    items = []
+    for item in galaxies:
+        if isinstance(item, Maps):
+            item = item.filename if item.data_origin == 'file' else item.plateifu
+        items.append(item)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_classify_one, item, snr_min, use_oi, fractions, kwargs)
+                   for item in items]
+        results = [future.result() for future in futures]
+
+    return OrderedDict(results)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# export.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from collections import OrderedDict
+
+import numpy as np
+
+from marvin.core.exceptions import MarvinError
+
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+__ALL__ = ('maps_to_arrow', 'write_maps_parquet')
+
+
+# Default number of spaxels per record batch.
+_chunk_size = 65536
+
+
+def _check_pyarrow():
+
+    if pyarrow is None:
+        raise ImportError('this feature requires pyarrow. Install it by '
+                          'doing pip install pyarrow.')
+
+
+def _read_section(hdu, sl):
+    """Returns ``sl`` of ``hdu``, only reading that section if not loaded yet."""
+
+    if 'data' in hdu.__dict__ or hdu.fileinfo() is None:
+        return hdu.data[sl]
+
+    return hdu.section[sl]
+
+
+def _get_properties(maps, columns=None):
+    """Returns the properties of ``maps`` to export, in datamodel order."""
+
+    if maps.data_origin != 'file':
+        raise MarvinError('columnar export is only available for Maps loaded from a file.')
+
+    properties = [prop for prop in maps.datamodel
+                  if columns is None or prop.full() in columns]
+
+    if columns is not None and len(properties) != len(columns):
+        missing = set(columns) - set(prop.full() for prop in properties)
+        raise MarvinError('unknown properties {0!r}'.format(sorted(missing)))
+
+    return properties
+
+
+def _iter_columns(hdulist, properties, shape, plateifu=None, mask=None,
+                  include_ivar=False, include_mask=False, chunk_size=None):
+    """Reads the MAPS extensions in blocks of rows and yields them as columns.
+
+    Yields an ordered dictionary of 1D arrays for each block of rows of the
+    maps, with the ``plateifu`` (if defined), ``spaxelid``, ``x``, and ``y``
+    of each spaxel followed by a column for each property (and its ivar and
+    mask, if requested). Property columns keep the native dtype of the
+    extension. Only the spaxels in which ``mask`` is True are returned.
+
+    """
+
+    ny, nx = shape
+
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        assert mask.shape == (ny, nx), 'mask must have the same shape as the maps.'
+
+    rows_per_chunk = max(1, (chunk_size or _chunk_size) // nx)
+
+    keys = ['value']
+    if include_ivar:
+        keys.append('ivar')
+    if include_mask:
+        keys.append('mask')
+
+    for y0 in range(0, ny, rows_per_chunk):
+
+        y1 = min(y0 + rows_per_chunk, ny)
+
+        select = mask[y0:y1].ravel() if mask is not None else slice(None)
+
+        yy, xx = np.mgrid[y0:y1, 0:nx]
+        yy = yy.ravel()[select]
+        xx = xx.ravel()[select]
+
+        columns = OrderedDict()
+
+        if plateifu is not None:
+            columns['plateifu'] = np.full(len(yy), plateifu, dtype=object)
+
+        columns['spaxelid'] = (yy * nx + xx).astype(np.int64)
+        columns['x'] = xx.astype(np.int32)
+        columns['y'] = yy.astype(np.int32)
+
+        for prop in properties:
+            for key in keys:
+
+                if ((key == 'ivar' and not prop.has_ivar()) or
+                        (key == 'mask' and not prop.has_mask())):
+                    continue
+
+                extname = prop.name if key == 'value' else prop.name + '_' + key
+                name = prop.full() if key == 'value' else prop.full() + '_' + key
+
+                channel = (prop.channel.idx,) if prop.channel else ()
+                data = _read_section(hdulist[extname], channel + (slice(y0, y1), slice(None)))
+
+                data = np.asarray(data)
+                columns[name] = data.astype(data.dtype.newbyteorder('=')).ravel()[select]
+
+        yield columns
+
+
+def _iter_record_batches(maps, columns=None, mask=None, include_ivar=False,
+                         include_mask=False, chunk_size=None):
+    """Yields the contents of ``maps`` as `pyarrow.RecordBatch` objects."""
+
+    properties = _get_properties(maps, columns=columns)
+
+    for chunk in _iter_columns(maps.data, properties, maps._shape, plateifu=maps.plateifu,
+                               mask=mask, include_ivar=include_ivar,
+                               include_mask=include_mask, chunk_size=chunk_size):
+
+        arrays = [pyarrow.array(chunk['plateifu'], type=pyarrow.string())]
+        arrays += [pyarrow.array(values) for name, values in chunk.items()
+                   if name != 'plateifu']
+
+        yield pyarrow.RecordBatch.from_arrays(arrays, names=list(chunk.keys()))
+
+
+def maps_to_arrow(maps, columns=None, mask=None, include_ivar=False,
+                  include_mask=False, chunk_size=None):
+    """Returns a `pyarrow.Table` with the properties of each spaxel of a Maps.
+
+    The MAPS extensions are read directly, in blocks of rows, without
+    creating `~marvin.tools.quantities.Map` objects. Each row of the table
+    is a spaxel, with its ``plateifu``, ``spaxelid`` (``y * nx + x``),
+    ``x``, and ``y``, and a column for each property, which keeps the dtype
+    of the FITS extension.
+
+    Parameters:
+        maps (`~marvin.tools.maps.Maps`):
+            The Maps to export. Must be loaded from a file.
+        columns (list):
+            The full names of the properties to include (e.g.,
+            ``'emline_gflux_ha_6564'``). Defaults to all of them.
+        mask (`~numpy.ndarray`):
+            A 2D boolean array. Only the spaxels where ``mask`` is True are
+            exported.
+        include_ivar,include_mask (bool):
+            If True, adds ``<property>_ivar`` and ``<property>_mask``
+            columns for the properties that have them.
+        chunk_size (int):
+            The approximate number of spaxels read at once.
+
+    Returns:
+        table (`pyarrow.Table`):
+            The table with one row per spaxel.
+
+    """
+
+    _check_pyarrow()
+
+    batches = list(_iter_record_batches(maps, columns=columns, mask=mask,
+                                        include_ivar=include_ivar,
+                                        include_mask=include_mask,
+                                        chunk_size=chunk_size))
+
+    return pyarrow.Table.from_batches(batches)
+
+
+def write_maps_parquet(maps, path, columns=None, mask=None, include_ivar=False,
+                       include_mask=False, chunk_size=None, **kwargs):
+    """Writes the properties of one or many Maps to a Parquet file.
+
+    Galaxies are written one after the other, in blocks of rows, so that
+    the memory needed does not depend on the number of galaxies. All the
+    Maps must share the same datamodel. See `.maps_to_arrow` for the
+    format of the table.
+
+    Parameters:
+        maps (`~marvin.tools.maps.Maps` or iterable):
+            The Maps, or an iterable of Maps, to export. Items that are not
+            Maps (e.g., a plate-ifu or a path) are opened with
+            `~marvin.tools.maps.Maps` and closed after being written.
+        path (str):
+            The path of the Parquet file to write.
+        columns,mask,include_ivar,include_mask,chunk_size:
+            See `.maps_to_arrow`. ``mask`` can also be a function that
+            receives a Maps and returns its 2D mask.
+        kwargs (dict):
+            Other parameters to pass to `pyarrow.parquet.ParquetWriter`
+            (e.g., ``compression``).
+
+    Returns:
+        n_rows (int):
+            The number of spaxels written.
+
+    """
+
+    from marvin.tools.maps import Maps
+
+    _check_pyarrow()
+
+    if isinstance(maps, Maps):
+        maps = [maps]
+
+    writer = None
+    n_rows = 0
+
+    try:
+        for item in maps:
+
+            close = not isinstance(item, Maps)
+            item = item if not close else Maps(item)
+
+            try:
+                item_mask = mask(item) if callable(mask) else mask
+                for batch in _iter_record_batches(item, columns=columns, mask=item_mask,
+                                                  include_ivar=include_ivar,
+                                                  include_mask=include_mask,
+                                                  chunk_size=chunk_size):
+
+                    if writer is None:
+                        writer = pyarrow.parquet.ParquetWriter(path, batch.schema, **kwargs)
+                    elif not batch.schema.equals(writer.schema):
+                        raise MarvinError('the columns of {0} do not match those of the '
+                                          'previous Maps.'.format(item.plateifu))
+
+                    writer.write_table(pyarrow.Table.from_batches([batch]))
+                    n_rows += batch.num_rows
+            finally:
+                if close and item.data_origin == 'file':
+                    item.data.close()
+
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return n_rows
@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# expression.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import ast
+import functools
+import operator
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+from astropy import units
+
+from marvin.core.exceptions import MarvinError, MarvinUserWarning
+from marvin.utils.dap.export import _read_section
+from marvin.utils.datamodel.dap import datamodel
+from marvin.utils.general.maskbit import Maskbit
+
+
+__ALL__ = ('Expression', 'get_expression')
+
+
+# Default number of spaxels evaluated at once.
+_chunk_size = 65536
+
+# Short names for the emission lines used in the BPT diagrams.
+_line_aliases = OrderedDict([('ha', 'ha_6564'),
+                             ('hb', 'hb_4862'),
+                             ('nii', 'nii_6585'),
+                             ('oiii', 'oiii_5008'),
+                             ('oi', 'oi_6302'),
+                             ('sii', 'sii_6718 + sii_6732')])
+
+
+def _relative(sigma, value):
+    """Returns ``sigma / |value|``, zero where ``sigma`` is zero."""
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(sigma == 0, 0., sigma / np.abs(value))
+
+
+class _Leaf(object):
+    """A property of the Maps."""
+
+    def __init__(self, prop):
+        self.prop = prop
+        self.unit = prop.unit
+
+    def evaluate(self, data):
+        return data[self.prop.full()]
+
+
+class _Constant(object):
+    """A number."""
+
+    unit = units.dimensionless_unscaled
+
+    def __init__(self, value):
+        self.value = float(value)
+
+    def evaluate(self, data):
+        return self.value, 0.
+
+
+class _Negative(object):
+
+    def __init__(self, operand):
+        self.operand = operand
+        self.unit = operand.unit
+
+    def evaluate(self, data):
+        value, sigma = self.operand.evaluate(data)
+        return -value, sigma
+
+
+class _BinOp(object):
+    """Addition, subtraction, multiplication, or division of two terms."""
+
+    ops = {ast.Add: operator.add, ast.Sub: operator.sub,
+           ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+    def __init__(self, op, left, right):
+
+        self.op = self.ops[type(op)]
+        self.left = left
+        self.right = right
+
+        # Factor to convert the right term to the units of the left one.
+        self.factor = 1.
+
+        if isinstance(op, (ast.Mult, ast.Div)):
+            self.unit = self.op(left.unit, right.unit)
+        elif isinstance(right, _Constant):
+            self.unit = left.unit
+        elif isinstance(left, _Constant):
+            self.unit = right.unit
+        else:
+            try:
+                self.factor = right.unit.to(left.unit)
+            except units.UnitConversionError:
+                raise MarvinError('cannot add or subtract quantities with units {0} and {1}.'
+                                  .format(left.unit, right.unit))
+            self.unit = left.unit
+
+    def evaluate(self, data):
+
+        value1, sigma1 = self.left.evaluate(data)
+        value2, sigma2 = self.right.evaluate(data)
+
+        if self.factor != 1.:
+            value2 = value2 * self.factor
+            sigma2 = sigma2 * self.factor
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = self.op(value1, value2)
+
+            if self.op in [operator.add, operator.sub]:
+                sigma = np.sqrt(sigma1**2 + sigma2**2)
+            else:
+                # Same propagation as Map._mul_ivar.
+                sigma = np.abs(value) * (_relative(sigma1, value1) + _relative(sigma2, value2))
+
+        return value, sigma
+
+
+class _Power(object):
+    """A term raised to a constant power."""
+
+    def __init__(self, base, power):
+        self.base = base
+        self.power = power
+        self.unit = base.unit ** power
+
+    def evaluate(self, data):
+
+        value, sigma = self.base.evaluate(data)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return value**self.power, np.abs(self.power * value**(self.power - 1)) * sigma
+
+
+class _Function(object):
+    """A function of a term, with its derivative for the error propagation."""
+
+    functions = {'log10': (np.log10, lambda value: 1. / (np.abs(value) * np.log(10))),
+                 'log': (np.log, lambda value: 1. / np.abs(value)),
+                 'exp': (np.exp, np.exp),
+                 'sqrt': (np.sqrt, lambda value: 0.5 / np.sqrt(value)),
+                 'abs': (np.abs, lambda value: 1.)}
+
+    def __init__(self, name, operand):
+
+        self.name = name
+        self.function, self.derivative = self.functions[name]
+        self.operand = operand
+        self.scale = 1.
+
+        if name == 'sqrt':
+            self.unit = operand.unit ** 0.5
+        elif name == 'abs':
+            self.unit = operand.unit
+        else:
+            self.unit = units.dimensionless_unscaled
+            if operand.unit.physical_type == 'dimensionless':
+                self.scale = operand.unit.to(units.dimensionless_unscaled)
+            else:
+                warnings.warn('{0} applied to a quantity with units {1}. The values are '
+                              'used in those units.'.format(name, operand.unit),
+                              MarvinUserWarning)
+
+    def evaluate(self, data):
+
+        value, sigma = self.operand.evaluate(data)
+
+        if self.scale != 1.:
+            value = value * self.scale
+            sigma = sigma * self.scale
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            return self.function(value), np.abs(self.derivative(value)) * sigma
+
+
+class Expression(object):
+    """An arithmetic expression of DAP properties.
+
+    The expression is parsed once and resolved against the datamodel. It
+    can then be evaluated for any `~marvin.tools.maps.Maps` with the same
+    datamodel, computing the value, the propagated inverse variance, and
+    the combined mask in a single pass over blocks of spaxels. Errors are
+    propagated to first order, using the same rules as
+    `~marvin.tools.quantities.Map` arithmetic for sums and products.
+
+    Names in the expression can be the full name of a property (e.g.,
+    ``emline_gflux_ha_6564``), the name of a channel of
+    ``default_property`` (e.g., ``ha_6564``), or one of the short names
+    ``ha``, ``hb``, ``nii``, ``oiii``, ``oi``, and ``sii`` (the sum of both
+    [SII] lines), with the same definitions as the BPT diagrams. The
+    operators ``+``, ``-``, ``*``, ``/``, and ``**`` (with a constant
+    exponent), and the functions ``log10``, ``log``, ``exp``, ``sqrt``, and
+    ``abs`` are supported.
+
+    Parameters:
+        expression (str):
+            The expression to parse (e.g., ``'log10(nii / ha)'``).
+        properties (`~marvin.utils.datamodel.dap.base.PropertyList`):
+            The properties of the datamodel.
+        default_property (str):
+            The property whose channels can be used by name.
+
+    """
+
+    def __init__(self, expression, properties, default_property='emline_gflux'):
+
+        self.expression = expression
+        self.default_property = default_property
+
+        self._full_names = OrderedDict((prop.full(), prop) for prop in properties)
+        self._channels = OrderedDict((prop.channel.name, prop) for prop in properties
+                                     if prop.name == default_property and prop.channel)
+        self._properties = properties
+
+        self.properties = []
+
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as ee:
+            raise MarvinError('invalid expression {0!r}: {1}'.format(expression, ee))
+
+        self._root = self._compile(tree.body)
+        self.unit = self._root.unit
+
+        if len(self.properties) == 0:
+            raise MarvinError('the expression {0!r} does not include any '
+                              'property.'.format(expression))
+
+    def __repr__(self):
+
+        return '<Expression {0!r} (unit={1!r})>'.format(self.expression, self.unit.to_string())
+
+    def _resolve(self, name):
+        """Returns the node for a name in the expression."""
+
+        if name in self._full_names:
+            prop = self._full_names[name]
+        elif name in self._channels:
+            prop = self._channels[name]
+        elif name in _line_aliases:
+            return self._compile(ast.parse(_line_aliases[name], mode='eval').body)
+        else:
+            matches = [channel for channel in self._channels
+                       if channel.startswith(name + '_')]
+            if len(matches) == 1:
+                prop = self._channels[matches[0]]
+            elif len(matches) > 1:
+                raise MarvinError('{0!r} is ambiguous. Did you mean one of {1}?'
+                                  .format(name, matches))
+            else:
+                try:
+                    prop = self._properties[name]
+                except ValueError as ee:
+                    raise MarvinError('cannot resolve {0!r}: {1}'.format(name, ee))
+
+        if prop not in self.properties:
+            self.properties.append(prop)
+
+        return _Leaf(prop)
+
+    def _compile(self, node):
+        """Converts an `ast` node into a tree of operations."""
+
+        if isinstance(node, ast.Name):
+            return self._resolve(node.id)
+
+        elif (isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and
+                not isinstance(node.value, bool)):
+            return _Constant(node.value)
+
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            elif isinstance(operand, _Constant):
+                return _Constant(-operand.value)
+            return _Negative(operand)
+
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            power = self._compile(node.right)
+            if not isinstance(power, _Constant):
+                raise MarvinError('exponents must be numbers.')
+            return _Power(self._compile(node.left), power.value)
+
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BinOp.ops:
+            left = self._compile(node.left)
+            right = self._compile(node.right)
+            if isinstance(left, _Constant) and isinstance(right, _Constant):
+                return _Constant(_BinOp.ops[type(node.op)](left.value, right.value))
+            return _BinOp(node.op, left, right)
+
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and
+                node.func.id in _Function.functions):
+            if len(node.args) != 1 or len(node.keywords) > 0:
+                raise MarvinError('{0} takes exactly one argument.'.format(node.func.id))
+            return _Function(node.func.id, self._compile(node.args[0]))
+
+        raise MarvinError('unsupported element {0!r} in expression {1!r}.'
+                          .format(ast.dump(node), self.expression))
+
+    def _get_readers(self, maps):
+        """Returns a function for each property that reads a block of rows."""
+
+        readers = OrderedDict()
+
+        for prop in self.properties:
+
+            if maps.data_origin == 'file':
+
+                channel = (prop.channel.idx,) if prop.channel else ()
+
+                def reader(rows, prop=prop, channel=channel):
+                    sl = channel + (rows, slice(None))
+                    value = _read_section(maps.data[prop.name], sl)
+                    ivar = (_read_section(maps.data[prop.name + '_ivar'], sl)
+                            if prop.has_ivar() else None)
+                    mask = (_read_section(maps.data[prop.name + '_mask'], sl)
+                            if prop.has_mask() else None)
+                    return value, ivar, mask
+
+            else:
+
+                prop_map = maps.getMap(prop)
+
+                def reader(rows, prop_map=prop_map):
+                    ivar = prop_map.ivar[rows] if prop_map.ivar is not None else None
+                    mask = prop_map.mask[rows] if prop_map.mask is not None else None
+                    return prop_map.value[rows], ivar, mask
+
+            readers[prop.full()] = reader
+
+        return readers
+
+    def evaluate(self, maps, chunk_size=None):
+        """Evaluates the expression for a Maps.
+
+        Parameters:
+            maps (`~marvin.tools.maps.Maps`):
+                The Maps with the properties. Maps loaded from a file are
+                read in blocks of rows; for other origins the maps of the
+                properties in the expression are retrieved once.
+            chunk_size (int):
+                The approximate number of spaxels evaluated at once.
+
+        Returns:
+            map (`~marvin.tools.quantities.EnhancedMap`):
+                The map with the value, inverse variance, and mask of the
+                expression. Spaxels where the value is not finite are
+                flagged as ``DONOTUSE``.
+
+        """
+
+        from marvin.tools.quantities.map import EnhancedMap
+
+        ny, nx = tuple(maps._shape)
+        rows_per_chunk = max(1, (chunk_size or _chunk_size) // nx)
+
+        readers = self._get_readers(maps)
+
+        pixmask_flag = self.properties[0].pixmask_flag
+        donotuse = Maskbit(pixmask_flag).labels_to_value('DONOTUSE') if pixmask_flag else 0
+
+        value = np.empty((ny, nx), dtype=np.float64)
+        ivar = np.empty((ny, nx), dtype=np.float64)
+        mask = np.zeros((ny, nx), dtype=int)
+
+        for y0 in range(0, ny, rows_per_chunk):
+
+            rows = slice(y0, min(y0 + rows_per_chunk, ny))
+
+            data = {}
+            for name, reader in readers.items():
+
+                prop_value, prop_ivar, prop_mask = reader(rows)
+
+                if prop_ivar is None:
+                    prop_sigma = np.full(prop_value.shape, np.inf)
+                else:
+                    with np.errstate(divide='ignore'):
+                        prop_sigma = 1. / np.sqrt(np.asarray(prop_ivar, dtype=np.float64))
+
+                data[name] = (np.asarray(prop_value, dtype=np.float64), prop_sigma)
+
+                if prop_mask is not None:
+                    mask[rows] |= prop_mask
+
+            chunk_value, chunk_sigma = self._root.evaluate(data)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                chunk_ivar = 1. / chunk_sigma**2
+
+            chunk_ivar[~np.isfinite(chunk_ivar)] = 0
+
+            value[rows] = chunk_value
+            ivar[rows] = chunk_ivar
+
+            mask[rows][~np.isfinite(chunk_value)] |= donotuse
+
+        return EnhancedMap(value=value, unit=self.unit, ivar=ivar, mask=mask,
+                           pixmask_flag=pixmask_flag, copy=False)
+
+
+@functools.lru_cache(maxsize=256)
+def get_expression(expression, release, default_property='emline_gflux'):
+    """Returns the parsed `.Expression` for a release, caching the result."""
+
+    return Expression(expression, datamodel[release].properties,
+                      default_property=default_property)
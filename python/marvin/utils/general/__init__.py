@@ -2,4 +2,7 @@ from brain.utils.general.decorators import *
 from marvin.utils.general.general import *
 from marvin.utils.general.images import *
 from marvin.utils.general.bundle import *
+from marvin.utils.general.fitscache import *
+from marvin.utils.general.spaxelcache import *
+from marvin.utils.general.skyindex import *
 from .structs import *
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: fitscache.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import warnings
+
+from astropy.io import fits
+
+import marvin
+from marvin.core.exceptions import MarvinUserWarning
+
+
+__all__ = ('FITSFileCache', 'get_fits_cache')
+
+
+# Default location of the cache, next to the Marvin log directory.
+default_cache_dir = os.path.join(os.path.expanduser('~'), '.marvin', 'cache', 'fits')
+
+# Default maximum size of the cache, in GB.
+default_cache_size = 20.
+
+# Size of the blocks used when decompressing files.
+_chunk_size = 16 * 1024 * 1024
+
+
+class FITSFileCache(object):
+    """An on-disk LRU store of decompressed FITS files.
+
+    Compressed (``.fits.gz``) files are decompressed once into ``path`` and
+    reopened from there with ``memmap=True``, so that successive opens of the
+    same file do not need to decompress it again and only the sections of the
+    data that are accessed are read from disk. Entries are keyed on the real
+    path, modification time, and size of the original file, so a modified
+    file is decompressed again. When the total size of the store exceeds
+    ``max_size``, the least recently used entries are removed.
+
+    The cache is opt-in. Set ``use_file_cache: True`` in your custom
+    ``~/.marvin/marvin.yml`` to enable it for `~marvin.tools.cube.Cube`,
+    `~marvin.tools.modelcube.ModelCube`, and `~marvin.tools.rss.RSS`. The
+    location and size of the store can be set with ``file_cache_dir`` and
+    ``file_cache_size`` (in GB).
+
+    Parameters:
+        path (str):
+            The directory where the decompressed files are stored. Defaults
+            to ``~/.marvin/cache/fits``.
+        max_size (float):
+            The maximum size of the store, in GB. Defaults to 20 GB.
+
+    """
+
+    def __init__(self, path=None, max_size=None):
+
+        self.path = os.path.realpath(os.path.expanduser(path or default_cache_dir))
+        self.max_size = int((max_size if max_size is not None else default_cache_size) * 1e9)
+
+    def __repr__(self):
+
+        return '<FITSFileCache (path={0!r}, n_entries={1}, size={2:.2f} GB)>'.format(
+            self.path, len(self.entries()), self.size / 1e9)
+
+    @staticmethod
+    def is_compressed(filename):
+        """Returns True if ``filename`` is a gzipped file."""
+
+        with open(filename, 'rb') as ff:
+            return ff.read(2) == b'\x1f\x8b'
+
+    def _get_key(self, filename):
+        """Returns the name of the cache entry for ``filename``."""
+
+        realpath = os.path.realpath(filename)
+        stat = os.stat(realpath)
+
+        signature = '{0}:{1}:{2}'.format(realpath, stat.st_mtime_ns, stat.st_size)
+        digest = hashlib.sha1(signature.encode('utf-8')).hexdigest()[:16]
+
+        basename = os.path.basename(realpath)
+        if basename.endswith('.gz'):
+            basename = basename[:-3]
+
+        return '{0}-{1}'.format(digest, basename)
+
+    def get(self, filename):
+        """Returns the path to the decompressed copy of ``filename``.
+
+        If the file is not in the store, it is decompressed into it and the
+        store is pruned to ``max_size``. Otherwise the entry is flagged as
+        recently used.
+
+        """
+
+        cached = os.path.join(self.path, self._get_key(filename))
+
+        if os.path.exists(cached):
+            try:
+                os.utime(cached, None)
+            except OSError:
+                pass
+            return cached
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+
+        # Decompresses into a temporary file and moves it in place when done,
+        # so that concurrent processes never see a partial file.
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out, gzip.open(filename, 'rb') as gz:
+                shutil.copyfileobj(gz, out, _chunk_size)
+            os.replace(temp_path, cached)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.prune(keep=cached)
+
+        return cached
+
+    def open(self, filename, memmap=True):
+        """Opens ``filename`` as an `~astropy.io.fits.HDUList`.
+
+        Compressed files are opened from their decompressed copy in the
+        store. Uncompressed files are opened directly.
+
+        """
+
+        if not self.is_compressed(filename):
+            return fits.open(filename, memmap=memmap)
+
+        return fits.open(self.get(filename), memmap=memmap)
+
+    def entries(self):
+        """Returns a list of ``(path, size, last_used)`` for each entry."""
+
+        if not os.path.exists(self.path):
+            return []
+
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+
+        return entries
+
+    @property
+    def size(self):
+        """The total size of the store, in bytes."""
+
+        return sum(entry[1] for entry in self.entries())
+
+    def prune(self, keep=None):
+        """Removes the least recently used entries until under ``max_size``.
+
+        Parameters:
+            keep (str):
+                The path of an entry that must not be removed.
+
+        """
+
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(entry[1] for entry in entries)
+
+        for path, size, __ in entries:
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError as ee:
+                warnings.warn('failed to remove cached file {0}: {1}'.format(path, ee),
+                              MarvinUserWarning)
+                continue
+            total -= size
+
+    def clear(self):
+        """Removes all the entries in the store."""
+
+        for path, __, __ in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def get_fits_cache():
+    """Returns the `.FITSFileCache` defined in the config, or None if disabled."""
+
+    custom_config = marvin.config._custom_config
+
+    if not custom_config.get('use_file_cache', False):
+        return None
+
+    return FITSFileCache(path=custom_config.get('file_cache_dir', None),
+                         max_size=custom_config.get('file_cache_size', None))
@@ -12,6 +12,7 @@
 
 from __future__ import absolute_import, division, print_function
 
+import base64
 import collections
 import contextlib
 import inspect
@@ -68,7 +69,8 @@ __all__ = ('convertCoords', 'parseIdentifier', 'mangaid2plateifu', 'findClosestV
            'get_dapall_path', 'temp_setattr', 'map_dapall', 'turn_off_ion', 'memory_usage',
            'validate_jwt', 'target_status', 'target_is_observed', 'target_is_mastar',
            'get_plates', 'get_manga_image', 'check_versions', 'get_drpall_table',
-           'get_dapall_table', 'get_drpall_file', 'get_dapall_file')
+           'get_dapall_table', 'get_drpall_file', 'get_dapall_file', 'getSpaxelIndices',
+           'encode_array', 'decode_array')
 
 drpTable = {}
 dapTable = {}
@@ -134,10 +136,10 @@ def getSpaxel(cube=True, maps=True, modelcube=True,
             Arguments to be passed to `~marvin.tools.spaxel.SpaxelBase`.
 
     Returns:
-        spaxels (list):
-            The |spaxel| objects for this cube/maps corresponding to the input
-            coordinates. The length of the list is equal to the number
-            of input coordinates.
+        spaxels (|spaxel| or `~marvin.tools.spaxel.SpaxelCollection`):
+            The |spaxel| for the input coordinates or, if the coordinates
+            are arrays, a `~marvin.tools.spaxel.SpaxelCollection` with the
+            spaxels in the same order as the input coordinates.
 
     .. |spaxel| replace:: :class:`~marvin.tools.spaxel.Spaxel`
 
@@ -203,16 +205,69 @@ def getSpaxel(cube=True, maps=True, modelcube=True,
     iCube, jCube = zip(convertCoords(coords, wcs=ww, shape=cube_shape,
                                      mode=inputMode, xyorig=xyorig).T)
 
-    _spaxels = []
-    for ii in range(len(iCube[0])):
-        _spaxels.append(
-            marvin.tools.spaxel.Spaxel(jCube[0][ii], iCube[0][ii],
-                                       cube=cube, maps=maps, modelcube=modelcube, **kwargs))
+    if isScalar:
+        return marvin.tools.spaxel.Spaxel(jCube[0][0], iCube[0][0],
+                                          cube=cube, maps=maps, modelcube=modelcube, **kwargs)
 
-    if len(_spaxels) == 1 and isScalar:
-        return _spaxels[0]
+    # Arrays of coordinates return a collection backed by the arrays of the
+    # parent tools, instead of a list of fully initialised spaxels.
+    return marvin.tools.spaxel.SpaxelCollection(jCube[0], iCube[0], cube=cube, maps=maps,
+                                                modelcube=modelcube, **kwargs)
+
+
+def getSpaxelIndices(x=None, y=None, ra=None, dec=None, xyorig=None, wcs=None, shape=None):
+    """Returns the array indices of a set of spaxel coordinates.
+
+    Accepts the same coordinate inputs as :func:`getSpaxel` and returns the
+    corresponding ``(row, column)`` array indices, without instantiating any
+    spaxel.
+
+    Parameters:
+        x,y (int or array):
+            The spaxel coordinates relative to ``xyorig``.
+        ra,dec (float or array):
+            The celestial coordinates of the spaxels. Requires ``wcs``.
+        xyorig ({'center', 'lower'}):
+            The reference point from which ``x`` and ``y`` are measured.
+            Defaults to ``marvin.config.xyorig``.
+        wcs (``astropy.wcs.WCS`` object):
+            The WCS solution used to convert ``ra, dec`` to indices.
+        shape (tuple):
+            The shape of the spatial dimensions of the cube.
+
+    Returns:
+        indices (tuple):
+            A tuple ``(ii, jj)`` of integer arrays with the row (``y``) and
+            column (``x``) index of each input coordinate.
+
+    """
+
+    if x is not None or y is not None:
+        assert ra is None and dec is None, 'Either use (x, y) or (ra, dec)'
+        assert x is not None and y is not None, 'Specify both x and y'
+        x = np.atleast_1d(x)
+        y = np.atleast_1d(y)
+        assert len(x) == len(y), 'x and y must have the same size'
+        inputMode = 'pix'
+        coords = np.array([x, y], float).T
+    elif ra is not None or dec is not None:
+        assert x is None and y is None, 'Either use (x, y) or (ra, dec)'
+        assert ra is not None and dec is not None, 'Specify both ra and dec'
+        ra = np.atleast_1d(ra)
+        dec = np.atleast_1d(dec)
+        assert len(ra) == len(dec), 'ra and dec must have the same size'
+        inputMode = 'sky'
+        coords = np.array([ra, dec], float).T
     else:
-        return _spaxels
+        raise ValueError('You need to specify either (x, y) or (ra, dec)')
+
+    if not xyorig:
+        xyorig = marvin.config.xyorig
+
+    indices = convertCoords(coords, wcs=wcs if inputMode == 'sky' else None, shape=shape,
+                            mode=inputMode, xyorig=xyorig)
+
+    return indices[:, 0], indices[:, 1]
 
 
 def convertCoords(coords, mode='sky', wcs=None, xyorig='center', shape=None):
@@ -1901,3 +1956,46 @@ def get_manga_image(cube=None, drpver=None, plate=None, ifu=None, dir3d=None, lo
     else:
         img = path.url('mangaimage', drpver=drpver, plate=plate, ifu=ifu, dir3d=dir3d)
     return img
+
+
+def encode_array(array):
+    """Encodes an array as a JSON-serialisable dictionary with its binary buffer.
+
+    The array is sent as its raw bytes, base64-encoded, along with its dtype
+    and shape, which is much smaller and faster to decode than a nested list
+    of numbers. Use `.decode_array` to recover the array.
+
+    Parameters:
+        array (`~numpy.ndarray`):
+            The array to encode.
+
+    Returns:
+        encoded (dict):
+            A dictionary with the ``dtype`` and ``shape`` of the array and its
+            ``buffer``.
+
+    """
+
+    array = np.ascontiguousarray(array)
+
+    return {'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'buffer': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def decode_array(encoded):
+    """Decodes an array encoded with `.encode_array`.
+
+    Parameters:
+        encoded (dict):
+            The dictionary returned by `.encode_array`.
+
+    Returns:
+        array (`~numpy.ndarray`):
+            The decoded, writeable array.
+
+    """
+
+    buffer = bytearray(base64.b64decode(encoded['buffer']))
+
+    return np.frombuffer(buffer, dtype=np.dtype(encoded['dtype'])).reshape(encoded['shape'])
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: skyindex.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import tempfile
+
+import numpy as np
+from astropy.table import Table
+from scipy.spatial import cKDTree
+
+import marvin
+from marvin.utils.general.general import get_drpall_path, get_drpall_table
+
+
+__all__ = ('SkyIndex', 'get_sky_index')
+
+
+# Default location of the cached indices of the DRPall files.
+default_cache_dir = os.path.join(os.path.expanduser('~'), '.marvin', 'cache', 'skyindex')
+
+# Indices returned by get_sky_index, keyed on drpver and DRPall file.
+_indices = {}
+
+
+def _to_xyz(ra, dec):
+    """Returns the unit vectors of ``(ra, dec)``, in degrees, as an (N, 3) array."""
+
+    ra, dec = np.radians(ra), np.radians(dec)
+
+    return np.stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def _to_chord(radius):
+    """Returns the chord length between unit vectors ``radius`` degrees apart."""
+
+    return 2 * np.sin(np.radians(np.minimum(radius, 180.)) / 2.)
+
+
+def _to_angle(chord):
+    """Returns the angle, in degrees, between unit vectors a ``chord`` apart."""
+
+    return np.degrees(2 * np.arcsin(np.clip(chord / 2., 0, 1)))
+
+
+class SkyIndex(object):
+    """A KD-tree index of sky positions for cone searches and crossmatches.
+
+    Positions are indexed as unit vectors, so that the angular distance between
+    two positions is a monotonic function of the euclidean distance, and every
+    search is a single vectorized query of a `scipy.spatial.cKDTree`. Invalid
+    positions (non-finite, or outside the sphere) are never returned.
+
+    Use `.from_drpall` or `.get_sky_index` for the index of the galaxies of a
+    DRPall file, which is cached to disk for each ``drpver``.
+
+    Parameters:
+        ra,dec (array):
+            The coordinates of the positions, in degrees.
+        names (array):
+            Optional names of the positions, e.g. their plate-IFUs.
+
+    """
+
+    def __init__(self, ra, dec, names=None):
+
+        self.ra = np.atleast_1d(np.asarray(ra, dtype=float))
+        self.dec = np.atleast_1d(np.asarray(dec, dtype=float))
+        self.names = np.asarray(names) if names is not None else None
+        if self.names is not None and self.names.dtype.kind == 'S':
+            self.names = np.char.decode(self.names)
+
+        with np.errstate(invalid='ignore'):
+            valid = (np.isfinite(self.ra) & np.isfinite(self.dec) & (np.abs(self.dec) <= 90))
+
+        self._valid = np.nonzero(valid)[0]
+        self._tree = cKDTree(_to_xyz(self.ra[valid], self.dec[valid]).reshape(-1, 3))
+
+    def __repr__(self):
+        return '<SkyIndex (n_positions={0})>'.format(len(self))
+
+    def __len__(self):
+        return len(self.ra)
+
+    @staticmethod
+    def _get_xyz(ra, dec):
+        """Returns the unit vectors of ``(ra, dec)`` and whether they are scalars."""
+
+        scalar = np.isscalar(ra) and np.isscalar(dec)
+        ra, dec = np.broadcast_arrays(np.atleast_1d(np.asarray(ra, dtype=float)),
+                                      np.atleast_1d(np.asarray(dec, dtype=float)))
+
+        return _to_xyz(ra, dec), scalar
+
+    def cone(self, ra, dec, radius):
+        """Returns the positions within ``radius`` degrees of ``(ra, dec)``.
+
+        Parameters:
+            ra,dec (float or array):
+                The centres of the cones, in degrees.
+            radius (float or array):
+                The radius of the cones, in degrees.
+
+        Returns:
+            index (ndarray or list):
+                The sorted indices of the positions in each cone. For a
+                scalar ``(ra, dec)``, a single array of indices.
+
+        """
+
+        xyz, scalar = self._get_xyz(ra, dec)
+        radius = np.broadcast_to(_to_chord(np.asarray(radius, dtype=float)), len(xyz))
+
+        matches = self._tree.query_ball_point(xyz, radius, return_sorted=True)
+        matches = [self._valid[np.asarray(match, dtype=int)] for match in matches]
+
+        return matches[0] if scalar else matches
+
+    def crossmatch(self, ra, dec, radius):
+        """Returns the nearest position to each of ``(ra, dec)``, within ``radius``.
+
+        Parameters:
+            ra,dec (array):
+                The positions to match, in degrees.
+            radius (float or array):
+                The maximum separation of a match, in degrees.
+
+        Returns:
+            index (ndarray):
+                The index of the nearest position to each of ``(ra, dec)``, or -1
+                if there is none within ``radius``.
+            separation (ndarray):
+                The separation, in degrees, of the matches, or NaN if there is
+                no match.
+
+        """
+
+        xyz, __ = self._get_xyz(ra, dec)
+        radius = np.broadcast_to(_to_chord(np.asarray(radius, dtype=float)), len(xyz))
+
+        if len(self._valid) == 0:
+            return np.full(len(xyz), -1, dtype=int), np.full(len(xyz), np.nan)
+
+        chord, match = self._tree.query(xyz, k=1, distance_upper_bound=np.max(radius))
+        matched = np.isfinite(chord) & (chord <= radius)
+
+        index = np.full(len(xyz), -1, dtype=int)
+        index[matched] = self._valid[match[matched]]
+
+        separation = np.full(len(xyz), np.nan)
+        separation[matched] = _to_angle(chord[matched])
+
+        return index, separation
+
+    def search_around(self, ra, dec, radius):
+        """Returns all the pairs of ``(ra, dec)`` and positions within ``radius``.
+
+        Parameters:
+            ra,dec (array):
+                The positions to match, in degrees.
+            radius (float):
+                The maximum separation of a pair, in degrees.
+
+        Returns:
+            input_index, index (ndarray):
+                The indices of the ``(ra, dec)`` and of the indexed position of
+                each pair.
+            separation (ndarray):
+                The separation of each pair, in degrees.
+
+        """
+
+        xyz, __ = self._get_xyz(ra, dec)
+        matches = self.cone(np.atleast_1d(ra), np.atleast_1d(dec), radius)
+
+        input_index = np.repeat(np.arange(len(matches)), [len(match) for match in matches])
+        index = np.concatenate(matches) if matches else np.zeros(0, dtype=int)
+
+        chord = np.linalg.norm(xyz[input_index] - _to_xyz(self.ra[index], self.dec[index]),
+                               axis=-1)
+
+        return input_index, index, _to_angle(chord)
+
+    def save(self, path, **meta):
+        """Saves the positions of the index, and ``meta`` values, to an ``.npz`` file."""
+
+        dirname = os.path.dirname(os.path.realpath(path))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        arrays = dict(meta, ra=self.ra, dec=self.dec)
+        if self.names is not None:
+            arrays['names'] = self.names
+
+        # write to a temporary file first, so that readers never see a partial file
+        fd, tmppath = tempfile.mkstemp(dir=dirname, suffix='.npz')
+        with os.fdopen(fd, 'wb') as ff:
+            np.savez(ff, **arrays)
+        os.replace(tmppath, path)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index saved with `.save`."""
+
+        with np.load(path) as data:
+            return cls(data['ra'], data['dec'], names=data['names'] if 'names' in data else None)
+
+    @classmethod
+    def from_drpall(cls, drpver=None, drpall=None, cache_dir=None):
+        """Returns the index of the galaxies of a DRPall file.
+
+        Indexes the ``objra`` and ``objdec`` of the galaxies, i.e. their NSA
+        positions (the ``cube.ra`` and ``nsa.ra`` query parameters), in the
+        order of the rows of `~marvin.utils.general.get_drpall_table`, with
+        their plate-IFUs as names. The positions are cached to a
+        ``drpall_<drpver>.npz`` file in ``cache_dir``, which is rebuilt when
+        the DRPall file changes, and used when the DRPall file is not
+        available locally.
+
+        Parameters:
+            drpver (str):
+                The DRP version. Defaults to the version of the current release.
+            drpall (str or `~astropy.table.Table`):
+                The path to the DRPall file, or the loaded table, which is not
+                cached. Defaults to the DRPall file of ``drpver``.
+            cache_dir (str):
+                The directory of the cached indices. Defaults to the
+                ``sky_index_dir`` of the custom config, or ``~/.marvin/cache/skyindex``.
+
+        Returns:
+            index (`.SkyIndex`):
+                The index of the positions of the galaxies.
+
+        """
+
+        drpver = drpver or marvin.config.lookUpVersions()[0]
+
+        if isinstance(drpall, Table):
+            return cls(drpall['objra'], drpall['objdec'], names=drpall['plateifu'])
+
+        drpall = drpall or get_drpall_path(drpver)
+        cache_dir = cache_dir or marvin.config._custom_config.get('sky_index_dir', None)
+        cache_dir = os.path.realpath(os.path.expanduser(cache_dir or default_cache_dir))
+        cached = os.path.join(cache_dir, 'drpall_{0}.npz'.format(drpver))
+
+        # the file the index was built from, and its modification time and size
+        source = [os.path.realpath(drpall), 0, 0]
+        if os.path.isfile(drpall):
+            stat = os.stat(drpall)
+            source[1:] = [stat.st_mtime, stat.st_size]
+
+        if os.path.isfile(cached):
+            with np.load(cached) as data:
+                stored = data['source'].tolist() if 'source' in data else None
+            if not os.path.isfile(drpall) or stored == [str(value) for value in source]:
+                return cls.load(cached)
+
+        table = get_drpall_table(drpver=drpver, drpall=drpall)
+        index = cls(table['objra'], table['objdec'], names=table['plateifu'])
+        index.save(cached, source=np.array([str(value) for value in source]))
+
+        return index
+
+
+def get_sky_index(drpver=None, drpall=None):
+    """Returns the `.SkyIndex` of the galaxies of a DRPall file.
+
+    The index is built, or loaded from disk, once per session. See
+    `.SkyIndex.from_drpall`.
+
+    Example:
+        >>> index = get_sky_index('v3_1_1')
+        >>> match, separation = index.crossmatch(ra, dec, 3 / 3600.)
+        >>> plateifus = index.names[match[match >= 0]]
+
+    """
+
+    drpver = drpver or marvin.config.lookUpVersions()[0]
+
+    if isinstance(drpall, Table):
+        return SkyIndex.from_drpall(drpver=drpver, drpall=drpall)
+
+    drpall = drpall or get_drpall_path(drpver)
+    key = (drpver, os.path.realpath(drpall))
+    if os.path.isfile(drpall):
+        key += (os.path.getmtime(drpall), os.path.getsize(drpall))
+
+    if key not in _indices:
+        _indices[key] = SkyIndex.from_drpall(drpver=drpver, drpall=drpall)
+
+    return _indices[key]
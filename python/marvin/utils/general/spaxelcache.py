@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: spaxelcache.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import tempfile
+
+import numpy as np
+from astropy.io import fits
+
+from marvin.core.exceptions import MarvinError
+
+
+__all__ = ('SpaxelMajorCache', 'get_spaxel_cache')
+
+
+# Suffix of the directory, next to the cube, where the transposed arrays live.
+_cache_suffix = '.spaxel'
+
+# Number of bytes of the original cube read at once while transposing.
+_chunk_bytes = 256 * 1024 * 1024
+
+
+def _get_cache_path(filename):
+    """Returns the path of the spaxel-major store for ``filename``."""
+
+    realpath = os.path.realpath(filename)
+    basename = os.path.basename(realpath)
+
+    for ext in ['.gz', '.fits']:
+        if basename.endswith(ext):
+            basename = basename[:-len(ext)]
+
+    return os.path.join(os.path.dirname(realpath), basename + _cache_suffix)
+
+
+class SpaxelMajorCache(object):
+    """A spaxel-major (y, x, wavelength) copy of the 3D extensions of a cube.
+
+    MaNGA cubes are stored wavelength-major, so reading the spectrum of a
+    single spaxel as ``data[:, y, x]`` touches every wavelength plane of the
+    cube. This class stores a transposed copy of each 3D extension as a
+    ``.npy`` file in a ``<cube name>.spaxel`` directory next to the original
+    file, which is memory-mapped so that the spectrum of a spaxel is a
+    single contiguous read.
+
+    The store is built once with :meth:`build` (or
+    :meth:`~marvin.tools.cube.Cube.build_spaxel_cache`) and used
+    automatically by `~marvin.tools.cube.Cube` and
+    `~marvin.tools.modelcube.ModelCube` when it exists. Transposed arrays
+    older than the original file are ignored.
+
+    Parameters:
+        filename (str):
+            The path to the cube FITS file.
+
+    """
+
+    def __init__(self, filename):
+
+        self.filename = os.path.realpath(filename)
+        self.path = _get_cache_path(filename)
+
+        self._arrays = {}
+
+    def __repr__(self):
+
+        return '<SpaxelMajorCache (path={0!r}, extensions={1!r})>'.format(
+            self.path, self.extensions())
+
+    def __getstate__(self):
+
+        # Memory-mapped arrays are reopened on demand after unpickling.
+        state = self.__dict__.copy()
+        state['_arrays'] = {}
+
+        return state
+
+    def _get_array_path(self, extname):
+
+        return os.path.join(self.path, extname.upper() + '.npy')
+
+    def exists(self, extname):
+        """Returns True if an up-to-date transposed copy of ``extname`` exists."""
+
+        array_path = self._get_array_path(extname)
+
+        if not os.path.exists(array_path):
+            return False
+
+        return os.path.getmtime(array_path) >= os.path.getmtime(self.filename)
+
+    def extensions(self):
+        """Returns the names of the extensions with an up-to-date transposed copy."""
+
+        if not os.path.isdir(self.path):
+            return []
+
+        extnames = [name[:-4] for name in os.listdir(self.path) if name.endswith('.npy')]
+
+        return sorted(extname for extname in extnames if self.exists(extname))
+
+    def get(self, extname):
+        """Returns the memory-mapped ``(y, x, wavelength)`` array, or None."""
+
+        extname = extname.upper()
+
+        if extname not in self._arrays:
+            if not self.exists(extname):
+                return None
+            self._arrays[extname] = np.load(self._get_array_path(extname), mmap_mode='r')
+
+        return self._arrays[extname]
+
+    def read(self, hdulist, extname, y, x):
+        """Returns the spectrum of ``extname`` at ``(y, x)``.
+
+        Uses the transposed copy if it exists; otherwise reads the spectrum
+        from ``hdulist``. ``y`` and ``x`` can be integers or arrays of
+        indices, in which case an array of shape ``(N, nwave)`` is returned.
+
+        """
+
+        transposed = self.get(extname)
+
+        if transposed is not None:
+            return np.asarray(transposed[y, x])
+
+        return np.moveaxis(hdulist[extname].data[:, y, x], 0, -1)
+
+    def build(self, hdulist=None, extnames=None, overwrite=False):
+        """Writes the transposed copy of the 3D extensions of the cube.
+
+        The cube is transposed in blocks of rows so that the memory needed
+        does not depend on the size of the cube. Each array is written to a
+        temporary file and moved in place when complete.
+
+        Parameters:
+            hdulist (`~astropy.io.fits.HDUList`):
+                The opened cube. If not defined, ``filename`` is opened with
+                ``memmap=True``.
+            extnames (list):
+                The extensions to transpose. Defaults to all the 3D image
+                extensions.
+            overwrite (bool):
+                If True, rebuilds extensions that are already up to date.
+
+        Returns:
+            extnames (list):
+                The names of the extensions that were written.
+
+        """
+
+        close = hdulist is None
+        if close:
+            hdulist = fits.open(self.filename, memmap=True)
+
+        try:
+
+            if extnames is None:
+                extnames = [hdu.name for hdu in hdulist
+                            if hdu.is_image and hdu.header.get('NAXIS', 0) == 3]
+
+            try:
+                os.makedirs(self.path, exist_ok=True)
+            except OSError as ee:
+                raise MarvinError('cannot create spaxel cache {0}: {1}'.format(self.path, ee))
+
+            written = []
+
+            for extname in extnames:
+
+                extname = extname.upper()
+                if not overwrite and self.exists(extname):
+                    continue
+
+                self._transpose(hdulist[extname].data, self._get_array_path(extname))
+                self._arrays.pop(extname, None)
+                written.append(extname)
+
+        finally:
+            if close:
+                hdulist.close()
+
+        return written
+
+    def _transpose(self, data, array_path):
+        """Writes ``data`` as a ``(y, x, wavelength)`` array to ``array_path``."""
+
+        assert data is not None and data.ndim == 3, 'only 3D extensions can be transposed.'
+
+        nwave, ny, nx = data.shape
+        dtype = data.dtype.newbyteorder('=')
+
+        rows_per_chunk = max(1, _chunk_bytes // (nwave * nx * dtype.itemsize))
+
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        os.close(fd)
+
+        try:
+            out = np.lib.format.open_memmap(temp_path, mode='w+', dtype=dtype,
+                                            shape=(ny, nx, nwave))
+            for y0 in range(0, ny, rows_per_chunk):
+                y1 = min(y0 + rows_per_chunk, ny)
+                out[y0:y1] = np.moveaxis(data[:, y0:y1, :], 0, -1)
+            out.flush()
+            del out
+            os.replace(temp_path, array_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def clear(self):
+        """Removes the transposed arrays and their directory."""
+
+        self._arrays = {}
+
+        if not os.path.isdir(self.path):
+            return
+
+        for name in os.listdir(self.path):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass
+
+
+def get_spaxel_cache(filename):
+    """Returns the `.SpaxelMajorCache` for ``filename``, or None if not built."""
+
+    if filename is None or not os.path.isdir(_get_cache_path(filename)):
+        return None
+
+    return SpaxelMajorCache(filename)
@@ -13,6 +13,7 @@
 from __future__ import absolute_import, division, print_function
 
 import gzip
+import itertools
 import tempfile
 from collections import OrderedDict
 from contextlib import contextmanager
@@ -26,6 +27,13 @@ __ALL__ = ['FuzzyDict', 'Dotable', 'DotableCaseInsensitive', 'get_best_fuzzy',
            'FuzzyList', 'string_folding_wrapper', 'gunzip']
 
 
+# Maximum number of fuzzy matches memoised by FuzzyDict and FuzzyList.
+_fuzzy_cache_size = 1024
+
+_fuzzy_cache = OrderedDict()
+_fuzzy_tokens = itertools.count()
+
+
 class Dotable(dict):
     """A custom dict class that allows dot access to nested dictionaries.
 
@@ -114,8 +122,105 @@ def get_best_fuzzy(value, choices, min_score=75, scorer=fuzz_fuzz.WRatio, return
     return best if return_score else best[0]
 
 
+def _normalise_key(value):
+    """Returns the case and space insensitive version of a key."""
+
+    return value.lower().replace(' ', '_')
+
+
+def _get_cached_match(cache_key):
+    """Returns a memoised fuzzy match, or None."""
+
+    try:
+        match = _fuzzy_cache[cache_key]
+        _fuzzy_cache.move_to_end(cache_key)
+    except KeyError:
+        return None
+
+    return match
+
+
+def _set_cached_match(cache_key, match):
+    """Memoises a fuzzy match, dropping the least recently used ones."""
+
+    _fuzzy_cache[cache_key] = match
+
+    while len(_fuzzy_cache) > _fuzzy_cache_size:
+        try:
+            _fuzzy_cache.popitem(last=False)
+        except KeyError:
+            break
+
+
+class _FuzzyIndex(object):
+    """An index of the keys of a `FuzzyDict` or `FuzzyList`.
+
+    Resolves a value to the position of its key by exact match, then by
+    normalised (case and space insensitive) match, and only then by
+    running the fuzzy selection, whose result is memoised in a bounded LRU
+    cache shared by all the indices. Each index gets a unique token, so
+    memoised matches are never reused after the container is modified and
+    its index rebuilt.
+
+    """
+
+    def __init__(self, keys):
+
+        self.keys = list(keys)
+        self.token = next(_fuzzy_tokens)
+
+        self.exact = {}
+        self.normalised = {}
+
+        for position, key in enumerate(self.keys):
+
+            if not isinstance(key, six.string_types) or key in self.exact:
+                continue
+
+            self.exact[key] = position
+
+            # Normalised keys shared by several keys are left to the fuzzy match.
+            norm_key = _normalise_key(key)
+            self.normalised[norm_key] = None if norm_key in self.normalised else position
+
+    def find(self, value, use_fuzzy):
+        """Returns the position of the key that matches ``value``."""
+
+        if not isinstance(value, six.string_types):
+            return self._get_position(use_fuzzy(value, self.keys))
+
+        position = self.exact.get(value, None)
+        if position is not None:
+            return position
+
+        position = self.normalised.get(_normalise_key(value), None)
+        if position is not None:
+            return position
+
+        cache_key = (self.token, value)
+
+        position = _get_cached_match(cache_key)
+        if position is None:
+            position = self._get_position(use_fuzzy(value, self.keys))
+            _set_cached_match(cache_key, position)
+
+        return position
+
+    def _get_position(self, key):
+
+        if isinstance(key, six.string_types) and key in self.exact:
+            return self.exact[key]
+
+        return self.keys.index(key)
+
+
 class FuzzyDict(OrderedDict):
-    """A dotable dictionary that uses fuzzywuzzy to select the key."""
+    """A dotable dictionary that uses fuzzywuzzy to select the key.
+
+    Exact and case insensitive matches are resolved using an index of the
+    keys, and fuzzy matches are memoised until the dictionary is modified.
+
+    """
 
     def __getattr__(self, value):
         if '__' in value:
@@ -130,10 +235,62 @@ class FuzzyDict(OrderedDict):
         if value in self.keys():
             return dict.__getitem__(self, value)
 
-        best = get_best_fuzzy(value, self.keys())
+        index = self._get_fuzzy_index()
+        best = index.keys[index.find(value, get_best_fuzzy)]
 
         return dict.__getitem__(self, best)
 
+    def _get_fuzzy_index(self):
+        """Returns the index of the keys, building it if needed."""
+
+        index = self.__dict__.get('_fuzzy_index', None)
+
+        if index is None:
+            index = self.__dict__['_fuzzy_index'] = _FuzzyIndex(self.keys())
+
+        return index
+
+    def _reset_fuzzy_index(self):
+
+        self.__dict__.pop('_fuzzy_index', None)
+
+    def __getstate__(self):
+
+        # The token of the index is only unique within this process, so the
+        # index is rebuilt on demand after unpickling.
+        state = self.__dict__.copy()
+        state.pop('_fuzzy_index', None)
+
+        return state
+
+    def __setitem__(self, key, value):
+        super(FuzzyDict, self).__setitem__(key, value)
+        self._reset_fuzzy_index()
+
+    def __delitem__(self, key):
+        super(FuzzyDict, self).__delitem__(key)
+        self._reset_fuzzy_index()
+
+    def pop(self, *args):
+        self._reset_fuzzy_index()
+        return super(FuzzyDict, self).pop(*args)
+
+    def popitem(self, *args, **kwargs):
+        self._reset_fuzzy_index()
+        return super(FuzzyDict, self).popitem(*args, **kwargs)
+
+    def setdefault(self, *args):
+        self._reset_fuzzy_index()
+        return super(FuzzyDict, self).setdefault(*args)
+
+    def update(self, *args, **kwargs):
+        super(FuzzyDict, self).update(*args, **kwargs)
+        self._reset_fuzzy_index()
+
+    def clear(self):
+        super(FuzzyDict, self).clear()
+        self._reset_fuzzy_index()
+
     def __dir__(self):
 
         return list(self.keys())
@@ -142,6 +299,11 @@ class FuzzyDict(OrderedDict):
 class FuzzyList(list):
     """A list that uses fuzzywuzzy to select the item.
 
+    Exact and case insensitive matches of the mapped values are resolved
+    using an index, and fuzzy matches are memoised until the list is
+    modified. Items must not be changed in place in a way that modifies
+    their mapped value.
+
     Parameters:
         the_list (list):
             The list on which we will do fuzzy searching.
@@ -154,23 +316,51 @@ class FuzzyList(list):
         self.use_fuzzy = use_fuzzy if use_fuzzy else get_best_fuzzy
 
         list.__init__(self, the_list)
+        self._reset_fuzzy_index()
 
     def mapper(self, item):
         """The function that maps each item to the querable string."""
 
         return str(item)
 
-    def __eq__(self, value):
+    def _get_fuzzy_index(self):
+        """Returns the index of the mapped values, building it if needed."""
+
+        index = self.__dict__.get('_fuzzy_index', None)
+
+        if index is None:
+            index = self.__dict__['_fuzzy_index'] = _FuzzyIndex(
+                self.mapper(item) for item in list.__iter__(self))
+
+        return index
+
+    def _reset_fuzzy_index(self):
+
+        self.__dict__.pop('_fuzzy_index', None)
 
-        self_values = [self.mapper(item) for item in self]
+    def __getstate__(self):
+
+        # The token of the index is only unique within this process, so the
+        # index is rebuilt on demand after unpickling.
+        state = self.__dict__.copy()
+        state.pop('_fuzzy_index', None)
+
+        return state
+
+    def _select(self, value, self_values):
+        """Calls ``use_fuzzy``, retrying with underscores if no match is found."""
 
         try:
-            best = self.use_fuzzy(value, self_values)
+            return self.use_fuzzy(value, self_values)
         except ValueError:
             # Second pass, using underscores.
-            best = self.use_fuzzy(value.replace(' ', '_'), self_values)
+            return self.use_fuzzy(value.replace(' ', '_'), self_values)
+
+    def __eq__(self, value):
+
+        position = self._get_fuzzy_index().find(value, self._select)
 
-        return self[self_values.index(best)]
+        return list.__getitem__(self, position)
 
     def __contains__(self, value):
 
@@ -192,11 +382,10 @@ class FuzzyList(list):
 
     def __getattr__(self, value):
 
-        self_values = [super(FuzzyList, self).__getattribute__('mapper')(item)
-                       for item in self]
-
-        if value in self_values:
-            return self[value]
+        if not value.startswith('__'):
+            index = self._get_fuzzy_index()
+            if value in index.exact:
+                return list.__getitem__(self, index.exact[value])
 
         return super(FuzzyList, self).__getattribute__(value)
 
@@ -204,6 +393,57 @@ class FuzzyList(list):
 
         return [self.mapper(item) for item in self]
 
+    def __setitem__(self, key, value):
+        super(FuzzyList, self).__setitem__(key, value)
+        self._reset_fuzzy_index()
+
+    def __delitem__(self, key):
+        super(FuzzyList, self).__delitem__(key)
+        self._reset_fuzzy_index()
+
+    def __iadd__(self, other):
+        result = super(FuzzyList, self).__iadd__(other)
+        self._reset_fuzzy_index()
+        return result
+
+    def __imul__(self, other):
+        result = super(FuzzyList, self).__imul__(other)
+        self._reset_fuzzy_index()
+        return result
+
+    def append(self, item):
+        super(FuzzyList, self).append(item)
+        self._reset_fuzzy_index()
+
+    def extend(self, items):
+        super(FuzzyList, self).extend(items)
+        self._reset_fuzzy_index()
+
+    def insert(self, position, item):
+        super(FuzzyList, self).insert(position, item)
+        self._reset_fuzzy_index()
+
+    def remove(self, item):
+        super(FuzzyList, self).remove(item)
+        self._reset_fuzzy_index()
+
+    def pop(self, *args):
+        item = super(FuzzyList, self).pop(*args)
+        self._reset_fuzzy_index()
+        return item
+
+    def clear(self):
+        super(FuzzyList, self).clear()
+        self._reset_fuzzy_index()
+
+    def sort(self, *args, **kwargs):
+        super(FuzzyList, self).sort(*args, **kwargs)
+        self._reset_fuzzy_index()
+
+    def reverse(self):
+        super(FuzzyList, self).reverse()
+        self._reset_fuzzy_index()
+
 
 class OrderedDefaultDict(FuzzyDict):
 
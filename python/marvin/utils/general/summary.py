@@ -0,0 +1,429 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# summary.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import copy
+import fnmatch
+import os
+import re
+from operator import eq, ge, gt, le, lt, ne
+
+import numpy as np
+
+from marvin.core.exceptions import MarvinError
+from marvin.utils.datamodel.query import datamodel
+from marvin.utils.datamodel.query.base import query_params
+from marvin.utils.general.general import get_dapall_table, get_drpall_table
+from marvin.utils.general.skyindex import SkyIndex, get_sky_index
+
+from sqlalchemy_boolean_search import (BoolAnd, BoolNot, BoolOr, Condition,
+                                       FxnCondition)
+
+
+__all__ = ('SummaryQuery', )
+
+
+_operators = {'<=': le, '>=': ge, '>': gt, '<': lt, '!=': ne, '=': eq, '==': eq}
+
+# Tables that are answered from the DRPall and the DAPall files, respectively.
+_drpall_tables = ('cube', 'nsa', 'ifudesign')
+_dapall_tables = ('dapall', 'bintype', 'template', 'file')
+
+_table_shortcuts = {'ifu': 'ifudesign'}
+
+
+def _log10(values):
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log10(values)
+
+
+def _colour(values, blue=3, red=4):
+    """Returns the blue - red colour from an NSA ``FNugriz`` array column."""
+
+    return values[:, blue] - values[:, red]
+
+
+# Query parameters whose value does not come from a column with the same name
+# (``cube.<name>`` or ``dapall.<name>``) or the NSA prefix (``nsa.<name>``
+# from ``nsa_<name>``). Values are column names or functions of a column getter.
+_summary_columns = {
+    'cube.ra': 'objra',
+    'cube.dec': 'objdec',
+    'cube.manga_target1': 'mngtarg1',
+    'cube.manga_target2': 'mngtarg2',
+    'cube.manga_target3': 'mngtarg3',
+    'cube.quality': 'drp3qual',
+    'ifudesign.name': 'ifudsgn',
+    'nsa.ra': 'objra',
+    'nsa.dec': 'objdec',
+    'nsa.elpetro_logmass': lambda col: _log10(col('nsa_elpetro_mass')),
+    'nsa.sersic_logmass': lambda col: _log10(col('nsa_sersic_mass')),
+    'nsa.elpetro_absmag_g_r': lambda col: _colour(col('nsa_elpetro_absmag')),
+    'nsa.elpetro_mag_g_r': lambda col: -2.5 * _log10(col('nsa_elpetro_flux')[:, 3] /
+                                                     col('nsa_elpetro_flux')[:, 4]),
+    'bintype.name': lambda col: np.array([daptype.split('-', 1)[0]
+                                          for daptype in col('daptype')]),
+    'template.name': lambda col: np.array([daptype.split('-', 1)[-1]
+                                           for daptype in col('daptype')]),
+    'file.quality': 'dapqual'}
+
+
+class SummaryQuery(object):
+    """A query over the DRPall and DAPall summary tables.
+
+    Evaluates the parsed boolean search filters of a
+    `~marvin.tools.query.Query` as numpy masks over the columns of the
+    DRPall table (and the DAPall table, joined on ``plateifu``, when DAP
+    parameters are used), without a database. Provides the subset of the
+    SQLAlchemy query interface that `~marvin.tools.results.Results` uses
+    for paging (``count``, ``slice``, ``all``, and ``from_self``).
+
+    Parameters:
+        drpver,dapver (str):
+            The DRP and DAP versions of the summary files.
+        release (str):
+            The release of the query datamodel used to resolve parameter names.
+        params (list):
+            The full names of the parameters returned for each row. The list
+            is not copied, so that parameters added later by the
+            `~marvin.tools.query.Query` are also returned.
+        drpall,dapall (str or `~astropy.table.Table`):
+            The path to the summary files, or the already loaded tables.
+            Default to the files for ``drpver`` and ``dapver``, which are
+            downloaded if needed.
+
+    """
+
+    def __init__(self, drpver, dapver, release=None, params=None, drpall=None, dapall=None):
+
+        self._drpver = drpver
+        self._dapver = dapver
+        self.params = params if params is not None else []
+
+        self._parameters = datamodel[release].parameters if release else query_params
+        self._shortcuts = dict(zip(query_params.list_params(name_type='short'),
+                                   query_params.list_params(name_type='name')))
+
+        self._tables = {'drpall': drpall, 'dapall': dapall}
+        self._drpall = drpall
+        self._columns = {}
+        self._sky_index = None
+        self._use_dapall = False
+
+        self._filters = []
+        self._cones = []
+        self._sort = None
+        self._rows = None
+        self._index = None
+
+    def __repr__(self):
+        return '<SummaryQuery (drpver={0!r}, dapver={1!r}, n_filters={2})>'.format(
+            self._drpver, self._dapver, len(self._filters) + len(self._cones))
+
+    def _get_table(self, name):
+        """Returns the DRPall or DAPall table, loading it if needed."""
+
+        table = self._tables[name]
+
+        if table is None or isinstance(table, str):
+            if table is not None and not os.path.exists(table):
+                raise MarvinError('cannot find the {0} file {1}.'.format(name, table))
+            if name == 'drpall':
+                table = get_drpall_table(drpver=self._drpver, drpall=table)
+            else:
+                table = get_dapall_table(drpver=self._drpver, dapver=self._dapver, dapall=table)
+            self._tables[name] = table
+
+        return table
+
+    def get_full_name(self, name):
+        """Returns the full name of a query parameter, checking it can be queried.
+
+        Applies the same shortcuts as the database queries (e.g.,
+        ``haflux`` or ``ifu.name``) and looks up names without a table in
+        the query datamodel.
+
+        """
+
+        name = str(name)
+
+        if '.' in name:
+            table, column = name.rsplit('.', 1)
+            table = _table_shortcuts.get(table, table)
+            full = '{0}.{1}'.format(table, self._shortcuts.get(column, column))
+        else:
+            name = self._shortcuts.get(name, name)
+            matches = [param.full for param in self._parameters if param.name == name]
+            if len(matches) == 0:
+                raise MarvinError('cannot find a query parameter named {0!r}'.format(name))
+            full = matches[0]
+
+        # makes sure the column exists
+        self._get_table_column(full)
+
+        return full
+
+    def _get_table_column(self, full):
+        """Returns the table name and the values of a parameter for each row of that table."""
+
+        if full in self._columns:
+            return self._columns[full]
+
+        table_name = full.split('.', 1)[0]
+
+        if table_name in _drpall_tables:
+            summary = 'drpall'
+        elif table_name in _dapall_tables:
+            summary = 'dapall'
+        else:
+            raise MarvinError('{0} cannot be queried from the summary files.'.format(full))
+
+        table = self._get_table(summary)
+        colnames = {colname.lower(): colname for colname in table.colnames}
+
+        def get_column(colname):
+            if colname.lower() not in colnames:
+                raise MarvinError('{0} cannot be queried from the summary files: no column {1} '
+                                  'in the {2} table.'.format(full, colname, summary))
+            values = np.asarray(table[colnames[colname.lower()]])
+            return np.char.decode(values) if values.dtype.kind == 'S' else values
+
+        column = _summary_columns.get(full, None)
+        if column is None:
+            column = full.split('.', 1)[1]
+            column = 'nsa_' + column if table_name == 'nsa' else column
+
+        values = column(get_column) if callable(column) else get_column(column)
+
+        # the rows of the query change once the DAPall table is joined
+        if summary == 'dapall' and not self._use_dapall:
+            self._use_dapall = True
+            self._reset()
+
+        self._columns[full] = (summary, values)
+
+        return self._columns[full]
+
+    def _reset(self):
+
+        self._rows = None
+        self._index = None
+
+    def _get_rows(self):
+        """Returns the rows of the DRPall and DAPall table for each row of the query."""
+
+        if self._rows is not None:
+            return self._rows
+
+        drpall = self._get_table('drpall')
+        __, drp_plateifus = self._get_table_column('cube.plateifu')
+
+        if not self._use_dapall:
+            self._rows = {'drpall': np.arange(len(drpall))}
+            return self._rows
+
+        __, dap_plateifus = self._get_table_column('dapall.plateifu')
+
+        drp_index = {plateifu: idx for idx, plateifu in enumerate(drp_plateifus)}
+        drp_rows = np.array([drp_index.get(plateifu, -1) for plateifu in dap_plateifus],
+                            dtype=int)
+        matched = drp_rows >= 0
+
+        self._rows = {'drpall': drp_rows[matched], 'dapall': np.nonzero(matched)[0]}
+
+        return self._rows
+
+    def get_column(self, full, index=None):
+        """Returns the values of a parameter for the rows of the query."""
+
+        summary, values = self._get_table_column(full)
+        values = values[self._get_rows()[summary]]
+
+        return values if index is None else values[index]
+
+    def _evaluate(self, condition, index):
+        """Returns the boolean mask of a parsed condition for the rows in ``index``."""
+
+        if isinstance(condition, BoolAnd):
+            masks = [self._evaluate(cond, index) for cond in condition.conditions]
+            return np.logical_and.reduce(masks) if masks else np.ones(len(index), dtype=bool)
+        elif isinstance(condition, BoolOr):
+            masks = [self._evaluate(cond, index) for cond in condition.conditions]
+            return np.logical_or.reduce(masks) if masks else np.ones(len(index), dtype=bool)
+        elif isinstance(condition, BoolNot):
+            return ~self._evaluate(condition.condition, index)
+        elif isinstance(condition, FxnCondition):
+            # functions are applied by the Query, not as part of the filter.
+            return np.ones(len(index), dtype=bool)
+        elif isinstance(condition, Condition):
+            return self._evaluate_condition(condition, index)
+
+        raise MarvinError('cannot evaluate filter condition {0!r}'.format(condition))
+
+    def _evaluate_condition(self, condition, index):
+        """Evaluates a ``parameter operator value`` condition, as the database does."""
+
+        values = self.get_column(self.get_full_name(condition.fullname), index=index)
+        op = condition.op
+
+        if values.dtype.kind in 'US':
+
+            values = np.char.lower(np.char.rstrip(values.astype(str)))
+            value = condition.value.lower()
+
+            if op == '=' and '*' in value:
+                pattern = re.compile(fnmatch.translate(value))
+                mask = np.array([pattern.match(item) is not None for item in values], dtype=bool)
+            elif op == '=':
+                mask = np.char.find(values, value) >= 0
+            elif op == 'between':
+                mask = (values >= value) & (values <= condition.value2.lower())
+            elif op in _operators:
+                mask = _operators[op](values, value)
+            else:
+                raise MarvinError('operator {0} cannot be used with {1}'.format(
+                    op, condition.fullname))
+
+        else:
+
+            cast = int if values.dtype.kind in 'iub' else float
+
+            try:
+                value = cast(condition.value)
+                value2 = cast(condition.value2) if op == 'between' else None
+            except ValueError:
+                raise MarvinError('{0} expects a numerical value. Received {1} instead.'.format(
+                    condition.fullname, condition.value))
+
+            if op in ['&', '|']:
+                if cast is not int:
+                    raise MarvinError('bitwise operator {0} cannot be used with {1}'.format(
+                        op, condition.fullname))
+                mask = (values & value if op == '&' else values | value) > 0
+            elif op == 'between':
+                mask = (values >= value) & (values <= value2)
+            else:
+                mask = _operators[op](values, value)
+
+        # array columns match if any element does
+        if mask.ndim > 1:
+            mask = mask.any(axis=tuple(range(1, mask.ndim)))
+
+        return mask
+
+    def filter(self, parsed):
+        """Adds a parsed boolean search filter to the query.
+
+        Parameters:
+            parsed:
+                The output of ``parse_boolean_search``.
+
+        Returns:
+            params (list):
+                The full names of the parameters in the filter.
+
+        """
+
+        params = []
+        for name in getattr(parsed, 'uniqueparams', []):
+            full = self.get_full_name(name)
+            if full not in params:
+                params.append(full)
+
+        self._filters.append(parsed)
+        self._reset()
+
+        return params
+
+    def cone(self, ra, dec, radius):
+        """Restricts the query to objects within ``radius`` degrees of ``(ra, dec)``."""
+
+        self._cones.append((float(ra), float(dec), float(radius)))
+        self._reset()
+
+    def order_by(self, name, order='asc'):
+        """Sorts the rows of the query by a parameter."""
+
+        assert order in ['asc', 'desc'], 'Sort order parameter must be either "asc" or "desc"'
+
+        self._sort = (self.get_full_name(name), order) if name else None
+        self._reset()
+
+    def _get_sky_index(self):
+        """Returns the `.SkyIndex` of the rows of the DRPall table.
+
+        The index of a DRPall file is the one cached for ``drpver``, while a
+        DRPall table passed to the query is indexed in memory.
+
+        """
+
+        if self._sky_index is not None:
+            return self._sky_index
+
+        # the path given to the query, since the loaded table replaces it in _tables
+        drpall = self._drpall
+        if drpall is None or isinstance(drpall, str):
+            self._sky_index = get_sky_index(self._drpver, drpall=drpall)
+        else:
+            __, ra = self._get_table_column('cube.ra')
+            __, dec = self._get_table_column('cube.dec')
+            self._sky_index = SkyIndex(ra, dec)
+
+        return self._sky_index
+
+    def _get_index(self):
+        """Returns the positions of the matching rows, in order."""
+
+        if self._index is not None:
+            return self._index
+
+        index = np.arange(len(self._get_rows()['drpall']))
+
+        for parsed in self._filters:
+            index = index[self._evaluate(parsed, index)]
+
+        for ra, dec, radius in self._cones:
+            rows = self._get_rows()['drpall'][index]
+            index = index[np.isin(rows, self._get_sky_index().cone(ra, dec, radius))]
+
+        if self._sort:
+            name, order = self._sort
+            order_index = np.argsort(self.get_column(name, index=index), kind='stable')
+            index = index[order_index[::-1] if order == 'desc' else order_index]
+
+        self._index = index
+
+        return self._index
+
+    def count(self):
+        """Returns the number of rows matching the query."""
+
+        return len(self._get_index())
+
+    def slice(self, start, end):
+        """Returns a new query with the rows between ``start`` and ``end``."""
+
+        new_query = copy.copy(self)
+        new_query._index = self._get_index()[start:end]
+
+        return new_query
+
+    def from_self(self):
+        return self
+
+    def all(self):
+        """Returns the rows of the query, as tuples of the values of ``params``."""
+
+        index = self._get_index()
+        columns = [self.get_column(param, index=index).tolist() for param in self.params]
+
+        return list(zip(*columns))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_batches.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import io
+
+import pytest
+import requests
+
+from marvin.api import batches
+from marvin.api.api import Interaction
+from marvin.core.exceptions import MarvinError
+from marvin.tools.results import ColumnarBatches
+
+
+params = ['cube.mangaid', 'cube.plateifu', 'nsa.z']
+rows = [('1-209232', '8485-1901', 0.0407), ('1-209199', '8485-1902', 0.025),
+        ('12-193534', '7443-12701', 0.117), ('12-98126', '7443-1901', None),
+        ('1-55572', '8000-3701', 0.035)]
+
+
+def encode(rows, batch_size=2):
+    return b''.join(batches.encode_batches(rows, params, batch_size=batch_size))
+
+
+def failing_rows():
+    yield rows[0]
+    raise ValueError('connection lost')
+
+
+class TestBatches(object):
+
+    @pytest.mark.parametrize('batch_size', [1, 2, 10])
+    @pytest.mark.parametrize('chunk_size', [1, 7, 10000])
+    def test_roundtrip(self, batch_size, chunk_size):
+        stream = encode(rows, batch_size=batch_size)
+
+        decoder = batches.BatchDecoder()
+        for ii in range(0, len(stream), chunk_size):
+            decoder.feed(stream[ii:ii + chunk_size])
+        decoder.close()
+
+        assert decoder.params == params
+        assert decoder.count == 5
+        assert [tuple(row) for row in decoder.batches] == rows
+
+    def test_error_frame(self):
+        stream = b''.join(batches.encode_batches(failing_rows(), params, batch_size=1))
+        with pytest.raises(MarvinError, match='ValueError: connection lost'):
+            batches.BatchDecoder().feed(stream)
+
+    def test_truncated(self):
+        decoder = batches.BatchDecoder()
+        decoder.feed(encode(rows)[:-3])
+        with pytest.raises(MarvinError, match='ended unexpectedly'):
+            decoder.close()
+
+    def test_columnar_store(self):
+        decoder = batches.BatchDecoder(batches=ColumnarBatches())
+        decoder.feed(encode(rows))
+        decoder.close()
+
+        data = decoder.batches.to_array(['mangaid', 'plateifu', 'z'])
+        assert len(decoder.batches) == 5
+        assert data['plateifu'].tolist() == [row[1] for row in rows]
+        assert data['z'].tolist() == [row[2] for row in rows]
+
+    def test_interaction(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = batches.mimetype
+        response.raw = io.BytesIO(encode(rows))
+
+        ii = Interaction('/marvin/api/query/stream/', send=False, params={'compression': 'json'})
+        content = ii._get_content(response)
+
+        assert content['params'] == params
+        assert content['totalcount'] == 5
+        assert [tuple(row) for row in content['data']] == rows
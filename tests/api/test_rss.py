@@ -59,3 +59,23 @@ class TestGetRssFibers(object):
             page.route_no_valid_params(page.url.format(name=galaxy.plateifu, fiberid=10), missing, reqtype=reqtype, errmsg=errmsg)
         else:
             page.route_no_valid_params(page.url.format(name=name, fiberid=10), missing, reqtype=reqtype, params=params, errmsg=errmsg)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('page', [('api', 'getRSSExtension')], ids=['getrssextension'],
+                         indirect=True)
+class TestGetRssExtension(object):
+
+    @pytest.mark.parametrize('reqtype', [('get'), ('post')])
+    def test_plateifu_success(self, galaxy, page, params, reqtype):
+        page.load_page(reqtype, page.url.format(name=galaxy.plateifu, rss_extension='FLUX'),
+                       params=params)
+        page.assert_success()
+        assert set(page.json['data'].keys()) == set(['dtype', 'shape', 'buffer'])
+        assert len(page.json['data']['shape']) == 2
+
+    @pytest.mark.parametrize('reqtype', [('get'), ('post')])
+    def test_bad_extension(self, galaxy, page, params, reqtype):
+        page.load_page(reqtype, page.url.format(name=galaxy.plateifu, rss_extension='BADEXT'),
+                       params=params)
+        assert page.json['status'] == -1
@@ -9,6 +9,8 @@ import yaml
 import pytest
 import copy
 import itertools
+import numpy as np
+from astropy.table import Table
 from flask_jwt_extended import tokens
 
 from brain import bconfig
@@ -410,6 +412,41 @@ def temp_scratch(tmp_path_factory):
     fn = None
 
 
+# Summary file FIXTURES
+# ---------------------
+@pytest.fixture()
+def drpall_table():
+    """A small DRPall table."""
+
+    plateifus = ['8485-1901', '8485-1902', '7443-12701', '7443-1901', '8000-3701']
+    absmag = np.zeros((5, 7))
+    absmag[:, 3] = [-19.0, -20.0, -21.0, -18.5, -20.5]
+    absmag[:, 4] = [-19.5, -20.2, -21.9, -18.7, -21.0]
+    return Table({'plateifu': plateifus,
+                  'mangaid': ['1-209232', '1-209199', '12-193534', '12-98126', '1-55572'],
+                  'plate': [8485, 8485, 7443, 7443, 8000],
+                  'objra': [232.544, 232.920, 230.507, 229.526, 317.275],
+                  'objdec': [48.690, 48.424, 43.532, 42.746, 0.200],
+                  'mngtarg1': [1024, 2048, 4096, 0, 1024],
+                  'drp3qual': [0, 64, 0, 0, 256],
+                  'nsa_z': [0.0407, 0.0250, 0.1170, 0.0206, 0.0350],
+                  'nsa_elpetro_mass': [3.4e10, 1.1e10, 2.5e11, 1e9, -9999.],
+                  'nsa_elpetro_absmag': absmag})
+
+
+@pytest.fixture()
+def dapall_table():
+    """A small DAPall table, with two DAPTYPEs of 8485-1901 and a galaxy not in the DRPall."""
+
+    plateifus = ['8485-1901', '8485-1901', '8485-1902', '7443-12701', '9999-1901']
+    return Table({'PLATEIFU': plateifus,
+                  'DAPTYPE': ['SPX-MILESHC-MASTARSSP', 'HYB10-MILESHC-MASTARHC2',
+                              'HYB10-MILESHC-MASTARHC2', 'HYB10-MILESHC-MASTARHC2',
+                              'HYB10-MILESHC-MASTARHC2'],
+                  'DAPQUAL': [0, 0, 2, 0, 0],
+                  'SFR_1RE': [0.5, 0.6, 0.01, 2.0, 1.0]})
+
+
 # Object-based FIXTURES
 # ---------------------
 
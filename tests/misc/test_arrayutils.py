@@ -0,0 +1,116 @@
+# !usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import struct
+import types
+
+import numpy as np
+import pytest
+from dogpile.cache.region import make_region
+from sqlalchemy import Column, Float, Integer, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Query, sessionmaker
+
+from marvin.db.ArrayUtils import decode_array_send, get_bulk_arrays
+from marvin.db.caching import regions
+
+
+def array_send(values, oid, fmt):
+    """Packs ``values`` in the binary format returned by postgres array_send."""
+
+    values = np.atleast_1d(values)
+    hasnull = int(any(value is None for value in values.ravel()))
+    buff = struct.pack('>iiI', values.ndim, hasnull, oid)
+    for size in values.shape:
+        buff += struct.pack('>ii', size, 1)
+    for value in values.ravel():
+        if value is None:
+            buff += struct.pack('>i', -1)
+        else:
+            buff += struct.pack('>i', struct.calcsize(fmt)) + struct.pack('>' + fmt, value)
+    return buff
+
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = 'row'
+
+    pk = Column(Integer, primary_key=True)
+    x = Column(Integer)
+    y = Column(Integer)
+    value = Column(Float)
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for x in range(3):
+        for y in range(2):
+            session.add(Row(x=x, y=y, value=10 * y + x))
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestDecodeArraySend(object):
+
+    def test_float_2d(self):
+        values = np.arange(12, dtype=np.float32).reshape(3, 4)
+        decoded = decode_array_send(array_send(values, 700, 'f'))
+        assert decoded.shape == (3, 4)
+        assert decoded.dtype == np.float32
+        np.testing.assert_array_equal(decoded, values)
+
+    def test_int(self):
+        decoded = decode_array_send(array_send(np.array([3, -1, 5]), 23, 'i'))
+        np.testing.assert_array_equal(decoded, [3, -1, 5])
+
+    def test_nulls(self):
+        values = np.array([1.5, None, 2.5], dtype=object)
+        decoded = decode_array_send(array_send(values, 701, 'd'))
+        np.testing.assert_array_equal(decoded, [1.5, np.nan, 2.5])
+
+    def test_unsupported_type(self):
+        header = struct.pack('>iiI', 1, 0, 1700)
+        assert decode_array_send(header + struct.pack('>ii', 0, 1)) is None
+
+
+class TestGetBulkArrays(object):
+
+    def test_row_fallback(self, session):
+        values, xx = get_bulk_arrays(session, [Row.value, Row.x], [Row.pk > 0], [Row.y, Row.x])
+        np.testing.assert_array_equal(values.reshape(2, 3), [[0, 1, 2], [10, 11, 12]])
+        np.testing.assert_array_equal(xx, [0, 1, 2, 0, 1, 2])
+
+    def test_cached_buffers(self, monkeypatch):
+        calls = []
+
+        class BufferQuery(Query):
+            def one(self):
+                calls.append(self)
+                return (array_send([[0., 1.], [2., 3.]], 701, 'd'),)
+
+        class PostgresSession(object):
+            def get_bind(self):
+                return types.SimpleNamespace(dialect=postgresql.dialect())
+
+            def query(self, *columns):
+                return BufferQuery(columns)
+
+        monkeypatch.setitem(regions, 'maps', make_region().configure('dogpile.cache.memory'))
+
+        for pk in [1, 1, 2]:
+            value, = get_bulk_arrays(PostgresSession(), [Row.value], [Row.pk == pk],
+                                     [Row.y, Row.x], cache_region='maps')
+            np.testing.assert_array_equal(value, [[0, 1], [2, 3]])
+
+        assert len(calls) == 2
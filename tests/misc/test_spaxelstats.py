@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_spaxelstats.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+from operator import eq, ge, gt, le, lt, ne
+
+import numpy as np
+import pytest
+from sqlalchemy import Column, Float, Integer, create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from marvin import config
+from marvin.db.spaxelstats import SpaxelStats, _count_bounds, get_spaxel_stats
+
+
+Base = declarative_base()
+
+
+class SpaxelProp(Base):
+    __tablename__ = 'spaxelprop'
+
+    pk = Column(Integer, primary_key=True)
+    file_pk = Column(Integer, index=True)
+    binid = Column(Integer)
+    emline_gflux_ha_6564 = Column(Float)
+
+
+@pytest.fixture()
+def session(tmpdir):
+    engine = create_engine('sqlite:///{0}'.format(tmpdir.join('dapdb.sqlite')))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    rng = np.random.RandomState(42)
+    rows = []
+    for file_pk in range(1, 31):
+        scale = rng.uniform(1, 50)
+        for ii in range(rng.randint(20, 80)):
+            flux = None if rng.uniform() < 0.05 else round(rng.exponential(scale), 1)
+            binid = -1 if rng.uniform() < 0.2 else ii
+            rows.append({'pk': len(rows) + 1, 'file_pk': file_pk, 'binid': binid,
+                         'emline_gflux_ha_6564': flux})
+
+    # a file without good spaxels
+    rows.append({'pk': len(rows) + 1, 'file_pk': 31, 'binid': -1, 'emline_gflux_ha_6564': 30.})
+    session.bulk_insert_mappings(SpaxelProp, rows)
+    session.commit()
+
+    yield session
+    session.close()
+
+
+@pytest.fixture()
+def stats(tmpdir, session):
+    stats = SpaxelStats(str(tmpdir.join('stats.sqlite')))
+    stats.build(session, SpaxelProp, ['emline_gflux_ha_6564'], bins=8, stride=3)
+    return stats
+
+
+def select_files(session, op, value, percent_op, percent):
+    """Evaluates npergood as the grouped subqueries of Query._get_percent."""
+
+    goodcount = {}
+    for row in session.query(SpaxelProp).filter(SpaxelProp.binid != -1):
+        goodcount[row.file_pk] = goodcount.get(row.file_pk, 0) + 1
+
+    count = {}
+    for row in session.query(SpaxelProp).filter(op(SpaxelProp.emline_gflux_ha_6564, value)):
+        count[row.file_pk] = count.get(row.file_pk, 0) + 1
+
+    return sorted(file_pk for file_pk in count
+                  if file_pk in goodcount and percent_op(count[file_pk],
+                                                         percent * goodcount[file_pk]))
+
+
+class TestSpaxelStats(object):
+
+    @pytest.mark.parametrize('op', [gt, ge, lt, le, eq, ne])
+    @pytest.mark.parametrize('value', [0., 10.5, 25., 1000.])
+    def test_bounds(self, stats, session, op, value):
+        __, files, __, edges, cumulative = stats._load('spaxelprop', 'emline_gflux_ha_6564')
+        lower, upper = _count_bounds(cumulative, edges, op, value)
+
+        for file_pk, low, up in zip(files, lower, upper):
+            count = session.query(SpaxelProp).filter(
+                SpaxelProp.file_pk == int(file_pk),
+                op(SpaxelProp.emline_gflux_ha_6564, value)).count()
+            assert low <= count <= up
+
+    def test_bounds_at_edge(self, stats):
+        __, __, __, edges, cumulative = stats._load('spaxelprop', 'emline_gflux_ha_6564')
+        lower, upper = _count_bounds(cumulative, edges, ge, edges[3])
+        assert (lower == upper).all()
+        assert (lower == cumulative[:, 4]).all()
+
+    @pytest.mark.parametrize('op, value', [(gt, 25.), (ge, 10.5), (lt, 5.), (le, 60.),
+                                           (eq, 0.), (ne, 12.)])
+    @pytest.mark.parametrize('percent_op', [gt, ge, lt, le, eq, ne])
+    @pytest.mark.parametrize('percent', [0.2, 0.5, 1.])
+    def test_select_files(self, stats, session, op, value, percent_op, percent):
+        files = stats.select_files(session, SpaxelProp, SpaxelProp.emline_gflux_ha_6564, op,
+                                   value, percent_op, percent)
+        assert files == select_files(session, op, value, percent_op, percent)
+        assert 31 not in files
+
+    def test_decides_files(self, stats, session, monkeypatch):
+        queries = []
+        monkeypatch.setattr(session, 'query', lambda *args: queries.append(args) or
+                            session.__class__.query(session, *args))
+
+        files = stats.select_files(session, SpaxelProp, SpaxelProp.emline_gflux_ha_6564, gt,
+                                   1e6, gt, 0.2)
+        assert files == []
+        assert len(queries) == 1
+
+    def test_missing(self, stats, session):
+        column = SpaxelProp.binid
+        assert stats.select_files(session, SpaxelProp, column, gt, 0, gt, 0.2) is None
+
+    def test_out_of_date(self, stats, session):
+        session.add(SpaxelProp(pk=100000, file_pk=32, binid=0, emline_gflux_ha_6564=100.))
+        session.commit()
+        assert stats.select_files(session, SpaxelProp, SpaxelProp.emline_gflux_ha_6564, gt,
+                                  25., gt, 0.2) is None
+
+        stats.build(session, SpaxelProp, ['emline_gflux_ha_6564'], bins=8, stride=3)
+        assert 32 in stats.select_files(session, SpaxelProp, SpaxelProp.emline_gflux_ha_6564,
+                                        gt, 25., gt, 0.2)
+
+    def test_get_spaxel_stats(self, stats, tmpdir, monkeypatch):
+        monkeypatch.setitem(config._custom_config, 'spaxel_stats', stats.path)
+        assert get_spaxel_stats().path == stats.path
+        assert get_spaxel_stats() is get_spaxel_stats()
+
+        assert get_spaxel_stats(str(tmpdir.join('missing.sqlite'))) is None
+        monkeypatch.setitem(config._custom_config, 'spaxel_stats', None)
+        assert get_spaxel_stats() is None
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: conftest.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from marvin.tools.cube import Cube
+
+
+@pytest.fixture()
+def synthetic_cube(tmp_path):
+    """A small DRP-like cube with a Gaussian emission line on a flat continuum."""
+
+    nwave, ny, nx = 200, 5, 4
+    wave = np.linspace(6500., 6700., nwave)
+
+    line = 10 * np.exp(-0.5 * ((wave - 6600.) / 5.)**2)
+    flux = np.tile((1 + line)[:, None, None], (1, ny, nx)).astype(np.float32)
+    ivar = np.full(flux.shape, 4, dtype=np.float32)
+    mask = np.zeros(flux.shape, dtype=np.int32)
+
+    # A spaxel fully flagged as DONOTUSE.
+    mask[:, 4, 3] = 1024
+
+    header = fits.Header()
+    header['PLATEIFU'] = '8485-1901'
+    header['MANGAID'] = '1-209232'
+    header['VERSDRP3'] = 'v3_1_1'
+    header['OBJRA'] = 232.544703894
+    header['OBJDEC'] = 48.6902009334
+    header['SRVYMODE'] = 'MaNGA dither'
+    for key, value in [('CTYPE1', 'RA---TAN'), ('CTYPE2', 'DEC--TAN'),
+                       ('CRPIX1', 2), ('CRPIX2', 3), ('CRVAL1', 232.5447),
+                       ('CRVAL2', 48.6902), ('CD1_1', -0.000138889), ('CD2_2', 0.000138889)]:
+        header[key] = value
+
+    filename = str(tmp_path / 'manga-8485-1901-LOGCUBE.fits.gz')
+    fits.HDUList([fits.PrimaryHDU(header=header),
+                  fits.ImageHDU(flux, header=header, name='FLUX'),
+                  fits.ImageHDU(ivar, header=header, name='IVAR'),
+                  fits.ImageHDU(mask, header=header, name='MASK'),
+                  fits.ImageHDU(wave, name='WAVE')]).writeto(filename)
+
+    cube = Cube(filename=filename, release='DR17')
+    yield cube
+    cube.data.close()
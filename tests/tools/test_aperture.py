@@ -126,3 +126,73 @@ def test_get_spaxels_custom_mask():
     my_mask[0:5, 0:5] = 1
 
     assert len(aperture.getSpaxels(mask=my_mask)) == 34
+
+
+def test_weights(synthetic_cube):
+    """Tests that the sparse weights match the per-aperture masks."""
+
+    cube = synthetic_cube
+
+    aperture = cube.getAperture([(1, 1), (2.5, 3), (-1, 3), (20, 20)], (2, 3, 0.3),
+                                aperture_type='rectangular')
+    weights = aperture.weights
+
+    assert weights.shape == (4, cube._shape[0] * cube._shape[1])
+    assert weights[3].nnz == 0
+
+    for ii, ap_mask in enumerate(aperture.to_mask(method='exact')):
+        image = ap_mask.to_image(shape=cube._shape)
+        if image is None:
+            image = numpy.zeros(cube._shape)
+        numpy.testing.assert_allclose(weights[ii].toarray().reshape(cube._shape), image)
+
+    numpy.testing.assert_allclose(aperture.mask, weights.toarray().sum(axis=0).reshape(5, 4))
+
+
+class TestIntegrate(object):
+
+    @pytest.mark.parametrize('method', ['sum', 'mean'])
+    def test_cube(self, synthetic_cube, method):
+        aperture = synthetic_cube.getAperture([(1, 1), (2, 2.5)], 1)
+        weights = aperture.weights.toarray()
+
+        spectra = aperture.integrate(method=method)
+
+        flux = synthetic_cube.data['FLUX'].data[:, 0, 0]
+        norm = weights.sum(axis=1)[:, None] if method == 'sum' else numpy.ones((2, 1))
+
+        assert spectra.shape == (2, 200)
+        assert spectra.value == pytest.approx(flux * norm, rel=1e-5)
+        assert spectra.mask.sum() == 0
+
+        var = (weights**2).sum(axis=1) / 4.
+        if method == 'mean':
+            var /= weights.sum(axis=1)**2
+        assert spectra.ivar[:, 0] == pytest.approx(1. / var)
+
+    def test_cube_masked(self, synthetic_cube):
+        aperture = synthetic_cube.getAperture((3, 4), 0.3)
+
+        spectra = aperture.integrate()
+
+        assert (spectra.value == 0).all()
+        assert (spectra.ivar == 0).all()
+        assert (spectra.pixmask.get_mask('DONOTUSE') > 0).all()
+
+    def test_bad_tool(self, synthetic_cube):
+        aperture = synthetic_cube.getAperture((1, 1), 1)
+
+        with pytest.raises(AssertionError) as ee:
+            aperture.integrate(tool=numpy.zeros(3))
+        assert 'tool must be a Cube or a Maps' in str(ee.value)
+
+    def test_maps(self):
+        maps = marvin.tools.Maps('8485-1901')
+        aperture = maps.getAperture([(17, 17), (20, 15)], 0.3)
+
+        integrated = aperture.integrate(properties=['stellar_vel', 'emline_gflux_ha_6564'],
+                                        method='mean')
+
+        assert list(integrated.keys()) == ['stellar_vel', 'emline_gflux_ha_6564']
+        assert integrated['stellar_vel'].value == pytest.approx(
+            maps.stellar_vel.value[[17, 15], [17, 20]])
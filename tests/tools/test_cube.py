@@ -14,6 +14,7 @@ import re
 
 import numpy as np
 import pytest
+from astropy import units as u
 from astropy import wcs
 
 import marvin
@@ -21,6 +22,7 @@ from marvin import config, marvindb
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
 from tests import marvin_test_if
 from marvin.tools.cube import Cube
+from marvin.tools.spaxel import Spaxel, SpaxelCollection
 
 
 @pytest.fixture(autouse=True)
@@ -220,6 +222,82 @@ class TestCube(object):
         assert set(bintypes) == set(expbins)
 
 
+class TestGetSpectra(object):
+
+    def test_get_spectra(self, cube):
+        xx = [10, 11, 12]
+        yy = [5, 5, 6]
+        spectra = cube.get_spectra(x=xx, y=yy, xyorig='lower')
+
+        assert spectra.shape == (3, len(cube._wavelength))
+        assert spectra.ivar.shape == spectra.shape
+        assert spectra.mask.shape == spectra.shape
+        assert spectra.unit == cube.flux.unit
+
+        for nn, (x, y) in enumerate(zip(xx, yy)):
+            spaxel = cube.getSpaxel(x=x, y=y, xyorig='lower')
+            np.testing.assert_allclose(spectra[nn].value, spaxel.flux.value)
+            np.testing.assert_allclose(spectra.ivar[nn], spaxel.flux.ivar)
+            np.testing.assert_array_equal(spectra.mask[nn], spaxel.flux.mask)
+
+    def test_get_spectra_out_of_limits(self, cube):
+        with pytest.raises(MarvinError) as ee:
+            cube.get_spectra(x=[0, 100], y=[0, 0], xyorig='lower')
+        assert 'some indices are out of limits' in str(ee.value)
+
+
+class TestCollapse(object):
+
+    @pytest.mark.parametrize('chunk_size', [None, 7])
+    def test_sum(self, synthetic_cube, chunk_size):
+        collapsed = synthetic_cube.collapse((6550, 6650), method='sum', chunk_size=chunk_size)
+        flux = synthetic_cube.data['FLUX'].data
+        wave = synthetic_cube.data['WAVE'].data
+        in_range = (wave >= 6550) & (wave <= 6650)
+
+        assert collapsed.shape == (5, 4)
+        assert collapsed.unit == synthetic_cube.datamodel.datacubes.flux.unit
+        assert collapsed.value[0, 0] == pytest.approx(flux[in_range, 0, 0].sum())
+        assert collapsed.ivar[0, 0] == pytest.approx(4. / in_range.sum())
+
+    def test_mean(self, synthetic_cube):
+        collapsed = synthetic_cube.collapse((6500, 6540), method='mean')
+        assert collapsed.value[2, 2] == pytest.approx(1., rel=1e-3)
+
+    def test_mask(self, synthetic_cube):
+        collapsed = synthetic_cube.collapse(method='sum')
+        assert collapsed.value[4, 3] == 0
+        assert collapsed.ivar[4, 3] == 0
+        assert collapsed.pixmask.get_mask('DONOTUSE')[4, 3] > 0
+        assert collapsed.mask[0, 0] == 0
+
+    def test_integrate_continuum(self, synthetic_cube):
+        collapsed = synthetic_cube.collapse((6560, 6640), method='integrate',
+                                            continuum=[(6500, 6530), (6670, 6700)])
+        assert collapsed.unit == synthetic_cube.datamodel.datacubes.flux.unit * u.Angstrom
+        assert collapsed.value[1, 1] == pytest.approx(10 * 5 * np.sqrt(2 * np.pi), rel=1e-2)
+
+    def test_bad_wave_range(self, synthetic_cube):
+        with pytest.raises(MarvinError) as ee:
+            synthetic_cube.collapse((7000, 7100))
+        assert 'no wavelength pixels' in str(ee.value)
+
+    def test_moment_maps(self, synthetic_cube):
+        kwargs = dict(wave_range=(6560, 6640), continuum=[(6500, 6530), (6670, 6700)])
+
+        moment0 = synthetic_cube.moment_map(order=0, **kwargs)
+        moment1 = synthetic_cube.moment_map(order=1, **kwargs)
+        moment2 = synthetic_cube.moment_map(order=2, **kwargs)
+
+        assert moment0.value[0, 0] == pytest.approx(10 * 5 * np.sqrt(2 * np.pi), rel=1e-2)
+        assert moment1.unit == u.Angstrom
+        assert moment1.value[0, 0] == pytest.approx(6600., abs=0.01)
+        assert moment1.ivar[0, 0] > 0
+        assert moment2.value[0, 0] == pytest.approx(5., rel=1e-2)
+        assert moment2.ivar is None
+        assert moment1.value[4, 3] == 0
+
+
 class TestWCS(object):
 
     def test_wcs(self, cube):
@@ -313,3 +391,54 @@ class TestMaskbit(object):
                               'target_flags'])
     def test_flag(self, flag, cube):
         assert getattr(cube, flag, None) is not None
+
+
+class TestSpaxelCollection(object):
+
+    def test_collection(self, synthetic_cube):
+        spaxels = synthetic_cube.getSpaxel(x=[0, 1, 3], y=[0, 2, 4], xyorig='lower', lazy=True)
+
+        assert isinstance(spaxels, SpaxelCollection)
+        assert len(spaxels) == 3
+        assert spaxels.flux.shape == (3, 200)
+        np.testing.assert_array_equal(spaxels.flux.value[1],
+                                      synthetic_cube.data['FLUX'].data[:, 2, 1])
+
+        spaxel = spaxels[1]
+        assert isinstance(spaxel, Spaxel)
+        assert (spaxel.x, spaxel.y) == (1, 2)
+        assert spaxel.loaded is False
+        assert spaxels[1] is spaxel
+
+    def test_subset(self, synthetic_cube):
+        spaxels = synthetic_cube.getSpaxel(x=[0, 1, 3], y=[0, 2, 4], xyorig='lower')
+        flux = spaxels.flux
+
+        subset = spaxels[[True, False, True]]
+
+        assert isinstance(subset, SpaxelCollection)
+        assert list(subset.x) == [0, 3]
+        np.testing.assert_array_equal(subset.flux.value, flux.value[[0, 2]])
+
+    @pytest.mark.parametrize('method', ['sum', 'mean'])
+    def test_stack(self, synthetic_cube, method):
+        spaxels = synthetic_cube.getSpaxel(x=[0, 1, 3], y=[0, 2, 4], xyorig='lower')
+
+        stacked = spaxels.stack(method=method)
+
+        # The last spaxel is fully masked and is not used.
+        expected = spaxels.flux.value[:2].sum(axis=0)
+        if method == 'mean':
+            expected /= 2
+
+        assert stacked.shape == (200,)
+        assert stacked.value == pytest.approx(expected)
+        assert stacked.ivar[0] == pytest.approx(2. if method == 'sum' else 8.)
+        assert (stacked.mask == 0).all()
+
+    def test_no_maps(self, synthetic_cube):
+        spaxels = synthetic_cube.getSpaxel(x=[0, 1], y=[0, 0], xyorig='lower')
+
+        with pytest.raises(MarvinError) as ee:
+            spaxels.maps['stellar_vel']
+        assert 'created without maps' in str(ee.value)
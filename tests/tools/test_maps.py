@@ -25,7 +25,9 @@ import marvin
 import marvin.tools.spaxel
 from marvin.core.exceptions import MarvinError
 from tests import marvin_test_if
-from marvin.tools.maps import Maps
+from marvin.tools.maps import Maps, _stack_properties
+from marvin.utils.dap.export import _iter_columns
+from marvin.utils.datamodel.dap import datamodel
 from marvin.utils.datamodel.dap.base import Property
 
 
@@ -192,6 +194,15 @@ class TestMaps(object):
                 else:
                     assert value == value2, attr
 
+    def test_get_binid_cached(self, maps):
+        binid = maps.get_binid()
+        assert maps.get_binid() is binid
+        assert not binid.flags.writeable
+
+        ha = maps.emline_gflux_ha_6564
+        hb = maps.emline_gflux_hb_4862
+        assert np.shares_memory(ha.binid, hb.binid)
+
     def test_getMapRatio(self, maps):
         #maps = Maps(galaxy.plateifu)
         map_ratio = maps.getMapRatio('emline_gflux', 'nii_6585', 'ha_6564')
@@ -230,3 +241,168 @@ class TestMaskbit(object):
     def test_flag(self, flag, maps_release_only):
         ha = maps_release_only['emline_gflux_ha_6564']
         assert getattr(ha, flag, None) is not None
+
+
+def _fake_maps_hdulist(properties, shape=(4, 5)):
+    """Returns an HDUList with random extensions for all ``properties``."""
+
+    rng = np.random.default_rng(0)
+
+    channels = {}
+    for prop in properties:
+        channels[prop.name] = max(channels.get(prop.name, 0),
+                                  prop.channel.idx + 1 if prop.channel else 0)
+
+    hdus = [astropy.io.fits.PrimaryHDU()]
+    for prop in properties:
+        if prop.name not in channels:
+            continue
+        nchannels = channels.pop(prop.name)
+        ext_shape = ((nchannels,) if nchannels > 0 else ()) + shape
+        hdus.append(astropy.io.fits.ImageHDU(rng.random(ext_shape).astype('>f4'),
+                                             name=prop.name))
+        if prop.has_ivar():
+            hdus.append(astropy.io.fits.ImageHDU(rng.random(ext_shape).astype('>f4'),
+                                                 name=prop.name + '_ivar'))
+        if prop.has_mask():
+            hdus.append(astropy.io.fits.ImageHDU(rng.integers(0, 8, ext_shape).astype('>i4'),
+                                                 name=prop.name + '_mask'))
+
+    return astropy.io.fits.HDUList(hdus)
+
+
+class TestPropertyBlock(object):
+
+    def test_stack_properties(self):
+        properties = datamodel['DR17'].properties
+        hdulist = _fake_maps_hdulist(properties)
+
+        block = _stack_properties(hdulist, properties)
+
+        assert block['names'] == [prop.full() for prop in properties]
+        assert block['value'].shape == (len(properties), 4, 5)
+
+        for ii, prop in enumerate(properties):
+            data = hdulist[prop.name].data
+            layer = data[prop.channel.idx] if prop.channel else data
+            assert block['value'][ii] == pytest.approx(layer)
+            assert block['dtypes']['value'][ii] == np.float32
+
+            if prop.has_mask():
+                mask = hdulist[prop.name + '_mask'].data
+                layer = mask[prop.channel.idx] if prop.channel else mask
+                assert (block['mask'][ii] == layer).all()
+            else:
+                assert block['dtypes']['mask'][ii] is None
+                assert (block['mask'][ii] == 0).all()
+
+    def test_spaxel_quantities(self, maps, monkeypatch):
+        if maps.data_origin != 'file':
+            pytest.skip('property blocks are only available for files.')
+
+        expected = maps._get_spaxel_quantities(10, 12)
+
+        monkeypatch.setattr(marvin.config, '_custom_config', {'maps_property_block': True})
+        quantities = maps._get_spaxel_quantities(10, 12)
+
+        assert list(quantities.keys()) == list(expected.keys())
+        for key in expected:
+            for attr in ['value', 'ivar', 'mask']:
+                np.testing.assert_array_equal(getattr(quantities[key], attr),
+                                              getattr(expected[key], attr))
+
+    def test_to_dataframe(self, maps):
+        if maps.data_origin != 'file':
+            pytest.skip('property blocks are only available for files.')
+
+        columns = ['stellar_vel', 'emline_gflux_ha_6564']
+        df = maps.to_dataframe(columns=columns)
+        assert df['stellar_vel'].values == pytest.approx(maps.stellar_vel.value.flatten(),
+                                                         nan_ok=True)
+
+        # the block is not built for a few columns, but used when available
+        assert maps._property_block is None
+        maps.get_property_block()
+        assert maps.to_dataframe(columns=columns).equals(df)
+
+    def test_to_dataframe_columns(self):
+        properties = datamodel['DR17'].properties
+
+        maps = Maps.__new__(Maps)
+        maps.data = _fake_maps_hdulist(properties)
+        maps.datamodel = properties
+        maps.data_origin = 'file'
+        maps._property_block = None
+
+        columns = ['stellar_vel', 'emline_gflux_ha_6564']
+        df = maps.to_dataframe(columns=columns)
+        assert maps._property_block is None
+        assert df['emline_gflux_ha_6564'].values == \
+            pytest.approx(maps.data['emline_gflux'].data[
+                properties['emline_gflux_ha_6564'].channel.idx].flatten())
+
+        maps._property_block = _stack_properties(maps.data, properties)
+        assert maps.to_dataframe(columns=columns).equals(df)
+
+    def test_not_file(self, maps):
+        if maps.data_origin == 'file':
+            pytest.skip('property blocks are available for files.')
+
+        with pytest.raises(MarvinError, match='only available for Maps loaded from a file'):
+            maps.get_property_block()
+
+
+class TestExport(object):
+
+    @pytest.mark.parametrize('chunk_size', [None, 7])
+    def test_iter_columns(self, tmp_path, chunk_size):
+        properties = datamodel['DR17'].properties
+        filename = str(tmp_path / 'maps.fits')
+        _fake_maps_hdulist(properties).writeto(filename)
+
+        mask = np.zeros((4, 5), dtype=bool)
+        mask[1:3, 2:] = True
+
+        with astropy.io.fits.open(filename) as hdulist:
+            chunks = list(_iter_columns(hdulist, properties, (4, 5), plateifu='1-1',
+                                        mask=mask, include_ivar=True, chunk_size=chunk_size))
+            assert len(chunks) == (1 if chunk_size is None else 4)
+
+            columns = {name: np.concatenate([chunk[name] for chunk in chunks])
+                       for name in chunks[0]}
+
+            assert (columns['plateifu'] == '1-1').all()
+            assert columns['spaxelid'].tolist() == [7, 8, 9, 12, 13, 14]
+            assert columns['x'].tolist() == [2, 3, 4, 2, 3, 4]
+
+            ha = properties['emline_gflux_ha_6564']
+            expected = hdulist[ha.name].data[ha.channel.idx][mask]
+            assert columns['emline_gflux_ha_6564'].dtype == np.dtype('float32')
+            assert (columns['emline_gflux_ha_6564'] == expected).all()
+            assert 'emline_gflux_ha_6564_ivar' in columns
+            assert 'emline_gflux_ha_6564_mask' not in columns
+
+    def test_to_arrow(self, maps):
+        pytest.importorskip('pyarrow')
+        if maps.data_origin != 'file':
+            pytest.skip('columnar export is only available for files.')
+
+        table = maps.to_arrow(columns=['stellar_vel'], include_mask=True)
+        assert table.column_names == ['plateifu', 'spaxelid', 'x', 'y',
+                                      'stellar_vel', 'stellar_vel_mask']
+        assert table.column('stellar_vel').to_numpy() == pytest.approx(
+            maps.stellar_vel.value.ravel(), nan_ok=True)
+
+    def test_to_parquet(self, maps, tmp_path):
+        pytest.importorskip('pyarrow')
+        if maps.data_origin != 'file':
+            pytest.skip('columnar export is only available for files.')
+
+        from marvin.utils.dap.export import write_maps_parquet
+        import pyarrow.parquet
+
+        path = str(tmp_path / 'maps.parquet')
+        n_rows = write_maps_parquet([maps, maps], path, columns=['stellar_vel'])
+
+        assert n_rows == 2 * maps.stellar_vel.value.size
+        assert pyarrow.parquet.read_table(path).num_rows == n_rows
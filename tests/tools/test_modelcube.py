@@ -14,6 +14,7 @@ from __future__ import absolute_import, division, print_function
 
 import os
 
+import numpy as np
 import pytest
 import six
 import astropy.units as u
@@ -24,6 +25,8 @@ from marvin.core.exceptions import MarvinError
 from marvin.tools.cube import Cube
 from marvin.tools.maps import Maps
 from marvin.tools.modelcube import ModelCube
+from marvin.tools.quantities import BinnedDataCube, DataCube, Map
+from marvin.utils.datamodel.dap import datamodel as dap_datamodel
 
 from .. import marvin_test_if
 
@@ -106,6 +109,51 @@ class TestModelCube(object):
         model_cube = ModelCube(filename=galaxy.modelpath)
         assert isinstance(model_cube.getCube(), Cube)
 
+    def test_get_binid_cached(self, galaxy):
+        model_cube = ModelCube(filename=galaxy.modelpath)
+        binid = model_cube.get_binid()
+        assert model_cube.get_binid() is binid
+        assert not binid.flags.writeable
+
+    def test_compact(self, galaxy):
+        model_cube = ModelCube(filename=galaxy.modelpath, compact=True)
+        full_cube = ModelCube(filename=galaxy.modelpath)
+
+        if not model_cube.is_binned():
+            pytest.skip('compact mode only applies to binned modelcubes')
+
+        binned_flux = model_cube.binned_flux
+        assert binned_flux.nbins == len(np.unique(model_cube.get_binid().value))
+        assert model_cube.binned_flux is binned_flux
+
+        expected = full_cube.binned_flux[:, 10:20, 15]
+        np.testing.assert_array_equal(binned_flux[:, 10:20, 15].value, expected.value)
+        np.testing.assert_array_equal(binned_flux[:, 10:20, 15].mask, expected.mask)
+
+    @pytest.mark.parametrize('varies', [False, True])
+    def test_compact_full_fit(self, varies):
+        binid = np.array([[0, 0, 1], [0, 1, 1], [-1, 2, 2]])
+        full_fit = np.arange(4 * 10, dtype=np.float32).reshape(4, 10)[binid + 1].transpose(2, 0, 1)
+        if varies:
+            # e.g., emission lines fitted to each spaxel of a hybrid bin
+            full_fit[3:6, 1, 0] += 1
+
+        model_cube = ModelCube.__new__(ModelCube)
+        model_cube.data_origin = model_cube.data = None
+        model_cube.compact = True
+        model_cube.is_binned = lambda: True
+        model_cube.get_binid = lambda model=None: Map(binid, unit=u.dimensionless_unscaled)
+        model_cube._binned_datacubes = {}
+        model_cube._wavelength = np.arange(3600, 3610, dtype=float)
+        model_cube._redcorr = None
+
+        model = dap_datamodel['DR17'].models['full_fit']
+        fit = model_cube._get_datacube('full_fit', model, full_fit)
+
+        assert isinstance(fit, DataCube if varies else BinnedDataCube)
+        np.testing.assert_array_equal(fit[:, 1, 0].value, full_fit[:, 1, 0])
+        np.testing.assert_array_equal(fit[:, :, :].value, full_fit)
+
     def test_get_cube_units(self, galaxy):
         model_cube = ModelCube(filename=galaxy.modelpath)
         unit = '1E-17 erg/s/cm^2/ang/spaxel'
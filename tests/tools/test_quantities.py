@@ -14,9 +14,10 @@ import matplotlib
 import numpy
 import pytest
 from astropy import units as u
+from astropy.io import fits
 
 from tests import marvin_test_if
-from marvin.tools.quantities import DataCube, Spectrum
+from marvin.tools.quantities import BinnedDataCube, DataCube, LazyDataCube, Spectrum
 
 
 spaxel_unit = u.Unit('spaxel', represents=u.pixel, doc='A spectral pixel', parse_strict='silent')
@@ -163,6 +164,22 @@ class TestDataCube(object):
         numpy.testing.assert_almost_equal(new_spectrum.mask, datacube.mask[:, 5, 5])
         assert new_spectrum.pixmask_flag == datacube.pixmask_flag
 
+    def test_slice_stacked_spectra(self):
+
+        flux = numpy.tile(numpy.arange(1, 1001, dtype=numpy.float32), (5, 1))
+        spectra = Spectrum(flux, wavelength=numpy.arange(1000), ivar=flux * 2,
+                           mask=numpy.zeros(flux.shape, dtype=int))
+
+        row = spectra[2]
+        assert row.shape == (1000,)
+        assert row.wavelength.shape == (1000,)
+        numpy.testing.assert_almost_equal(row.ivar, flux[2] * 2)
+
+        window = spectra[1:3, 10:100]
+        assert window.shape == (2, 90)
+        numpy.testing.assert_almost_equal(window.wavelength.value, numpy.arange(10, 100))
+        numpy.testing.assert_almost_equal(window.ivar, flux[1:3, 10:100] * 2)
+
     @marvin_test_if(mark='include', cube={'plateifu': '8485-1901',
                                           'data_origin': 'file',
                                           'initial_mode': 'local'})
@@ -203,6 +220,189 @@ class TestDataCube(object):
                 assert modelcube_quantity.pixmask_flag == 'MANGA_DAPSPECMASK'
 
 
+@pytest.fixture(scope='function')
+def lazy_datacube(tmp_path):
+    """Produces a `LazyDataCube` and the equivalent `DataCube` from a FITS file."""
+
+    flux = numpy.arange(50 * 6 * 5, dtype=numpy.float32).reshape(50, 6, 5)
+    ivar = flux * 2
+    mask = numpy.zeros(flux.shape, dtype=numpy.int32)
+    mask[10:20, 2, 3] = 2**10
+    wave = numpy.arange(3600, 3650, dtype=float)
+
+    filename = str(tmp_path / 'cube.fits')
+    fits.HDUList([fits.PrimaryHDU(),
+                  fits.ImageHDU(flux, name='FLUX'),
+                  fits.ImageHDU(ivar, name='IVAR'),
+                  fits.ImageHDU(mask, name='MASK')]).writeto(filename)
+
+    with fits.open(filename, memmap=True) as hdulist:
+        lazy = LazyDataCube(hdulist['FLUX'], wave, ivar_hdu=hdulist['IVAR'],
+                            mask_hdu=hdulist['MASK'], unit=u.erg,
+                            pixmask_flag='MANGA_DRP3PIXMASK')
+        yield lazy, DataCube(flux, wave, ivar=ivar, mask=mask, unit=u.erg,
+                             pixmask_flag='MANGA_DRP3PIXMASK')
+
+
+class TestLazyDataCube(object):
+
+    def test_shape(self, lazy_datacube):
+        lazy, __ = lazy_datacube
+        assert lazy.shape == (50, 6, 5)
+        assert len(lazy) == 50
+        assert lazy.unit == u.erg
+
+    @pytest.mark.parametrize('sl', [(slice(10, 20), slice(1, 3), slice(2, 4)),
+                                    (slice(None, None, 5),),
+                                    slice(-5, None),
+                                    (15,),
+                                    (slice(5, 25), 2, 3),
+                                    (slice(None), -1, 0),
+                                    (Ellipsis, 2)])
+    def test_getitem(self, lazy_datacube, sl):
+        lazy, datacube = lazy_datacube
+
+        expected = datacube[sl]
+        sliced = lazy[sl]
+
+        assert type(sliced) is type(expected)
+        assert sliced.unit == expected.unit
+        numpy.testing.assert_array_equal(sliced.value, expected.value)
+        numpy.testing.assert_array_equal(sliced.ivar, expected.ivar)
+        numpy.testing.assert_array_equal(sliced.mask, expected.mask)
+        numpy.testing.assert_array_equal(sliced.wavelength, expected.wavelength)
+
+    def test_load(self, lazy_datacube):
+        lazy, datacube = lazy_datacube
+
+        loaded = lazy.load()
+        assert isinstance(loaded, DataCube)
+        numpy.testing.assert_array_equal(loaded.value, datacube.value)
+
+    def test_full_arrays(self, lazy_datacube):
+        lazy, datacube = lazy_datacube
+
+        numpy.testing.assert_array_equal(lazy.value, datacube.value)
+        numpy.testing.assert_array_equal(lazy.ivar, datacube.ivar)
+        numpy.testing.assert_array_equal(lazy.mask, datacube.mask)
+        numpy.testing.assert_array_equal(lazy.error.value, datacube.error.value)
+        assert lazy.pixmask_flag == 'MANGA_DRP3PIXMASK'
+
+        with pytest.raises(AttributeError):
+            lazy.not_an_attribute
+
+    def test_arithmetic(self, lazy_datacube):
+        lazy, datacube = lazy_datacube
+
+        for result, expected in [(lazy * 2, datacube * 2),
+                                 (1 * u.erg - lazy, 1 * u.erg - datacube),
+                                 (lazy + datacube, datacube + datacube),
+                                 (datacube / lazy, datacube / datacube),
+                                 (-lazy, -datacube),
+                                 (numpy.sqrt(lazy), numpy.sqrt(datacube))]:
+            assert isinstance(result, u.Quantity)
+            assert result.unit == expected.unit
+            numpy.testing.assert_array_equal(result.value, expected.value)
+
+        numpy.testing.assert_array_equal(lazy > 2 * u.erg, datacube > 2 * u.erg)
+        numpy.testing.assert_array_equal(numpy.asarray(lazy), numpy.asarray(datacube))
+        assert numpy.sum(lazy) == numpy.sum(datacube)
+        assert numpy.nanmax(lazy) == numpy.nanmax(datacube)
+
+    def test_out_of_bounds(self, lazy_datacube):
+        lazy, __ = lazy_datacube
+
+        with pytest.raises(IndexError):
+            lazy[:, 6, 0]
+
+
+@pytest.fixture(scope='function')
+def binned_datacube():
+    """Produces a `BinnedDataCube` and the equivalent `DataCube`."""
+
+    binid = numpy.array([[-1, -1, 0, 0, 1],
+                         [-1, 2, 2, 0, 1],
+                         [3, 3, 2, 1, 1],
+                         [3, 4, 4, 4, 1],
+                         [5, 5, 5, 4, -1],
+                         [6, 6, 6, 6, -1]])
+
+    spectra = numpy.arange(8 * 50, dtype=numpy.float32).reshape(8, 50)
+    spectra[0] = 0
+    mask = numpy.zeros(spectra.shape, dtype=numpy.int32)
+    mask[0] = 2**10
+    mask[3, 10:20] = 2**4
+
+    flux = spectra[binid + 1].transpose(2, 0, 1)
+    ivar = flux * 2
+    mask = mask[binid + 1].transpose(2, 0, 1)
+    wave = numpy.arange(3600, 3650, dtype=float)
+
+    binned = BinnedDataCube.from_datacube(flux, wave, binid, ivar=ivar, mask=mask,
+                                          chunk_size=16, unit=u.erg,
+                                          pixmask_flag='MANGA_DAPSPECMASK')
+    datacube = DataCube(flux, wave, ivar=ivar, mask=mask, binid=binid, unit=u.erg,
+                        pixmask_flag='MANGA_DAPSPECMASK')
+
+    yield binned, datacube
+
+
+class TestBinnedDataCube(object):
+
+    def test_bins(self, binned_datacube):
+        binned, __ = binned_datacube
+
+        assert binned.shape == (50, 6, 5)
+        assert binned.nbins == 8
+        numpy.testing.assert_array_equal(binned.bins, numpy.arange(-1, 7))
+        numpy.testing.assert_array_equal(binned.n_spaxels, [5, 3, 5, 3, 3, 4, 3, 4])
+
+        spectra = binned.spectra
+        assert isinstance(spectra, Spectrum)
+        assert spectra.shape == (8, 50)
+        assert spectra.value[binned.get_bin_index(3), 0] == 4 * 50
+
+    @pytest.mark.parametrize('sl', [(slice(10, 20), slice(1, 3), slice(2, 4)),
+                                    (slice(None, None, 5),),
+                                    (15,),
+                                    (slice(5, 25), 2, 3),
+                                    (slice(None), -1, 0)])
+    def test_getitem(self, binned_datacube, sl):
+        binned, datacube = binned_datacube
+
+        expected = datacube[sl]
+        sliced = binned[sl]
+
+        assert type(sliced) is type(expected)
+        numpy.testing.assert_array_equal(sliced.value, expected.value)
+        numpy.testing.assert_array_equal(sliced.ivar, expected.ivar)
+        numpy.testing.assert_array_equal(sliced.mask, expected.mask)
+
+    def test_load(self, binned_datacube):
+        binned, datacube = binned_datacube
+
+        loaded = binned.load()
+        assert isinstance(loaded, DataCube)
+        numpy.testing.assert_array_equal(loaded.value, datacube.value)
+        numpy.testing.assert_array_equal(loaded.binid, datacube.binid)
+
+    def test_missing_bin(self, binned_datacube):
+        binned, __ = binned_datacube
+
+        with pytest.raises(ValueError):
+            binned.get_bin_index(10)
+
+    def test_varying_bin(self, binned_datacube):
+        __, datacube = binned_datacube
+
+        flux = datacube.value.copy()
+        flux[20:30, 1, 2] += 1
+
+        with pytest.raises(ValueError, match='do not share the same value'):
+            BinnedDataCube.from_datacube(flux, datacube.wavelength, datacube.binid,
+                                         chunk_size=16)
+
+
 class TestSpectrum(object):
 
     def test_spectrum(self, spectrum):
@@ -12,8 +12,11 @@ from __future__ import absolute_import, division, print_function
 
 from imp import reload
 import pytest
+import sqlalchemy
+import sqlalchemy.orm
 
 import marvin
+import marvin.tools.query
 from marvin import config
 from marvin.core.exceptions import MarvinError
 from tests import marvin_test_if
@@ -21,7 +24,7 @@ from tests.conftest import set_the_config
 from marvin.tools.cube import Cube
 from marvin.tools.maps import Maps
 from marvin.tools.modelcube import ModelCube
-from marvin.tools.query import Query, doQuery
+from marvin.tools.query import Query, doQuery, _decode_cursor, _encode_cursor
 from marvin.tools.spaxel import Spaxel
 
 
@@ -138,6 +141,41 @@ class TestQuerySort(object):
         assert res.results['z'][0] == redshift
 
 
+class TestQueryCursor(object):
+
+    def test_encode_decode(self):
+        token = _encode_cursor('abc', (0.02, '1-209232', 12), 100, direction='previous')
+        assert _decode_cursor(token) == {'q': 'abc', 'k': [0.02, '1-209232', 12], 'i': 100,
+                                         'd': 'previous'}
+
+    @pytest.mark.parametrize('token', [None, '', 'not a cursor', 'eyJhIjogMX0='])
+    def test_decode_invalid(self, token):
+        assert _decode_cursor(token) is None
+
+    @pytest.mark.parametrize('order, direction, nulls',
+                             [('asc', 'next', True), ('asc', 'previous', False),
+                              ('desc', 'next', False), ('desc', 'previous', True)])
+    def test_seek_nulls(self, monkeypatch, order, direction, nulls):
+        # the sqlalchemy functions are only imported by the query module with a database
+        for name in ['desc', 'or_', 'tuple_']:
+            monkeypatch.setattr(marvin.tools.query, name, getattr(sqlalchemy, name),
+                                raising=False)
+
+        table = sqlalchemy.table('nsa', sqlalchemy.column('z'), sqlalchemy.column('pk'))
+        query = Query.__new__(Query)
+        query.release, query.search_filter, query.targets, query.quality = 'DR17', None, None, None
+        query.sort, query.order = 'nsa.z', order
+        query._keyset = [table.c.z, table.c.pk]
+
+        index = 10 if direction == 'next' else 20
+        token = _encode_cursor(query._get_fingerprint(), (0.02, 5), index, direction=direction)
+        sliced = sqlalchemy.orm.Query(table).limit(10).offset(10)
+        sql = str(query._page_query(sliced, 10, 20, cursor=token).statement)
+
+        assert query._page_seek == direction
+        assert ('nsa.z IS NULL' in sql) is nulls
+
+
 class TestQueryShow(object):
 
     @pytest.mark.parametrize('query, show, exp',
@@ -292,6 +330,44 @@ class TestQueryLocal(object):
         assert set(reals).issubset(set(query.params))
         assert set(reals).issubset(query.return_params)
 
+    @pytest.mark.parametrize('order', ['asc', 'desc'])
+    def test_cursor_pages(self, order):
+        query = Query(search_filter=self.sf, mode=self.mode, sort='z', order=order)
+        res = query.run(start=0, end=10)
+        offset = query.query.slice(10, 20).all()
+        assert res.cursors
+
+        res.getNext(chunk=10)
+        assert res.results.to_list() == [tuple(row) for row in offset]
+        assert query._page_seek == 'next'
+
+        res.getPrevious(chunk=10)
+        assert query._page_seek == 'previous'
+        assert res.start == 0
+
+    @pytest.mark.parametrize('start, end', [(None, None), (0, 10), (10, 20)])
+    def test_count_window(self, monkeypatch, start, end):
+        query = Query(search_filter=self.sf, mode=self.mode, sort='z', count_mode='window')
+        monkeypatch.setattr(query, '_check_history', lambda **kwargs: None)
+        res = query.run(start=start, end=end)
+        assert res.totalcount == query.query.count()
+        assert res.approximate_totalcount is False
+
+        expected = query.query.slice(start or 0, end or query.limit).all()
+        rows = res.results.to_list()
+        if start is not None:
+            # sliced pages, including from the first row, hold only their own rows
+            assert (res.start, res.end) == (start, end)
+            assert len(rows) == len(expected)
+        assert rows[:len(expected)] == [tuple(row) for row in expected]
+
+    def test_count_estimate(self, monkeypatch):
+        query = Query(search_filter=self.sf, mode=self.mode, count_mode='estimate')
+        monkeypatch.setattr(query, '_check_history', lambda **kwargs: None)
+        res = query.run()
+        assert res.totalcount > 0
+        assert res.approximate_totalcount is True
+
     @pytest.mark.parametrize('rps, errmsg',
                              [('hello', 'does not match any column.'),
                               ('name', 'name matches multiple parameters')],
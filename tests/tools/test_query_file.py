@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_query_file.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pytest
+from astropy.io import fits
+from dogpile.cache.region import make_region
+
+import marvin.tools.query
+import marvin.utils.general.general
+from marvin import config
+from marvin.core.exceptions import MarvinError
+from marvin.db.caching import get_generation, regions
+from marvin.tools.query import Query
+from marvin.tools.results import ColumnarResultSet, ResultSet
+
+
+@pytest.fixture()
+def summary_files(monkeypatch, tmpdir, drpall_table, dapall_table):
+    drpall = str(tmpdir.join('drpall.fits'))
+    dapall = str(tmpdir.join('dapall.fits'))
+
+    drpall_table.write(drpall, format='fits')
+    fits.HDUList([fits.PrimaryHDU()] + [fits.table_to_hdu(dapall_table[ii::4])
+                                        for ii in range(4)]).writeto(dapall)
+
+    monkeypatch.setattr(config, 'db', None)
+    monkeypatch.setitem(config._custom_config, 'sky_index_dir', str(tmpdir.join('skyindex')))
+    monkeypatch.setattr(marvin.tools.query, 'get_drpall_path', lambda drpver: drpall)
+    monkeypatch.setattr(marvin.tools.query, 'get_dapall_path', lambda drpver, dapver: dapall)
+    monkeypatch.setattr(marvin.utils.general.general, 'drpTable', {})
+    monkeypatch.setattr(marvin.utils.general.general, 'dapTable', {})
+
+
+@pytest.mark.usefixtures('summary_files')
+class TestQueryFile(object):
+
+    def test_run(self):
+        query = Query(search_filter='nsa.z < 0.05 and radial(232.6, 48.6, 1)',
+                      return_params=['logmass'], mode='local', release='DR17')
+        assert query.data_origin == 'file'
+
+        results = query.run()
+        assert results.totalcount == 2
+        assert results.getListOf('plateifu') == ['8485-1902', '8485-1901']
+        assert set(['cube.ra', 'cube.dec', 'nsa.elpetro_logmass']) <= set(results.columns.full)
+
+    def test_paging(self):
+        query = Query(sort='nsa.z', mode='local', release='DR17', limit=2, count_threshold=2)
+        with pytest.warns(UserWarning):
+            results = query.run()
+        assert results.getListOf('plateifu') == ['7443-1901', '8485-1902']
+
+        results.getNext()
+        assert results.getListOf('plateifu') == ['8000-3701', '8485-1901']
+
+        results.sort('plateifu', order='desc')
+        assert results.getListOf('plateifu') == ['8485-1902', '8485-1901']
+
+    def test_prefetch(self):
+        query = Query(sort='nsa.z', mode='local', release='DR17', limit=2, count_threshold=2)
+        with pytest.warns(UserWarning):
+            results = query.run()
+
+        results.prefetch(depth=2)
+        assert list(results._prefetched) == [(2, 4), (4, 5)]
+
+        results.getNext()
+        assert results.getListOf('plateifu') == ['8000-3701', '8485-1901']
+        assert list(results._prefetched) == [(4, 5)]
+
+        results.getSubset(0)
+        assert results.getListOf('plateifu') == ['7443-1901', '8485-1902']
+        results.loop()
+        assert results.count == 5
+
+        results.prefetch(depth=0)
+        assert results._prefetcher is None
+
+    def test_prefetch_sort(self, monkeypatch):
+        query = Query(sort='nsa.z', mode='local', release='DR17', limit=2, count_threshold=2)
+        with pytest.warns(UserWarning):
+            results = query.run()
+
+        pages = []
+        fetch_page = results._fetch_page
+
+        def record_page(start, end, *args, **kwargs):
+            pages.append((start, end, kwargs.get('sort'), kwargs.get('order')))
+            return fetch_page(start, end, *args, **kwargs)
+
+        monkeypatch.setattr(results, '_fetch_page', record_page)
+        results.prefetch(depth=1)
+        prefetched = results._prefetched[(2, 4)]
+
+        # the pages prefetched in the previous order are replaced
+        results.sort('plateifu', order='desc')
+        assert prefetched not in results._prefetched.values()
+        results._prefetched[(2, 4)].result()
+        assert pages[-1] == (2, 4, 'plateifu', 'desc')
+
+        results.sort('plateifu', order='desc')
+        assert len(pages) == 1 + (not prefetched.cancelled())
+
+    def test_prefetch_max_rows(self):
+        query = Query(sort='nsa.z', mode='local', release='DR17', limit=2, count_threshold=2)
+        with pytest.warns(UserWarning):
+            results = query.run()
+
+        results.prefetch(depth=2, max_rows=2)
+        assert list(results._prefetched) == [(2, 4)]
+
+    def test_prefetch_error(self):
+        query = Query(sort='nsa.z', mode='local', release='DR17', limit=2, count_threshold=2)
+        with pytest.warns(UserWarning):
+            results = query.run()
+
+        class BrokenQuery(object):
+            def slice(self, start, end):
+                raise MarvinError('cannot read the summary file')
+
+        results.query = BrokenQuery()
+        results.prefetch()
+        with pytest.raises(MarvinError, match='cannot read the summary file'):
+            results.getNext()
+
+    def test_quality(self):
+        query = Query(quality=['BADFLUX'], mode='local', release='DR17')
+        assert query.run().getListOf('plateifu') == ['8000-3701']
+
+    def test_spaxel_query(self):
+        with pytest.raises(MarvinError, match='cannot be queried from the summary files'):
+            Query(search_filter='emline_gflux_ha_6564 > 25', mode='local', release='DR17')
+
+
+@pytest.fixture()
+def results(request, monkeypatch, summary_files):
+    monkeypatch.setitem(config._custom_config, 'columnar_results', request.param)
+    query = Query(search_filter='nsa.z < 0.1', return_params=['cube.ra', 'nsa.elpetro_mass'],
+                  sort='nsa.z', mode='local', release='DR17')
+    return query.run()
+
+
+@pytest.mark.parametrize('results', [True], indirect=True)
+class TestColumnarResults(object):
+
+    def test_result_set(self, results):
+        assert isinstance(results.results, ColumnarResultSet)
+        assert isinstance(results.results, ResultSet)
+        assert len(results.results) == 4
+        assert results.results.data['plateifu'].dtype.kind == 'U'
+        assert results.results.data['z'].dtype == np.float64
+
+    def test_rows(self, results):
+        rows = results.results.to_list()
+        assert [row.plateifu for row in results.results] == ['7443-1901', '8485-1902',
+                                                             '8000-3701', '8485-1901']
+        assert results.results[1] == rows[1]
+        assert results.results[-1].plateifu == '8485-1901'
+        assert rows[0] in results.results
+        assert results.results == rows
+
+    def test_columns(self, results):
+        assert results.getListOf('plateifu')[0] == '7443-1901'
+        assert results.getListOf('z', to_ndarray=True).tolist() == [0.0206, 0.025, 0.035, 0.0407]
+        assert results.getDictOf('plateifu', format_type='dictlist') == \
+            {'plateifu': ['7443-1901', '8485-1902', '8000-3701', '8485-1901']}
+        assert results.getDictOf(format_type='listdict')[0]['plateifu'] == '7443-1901'
+
+    def test_slice_sort(self, results):
+        subset = results.results[1:3]
+        assert isinstance(subset, ColumnarResultSet)
+        assert subset['plateifu'] == ['8485-1902', '8000-3701']
+
+        results.results.sort('plateifu', reverse=True)
+        assert results.getListOf('plateifu') == ['8485-1902', '8485-1901', '8000-3701',
+                                                 '7443-1901']
+
+    def test_conversions(self, results):
+        table = results.toTable()
+        assert table.colnames == results.columns.full
+        assert table['nsa.z'].tolist() == [0.0206, 0.025, 0.035, 0.0407]
+
+        df = results.toDF()
+        assert list(df.columns) == results.columns.list_params('remote')
+        assert df['plateifu'].tolist() == results.getListOf('plateifu')
+
+    def test_add_sets(self, results):
+        first = results.results[0:2]
+        second = results.results[1:4]
+        second.index = 2
+        combined = first + second
+        assert isinstance(combined, ColumnarResultSet)
+        assert combined['plateifu'] == ['7443-1901', '8485-1902', '8000-3701', '8485-1901']
+
+
+@pytest.mark.parametrize('results', [False, True], indirect=True)
+def test_columnar_matches_rows(results):
+    assert results.toTable().as_array().tolist() == [tuple(row) for row in results.results]
+
+
+@pytest.fixture()
+def query_cache(monkeypatch, summary_files):
+    monkeypatch.setitem(config._custom_config, 'query_cache', True)
+    monkeypatch.setitem(regions, 'query', make_region().configure('dogpile.cache.memory'))
+
+
+@pytest.mark.usefixtures('query_cache')
+class TestQueryCache(object):
+
+    def get_page(self, query, start=0, end=2):
+        calls = []
+
+        def get_rows():
+            calls.append((start, end))
+            query._cursors = {'next': 'abc'}
+            return [('8485-1901',), ('8485-1902',)]
+
+        rows = query._get_cached_page(get_rows, start, end)
+        return rows, len(calls)
+
+    def test_hit_miss(self):
+        query = Query(search_filter='nsa.z < 0.1', mode='local', release='DR17')
+
+        assert self.get_page(query) == ([('8485-1901',), ('8485-1902',)], 1)
+        assert query._cache_hit is False
+
+        query._cursors = {}
+        assert self.get_page(query) == ([('8485-1901',), ('8485-1902',)], 0)
+        assert query._cache_hit is True
+        assert query._cursors == {'next': 'abc'}
+
+        assert self.get_page(query, start=2, end=4)[1] == 1
+
+    def test_key(self):
+        query = Query(search_filter='nsa.z < 0.1', mode='local', release='DR17')
+        other = Query(search_filter=' nsa.z  <  0.1', mode='local', release='DR17')
+        assert query._get_cache_key(0, 2) == other._get_cache_key(0, 2)
+        assert query._get_cache_key(0, 2) != query._get_cache_key(2, 4)
+
+        other.return_params = ['nsa.elpetro_mass']
+        assert query._get_cache_key(0, 2) != other._get_cache_key(0, 2)
+
+    def test_invalidate(self):
+        query = Query(search_filter='nsa.z < 0.1', mode='local', release='DR17')
+        self.get_page(query)
+
+        Query.invalidate_cache('DR17')
+        assert get_generation('query', 'DR17') == 1
+        assert get_generation('query', 'DR16') == 0
+        assert self.get_page(query)[1] == 1
+
+    def test_max_rows(self, monkeypatch):
+        monkeypatch.setitem(config._custom_config, 'query_cache_max_rows', 1)
+        query = Query(search_filter='nsa.z < 0.1', mode='local', release='DR17')
+        self.get_page(query)
+        assert self.get_page(query)[1] == 1
+
+    def test_disabled(self):
+        query = Query(search_filter='nsa.z < 0.1', mode='local', release='DR17', caching=False)
+        self.get_page(query)
+        assert self.get_page(query)[1] == 1
+        assert query._cache_hit is None
+
+    def test_results_counters(self, monkeypatch):
+        query = Query(sort='nsa.z', mode='local', release='DR17', limit=2, count_threshold=2)
+        with pytest.warns(UserWarning):
+            results = query.run()
+        assert (results.cache_hits, results.cache_misses) == (0, 0)
+
+        monkeypatch.setattr(results, '_fetch_page', lambda *args, **kwargs:
+                            {'results': [('8000-3701', 0.035)], 'cached': True})
+        results.getNext()
+        results.getNext()
+        assert (results.cache_hits, results.cache_misses) == (2, 0)
@@ -17,8 +17,10 @@ from imp import reload
 import pandas as pd
 import pytest
 import six
+from astropy.table import Table
 
 import marvin
+import marvin.tools.results
 from marvin import config
 from marvin.tools.cube import Cube
 from marvin.tools.maps import Maps
@@ -414,6 +416,29 @@ class TestResultsConvertTool(object):
         assert isinstance(results.objects[0], tool) is True
         if objtype != 'spaxel':
             assert results.mode == results.objects[0].mode
+        else:
+            assert len(results.objects) == len(results.results)
+
+    def test_convert_spaxel_rows(self, monkeypatch):
+
+        class FakeCube(object):
+            def __init__(self, plateifu, mode=None):
+                self.plateifu = plateifu
+
+            def getSpaxel(self, x=None, y=None, xyorig=None):
+                return [(self.plateifu, xx, yy) for xx, yy in zip(x, y)]
+
+        table = Table({'cube.plateifu': ['8485-1901', '7443-12701', '8485-1901'],
+                       'spaxelprop.x': [10, 11, 12], 'spaxelprop.y': [20, 21, 22]})
+
+        results = Results.__new__(Results)
+        results.columns = ParameterGroup('Columns', list(table.colnames))
+        monkeypatch.setattr(results, 'toTable', lambda: table, raising=False)
+        monkeypatch.setattr(marvin.tools.results, 'Cube', FakeCube)
+
+        results.convertToTool('spaxel', mode='local')
+        assert results.objects == [('8485-1901', 10, 20), ('7443-12701', 11, 21),
+                                   ('8485-1901', 12, 22)]
 
     @pytest.mark.parametrize('objtype, error, errmsg',
                              [('modelcube', AssertionError, "ModelCubes require a release of MPL-5 and up"),
@@ -118,6 +118,35 @@ class TestRSS(object):
         rss.load_all()
         assert all([rss_fiber.loaded is True for rss_fiber in rss])
 
+    def test_load_all_views(self, rss):
+
+        if rss.mode == 'remote':
+            pytest.skip()
+
+        rss.autoload = False
+        rss.load_all()
+
+        flux = rss.data['FLUX'].data
+        assert numpy.shares_memory(rss[3].ivar, rss.data['IVAR'].data)
+        numpy.testing.assert_array_equal(rss[3].value, flux[3])
+
+    def test_load_all_in_place(self, rss):
+
+        if rss.mode == 'remote':
+            pytest.skip()
+
+        rss.autoload = False
+        fiber = rss[3]
+        selected = rss.select_fibers(set=1)
+        assert fiber.loaded is False
+
+        rss.load_all()
+
+        assert fiber.loaded is True
+        assert fiber is rss[3]
+        assert all([rss_fiber.loaded is True for rss_fiber in selected])
+        numpy.testing.assert_array_equal(fiber.value, rss._get_bulk_data()['FLUX'].data[3])
+
     def test_obsinfo_to_rssfiber(self, rss):
 
         # We get it in this complicated way so that it is a different way of
@@ -12,8 +12,10 @@ from __future__ import absolute_import, division, print_function
 
 import itertools
 import os
+import types
 
 import astropy.io.fits
+import numpy as np
 import pytest
 
 from marvin import config
@@ -25,7 +27,8 @@ from marvin.tools.maps import Maps
 from marvin.tools.modelcube import ModelCube
 from marvin.tools.quantities import Spectrum
 from marvin.tools.spaxel import Spaxel
-from marvin.utils.datamodel.dap import Property
+from marvin.tools.spaxel import SpaxelCollection
+from marvin.utils.datamodel.dap import Property, datamodel
 from marvin.web.controllers.galaxy import get_flagged_regions
 
 
@@ -780,3 +783,55 @@ class TestModelCubeGetSpaxel(object):
         assert spaxel_getspaxel_file.binned_flux.mask[idx] == pytest.approx(mask)
         assert spaxel_getspaxel_db.binned_flux.mask[idx] == pytest.approx(mask)
         assert spaxel_getspaxel_api.binned_flux.mask[idx] == pytest.approx(mask)
+
+
+class TestSpaxelCollection(object):
+
+    def test_maps(self, galaxy):
+        maps = Maps(plateifu=galaxy.plateifu, release=galaxy.release, bintype=galaxy.bintype)
+        spaxels = maps.getSpaxel(x=[10, 11, 12], y=[15, 15, 16], xyorig='lower', lazy=True)
+
+        ha = spaxels.maps['emline_gflux_ha_6564']
+        ha_map = maps['emline_gflux_ha_6564']
+
+        assert ha.shape == (3,)
+        assert ha.unit == ha_map.unit
+        assert ha.value == pytest.approx(ha_map.value[[15, 15, 16], [10, 11, 12]])
+        assert ha.ivar == pytest.approx(ha_map.ivar[[15, 15, 16], [10, 11, 12]])
+
+        table = spaxels.to_table(properties=['emline_gflux_ha_6564', 'stellar_vel'])
+        assert table.colnames == ['x', 'y', 'emline_gflux_ha_6564', 'stellar_vel']
+        assert table['emline_gflux_ha_6564'] == pytest.approx(ha.value)
+
+    def test_maps_not_file(self):
+        maps = Maps.__new__(Maps)
+        maps.data = None
+        maps.data_origin = 'db'
+        maps.datamodel = datamodel['DR17']
+
+        value = np.arange(20.).reshape(4, 5)
+        mask = np.arange(20).reshape(4, 5) % 3
+
+        def getMap(name, exact=False):
+            prop = maps.datamodel[name]
+            return types.SimpleNamespace(value=value,
+                                         ivar=value * 2 if prop.has_ivar() else None,
+                                         mask=mask if prop.has_mask() else None)
+
+        maps.getMap = getMap
+
+        spaxels = SpaxelCollection([1, 2, 3], [0, 1, 3], cube=False, maps=maps, modelcube=False,
+                                   plateifu='8485-1901', release='DR17')
+
+        snr = spaxels.maps['spx_snr']
+        assert snr.value == pytest.approx([1., 7., 18.])
+        assert snr.ivar is None
+        assert snr.mask is None
+
+        ha = spaxels.maps['emline_gflux_ha_6564']
+        assert ha.ivar == pytest.approx([2., 14., 36.])
+        assert ha.mask.tolist() == [1, 1, 0]
+
+        subset = spaxels[1:]
+        assert subset.maps['spx_snr'].value == pytest.approx([7., 18.])
+        assert subset.maps['emline_gflux_ha_6564'].mask.tolist() == [1, 0]
@@ -13,6 +13,7 @@ from __future__ import absolute_import
 
 import inspect
 
+from astropy.io import fits
 from matplotlib import pyplot as plt
 from mpl_toolkits.axes_grid1.mpl_axes import Axes
 import numpy as np
@@ -21,7 +22,10 @@ import pytest
 from marvin.core.exceptions import MarvinError
 from marvin.tools.maps import Maps
 from tests import marvin_test_if_class
-from marvin.utils.dap.bpt import get_snr, bpt_kewley06
+from marvin.tools.quantities import Map
+from marvin.utils.dap.bpt import (get_snr, bpt_kewley06, bpt_classes, bpt_classify,
+                                  bpt_classify_many, get_class_fractions)
+from marvin.utils.datamodel.dap import datamodel
 from marvin.core.exceptions import MarvinDeprecationWarning
 
 
@@ -131,3 +135,80 @@ class TestGetSNR(object):
         default = inspect.getfullargspec(get_snr).defaults[0]
 
         assert get_snr({'ha': 5, 'hb': 4}, 'xx') == default
+
+
+class FakeMaps(object):
+    """A Maps with random emission line fluxes."""
+
+    def __init__(self, data_origin='file', seed=1):
+
+        rng = np.random.default_rng(seed)
+        shape = (60, 50)
+
+        self.datamodel = datamodel['DR17'].properties
+        self.data_origin = data_origin
+        self.plateifu = '1-{0}'.format(seed)
+
+        nchannels = max(prop.channel.idx for prop in self.datamodel
+                        if prop.name == 'emline_gflux') + 1
+        flux_shape = (nchannels,) + shape
+
+        # Log-uniform fluxes that cover all the regions of the diagrams.
+        flux = 10 ** rng.uniform(-1.5, 1.5, flux_shape)
+        flux[rng.uniform(size=flux_shape) < 0.02] *= -1
+
+        self.data = fits.HDUList([
+            fits.PrimaryHDU(),
+            fits.ImageHDU(flux.astype('>f4'), name='EMLINE_GFLUX'),
+            fits.ImageHDU(rng.uniform(0, 1e3, flux_shape).astype('>f4'),
+                          name='EMLINE_GFLUX_IVAR'),
+            fits.ImageHDU(rng.choice([0] * 48 + [1, 2 ** 30], flux_shape).astype('>i4'),
+                          name='EMLINE_GFLUX_MASK')])
+
+    def __getitem__(self, name):
+        prop = self.datamodel[name]
+        idx = prop.channel.idx
+        gflux = Map(self.data['EMLINE_GFLUX'].data[idx], unit=prop.unit,
+                    ivar=self.data['EMLINE_GFLUX_IVAR'].data[idx],
+                    mask=self.data['EMLINE_GFLUX_MASK'].data[idx],
+                    pixmask_flag=prop.pixmask_flag)
+        gflux._datamodel = prop
+        return gflux
+
+
+class TestBPTClassify(object):
+
+    @pytest.mark.parametrize('data_origin', ['file', 'api'])
+    @pytest.mark.parametrize('use_oi', [True, False])
+    @pytest.mark.parametrize('snr_min', [3, {'ha': 5, 'sii': 1}])
+    def test_classify(self, data_origin, use_oi, snr_min):
+
+        maps = FakeMaps(data_origin=data_origin)
+
+        masks = bpt_kewley06(maps, snr_min=snr_min, use_oi=use_oi, return_figure=False)
+        classes = bpt_classify(maps, snr_min=snr_min, use_oi=use_oi)
+
+        assert classes.dtype == np.int8
+        for name, code in bpt_classes.items():
+            assert masks[name]['global'].sum() > 0
+            assert ((classes == code) == masks[name]['global']).all()
+
+    def test_fractions(self):
+
+        classes = np.array([[0, 1, 1], [2, 5, 0]], dtype=np.int8)
+        fractions = get_class_fractions(classes)
+
+        assert fractions['n_valid'] == 4
+        assert fractions['sf'] == 0.5
+        assert fractions['seyfert'] == 0
+        assert 'invalid' not in fractions
+
+        assert np.isnan(get_class_fractions(np.zeros(3, dtype=np.int8))['sf'])
+
+    def test_classify_many(self):
+
+        galaxies = [FakeMaps(seed=1), FakeMaps(seed=2)]
+        results = bpt_classify_many(galaxies, processes=1, fractions=True)
+
+        assert list(results.keys()) == ['1-1', '1-2']
+        assert results['1-2'] == get_class_fractions(bpt_classify(galaxies[1]))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_expression.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from astropy import units
+from astropy.io import fits
+
+from marvin.core.exceptions import MarvinError
+from marvin.tools.quantities import Map
+from marvin.utils.dap.expression import Expression, get_expression
+from marvin.utils.datamodel.dap import datamodel
+
+
+properties = datamodel['DR17'].properties
+
+
+@pytest.fixture()
+def maps():
+    rng = np.random.default_rng(1)
+    shape = (6, 5)
+
+    nchannels = max(prop.channel.idx for prop in properties if prop.name == 'emline_gflux') + 1
+    flux_shape = (nchannels,) + shape
+
+    hdulist = fits.HDUList([
+        fits.PrimaryHDU(),
+        fits.ImageHDU(rng.uniform(0.5, 10, flux_shape).astype('>f4'), name='EMLINE_GFLUX'),
+        fits.ImageHDU(rng.uniform(0.5, 2, flux_shape).astype('>f4'), name='EMLINE_GFLUX_IVAR'),
+        fits.ImageHDU(rng.choice([0, 0, 0, 4], flux_shape).astype('>i4'),
+                      name='EMLINE_GFLUX_MASK')])
+
+    # A spaxel with zero flux, which makes the ratio infinite.
+    hdulist['EMLINE_GFLUX'].data[properties['emline_gflux_ha_6564'].channel.idx, 0, 0] = 0
+
+    return SimpleNamespace(data=hdulist, _shape=shape, data_origin='file')
+
+
+def get_map(maps, name):
+    prop = properties[name]
+    idx = prop.channel.idx
+    return Map(maps.data['EMLINE_GFLUX'].data[idx].astype(float), unit=prop.unit,
+               ivar=maps.data['EMLINE_GFLUX_IVAR'].data[idx].astype(float),
+               mask=maps.data['EMLINE_GFLUX_MASK'].data[idx].astype(int),
+               pixmask_flag=prop.pixmask_flag)
+
+
+class TestExpression(object):
+
+    @pytest.mark.parametrize('expression', ['nii / ha', 'nii_6585/ha_6564',
+                                            'emline_gflux_nii_6585 / emline_gflux_ha_6564'])
+    def test_names(self, expression):
+        parsed = Expression(expression, properties)
+        assert [prop.full() for prop in parsed.properties] == ['emline_gflux_nii_6585',
+                                                               'emline_gflux_ha_6564']
+        assert parsed.unit == units.dimensionless_unscaled
+
+    def test_alias_expression(self):
+        parsed = Expression('sii / ha', properties)
+        assert len(parsed.properties) == 3
+
+    @pytest.mark.parametrize('expression, error',
+                             [('nii / ', 'invalid expression'),
+                              ('hb ** ha', 'exponents must be numbers'),
+                              ('__import__("os")', 'unsupported element'),
+                              ('ha.value', 'unsupported element'),
+                              ('oii / ha', 'is ambiguous'),
+                              ('1 + 2', 'does not include any property'),
+                              ('ha + stellar_vel', 'cannot add or subtract')])
+    def test_bad_expression(self, expression, error):
+        with pytest.raises(MarvinError, match=error):
+            Expression(expression, properties)
+
+    def test_get_expression_cached(self):
+        assert get_expression('nii / ha', 'DR17') is get_expression('nii / ha', 'DR17')
+
+    @pytest.mark.parametrize('chunk_size', [None, 10])
+    def test_ratio(self, maps, chunk_size):
+        nii = get_map(maps, 'emline_gflux_nii_6585')
+        ha = get_map(maps, 'emline_gflux_ha_6564')
+        expected = nii / ha
+
+        ratio = Expression('nii / ha', properties).evaluate(maps, chunk_size=chunk_size)
+
+        assert ratio.unit == expected.unit
+        assert ratio.value == pytest.approx(expected.value)
+        assert ratio.ivar == pytest.approx(expected.ivar)
+        assert (ratio.mask == expected.mask).all()
+        assert ratio.pixmask.get_mask('DONOTUSE')[0, 0] > 0
+
+    def test_log10(self, maps):
+        nii = get_map(maps, 'emline_gflux_nii_6585')
+        hb = get_map(maps, 'emline_gflux_hb_4862')
+
+        result = Expression('log10(2 * nii / hb)', properties).evaluate(maps)
+
+        ratio = 2 * nii.value / hb.value
+        sigma_ratio = ratio * (nii.error.value / nii.value + hb.error.value / hb.value)
+
+        assert result.value == pytest.approx(np.log10(ratio))
+        assert result.error.value == pytest.approx(sigma_ratio / (ratio * np.log(10)))
+        assert (result.mask == (nii.mask | hb.mask)).all()
+
+    def test_power(self, maps):
+        ha = get_map(maps, 'emline_gflux_ha_6564')
+
+        result = Expression('-ha ** 0.5', properties).evaluate(maps)
+
+        assert result.unit == ha.unit ** 0.5
+        assert result.value[1:] == pytest.approx(-ha.value[1:] ** 0.5)
+        assert result.error.value[1:] == pytest.approx(0.5 * ha.error.value[1:] /
+                                                       ha.value[1:] ** 0.5)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_fitscache.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from marvin import config
+from marvin.utils.general.fitscache import FITSFileCache, get_fits_cache
+
+
+def make_gzip_fits(path, size=10):
+    hdulist = fits.HDUList([fits.PrimaryHDU(),
+                            fits.ImageHDU(np.arange(size * 4 * 4, dtype=np.float32)
+                                          .reshape(size, 4, 4), name='FLUX')])
+    hdulist.writeto(str(path))
+    return str(path)
+
+
+@pytest.fixture()
+def fitscache(tmp_path):
+    return FITSFileCache(path=str(tmp_path / 'cache'))
+
+
+class TestFITSFileCache(object):
+
+    def test_open_decompresses_once(self, tmp_path, fitscache):
+        filename = make_gzip_fits(tmp_path / 'cube.fits.gz')
+
+        with fitscache.open(filename) as hdulist:
+            assert hdulist['FLUX'].data[2, 1, 1] == 2 * 16 + 5
+
+        entries = fitscache.entries()
+        assert len(entries) == 1
+        assert entries[0][0].endswith('cube.fits')
+
+        cached = fitscache.get(filename)
+        assert cached == entries[0][0]
+        assert len(fitscache.entries()) == 1
+
+    def test_modified_file_is_a_new_entry(self, tmp_path, fitscache):
+        filename = make_gzip_fits(tmp_path / 'cube.fits.gz')
+        first = fitscache.get(filename)
+
+        os.remove(filename)
+        make_gzip_fits(tmp_path / 'cube.fits.gz', size=12)
+        os.utime(filename, (0, 0))
+
+        assert fitscache.get(filename) != first
+
+    def test_uncompressed_file_is_not_cached(self, tmp_path, fitscache):
+        filename = str(tmp_path / 'cube.fits')
+        fits.PrimaryHDU(np.zeros((2, 2))).writeto(filename)
+
+        with fitscache.open(filename) as hdulist:
+            assert hdulist[0].data.shape == (2, 2)
+
+        assert len(fitscache.entries()) == 0
+
+    def test_prune_removes_least_recently_used(self, tmp_path, fitscache):
+        first = fitscache.get(make_gzip_fits(tmp_path / 'first.fits.gz'))
+        second = fitscache.get(make_gzip_fits(tmp_path / 'second.fits.gz'))
+        os.utime(first, (1, 1))
+
+        fitscache.max_size = os.path.getsize(second)
+        fitscache.prune()
+
+        paths = [entry[0] for entry in fitscache.entries()]
+        assert paths == [second]
+
+    def test_clear(self, tmp_path, fitscache):
+        fitscache.get(make_gzip_fits(tmp_path / 'cube.fits.gz'))
+        fitscache.clear()
+        assert fitscache.size == 0
+
+    def test_get_fits_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setitem(config._custom_config, 'use_file_cache', False)
+        assert get_fits_cache() is None
+
+        monkeypatch.setitem(config._custom_config, 'use_file_cache', True)
+        monkeypatch.setitem(config._custom_config, 'file_cache_dir', str(tmp_path))
+        monkeypatch.setitem(config._custom_config, 'file_cache_size', 1)
+        fitscache = get_fits_cache()
+        assert fitscache.path == os.path.realpath(str(tmp_path))
+        assert fitscache.max_size == 1e9
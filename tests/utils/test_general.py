@@ -35,7 +35,8 @@ from marvin.utils.general import (convertCoords, get_nsa_data, getWCSFromPng,
                                   _sort_dir, getDapRedux, getDefaultMapPath, target_status,
                                   target_is_observed, downloadList, check_versions,
                                   get_manga_image, get_drpall_path, get_dapall_path,
-                                  get_drpall_table, get_dapall_table)
+                                  get_drpall_table, get_dapall_table, getSpaxelIndices,
+                                  encode_array, decode_array)
 from marvin.utils.datamodel.dap import datamodel
 
 
@@ -149,6 +150,44 @@ class TestConvertCoords(object):
         assert 'some indices are out of limits' in str(cm.value)
 
 
+class TestGetSpaxelIndices(object):
+
+    def test_pix_lower(self):
+        ii, jj = getSpaxelIndices(x=[1, 2, 5], y=[3, 3, 0], xyorig='lower', shape=(10, 8))
+        assert ii.tolist() == [3, 3, 0]
+        assert jj.tolist() == [1, 2, 5]
+
+    def test_pix_center(self):
+        ii, jj = getSpaxelIndices(x=0, y=[-1], xyorig='center', shape=(10, 10))
+        assert ii.tolist() == [4]
+        assert jj.tolist() == [5]
+
+    def test_out_of_limits(self):
+        with pytest.raises(MarvinError) as ee:
+            getSpaxelIndices(x=[1, 20], y=[1, 1], xyorig='lower', shape=(10, 10))
+        assert 'some indices are out of limits' in str(ee.value)
+
+    def test_mismatched_sizes(self):
+        with pytest.raises(AssertionError) as ee:
+            getSpaxelIndices(x=[1, 2], y=[1], xyorig='lower', shape=(10, 10))
+        assert 'x and y must have the same size' in str(ee.value)
+
+
+class TestEncodeArray(object):
+
+    @pytest.mark.parametrize('array', [np.arange(12, dtype='>f4').reshape(3, 4),
+                                       np.arange(5, dtype=np.int64)[::2],
+                                       np.array([[True, False]])])
+    def test_roundtrip(self, array):
+        encoded = encode_array(array)
+        assert isinstance(encoded['buffer'], str)
+
+        decoded = decode_array(encoded)
+        assert decoded.dtype == array.dtype
+        assert decoded.flags.writeable
+        np.testing.assert_array_equal(decoded, array)
+
+
 class TestGetNSAData(object):
 
     def _test_nsa(self, galaxy, data):
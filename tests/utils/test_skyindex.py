@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_skyindex.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import numpy as np
+import pytest
+
+import marvin.utils.general.general
+from marvin import config
+from marvin.utils.general.skyindex import SkyIndex, get_sky_index
+
+
+def separation(ra, dec, ra0, dec0):
+    ra, dec, ra0, dec0 = map(np.radians, (ra, dec, ra0, dec0))
+    hav = (np.sin((dec - dec0) / 2.) ** 2 +
+           np.cos(dec) * np.cos(dec0) * np.sin((ra - ra0) / 2.) ** 2)
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(hav, 0, 1))))
+
+
+@pytest.fixture()
+def positions():
+    rng = np.random.RandomState(42)
+    ra = rng.uniform(0, 360, 2000)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, 2000)))
+
+    # a pole, both sides of ra = 0, and invalid positions
+    ra[:4], dec[:4] = [10., 0.01, 359.99, np.nan], [90., 5., 5., 10.]
+    dec[4] = 95.
+    return ra, dec
+
+
+@pytest.fixture()
+def drpall(monkeypatch, tmpdir, drpall_table):
+    path = str(tmpdir.join('drpall.fits'))
+    drpall_table.write(path, format='fits')
+
+    monkeypatch.setitem(config._custom_config, 'sky_index_dir', str(tmpdir.join('cache')))
+    monkeypatch.setattr(marvin.utils.general.general, 'drpTable', {})
+    return path
+
+
+class TestSkyIndex(object):
+
+    @pytest.mark.parametrize('radius', [0.5, 5., 30., 200.])
+    def test_cone(self, positions, radius):
+        ra, dec = positions
+        index = SkyIndex(ra, dec)
+
+        centres = [(0., 5.), (180., 89.), (45., -30.), (270., 0.)]
+        matches = index.cone([cc[0] for cc in centres], [cc[1] for cc in centres], radius)
+        for (ra0, dec0), match in zip(centres, matches):
+            with np.errstate(invalid='ignore'):
+                expected = np.nonzero((separation(ra, dec, ra0, dec0) <= radius) &
+                                      (np.abs(dec) <= 90))[0]
+            assert match.tolist() == expected.tolist()
+
+        assert index.cone(0., 5., radius).tolist() == matches[0].tolist()
+
+    def test_cone_wraps(self, positions):
+        index = SkyIndex(*positions)
+        assert {1, 2} <= set(index.cone(0., 5., 0.1).tolist())
+        assert 0 in index.cone(200., 89.99, 0.1)
+
+    def test_invalid(self, positions):
+        index = SkyIndex(*positions)
+        assert len(index) == 2000
+        assert 3 not in index.cone(0., 10., 180.)
+        assert 4 not in index.cone(0., 10., 180.)
+
+    def test_crossmatch(self, positions):
+        ra, dec = positions
+        index = SkyIndex(ra, dec)
+
+        rng = np.random.RandomState(1)
+        ra1, dec1 = ra[5:505] + rng.normal(0, 1e-4, 500), dec[5:505]
+        ra1[:10] += 10.
+
+        match, sep = index.crossmatch(ra1, dec1, 3 / 3600.)
+        assert (match[:10] == -1).all()
+        assert np.isnan(sep[:10]).all()
+        assert match[10:].tolist() == list(range(15, 505))
+        assert np.allclose(sep[10:], separation(ra1[10:], dec1[10:], ra[15:505], dec[15:505]))
+
+    def test_crossmatch_radius(self, positions):
+        index = SkyIndex(*positions)
+        match, __ = index.crossmatch([ra + 0.01 for ra in positions[0][5:7]],
+                                     positions[1][5:7], [1e-5, 1.])
+        assert match.tolist() == [-1, 6]
+
+    def test_search_around(self, positions):
+        ra, dec = positions
+        index = SkyIndex(ra, dec)
+
+        input_index, match, sep = index.search_around([0., 45.], [5., -30.], 10.)
+        assert sorted(match[input_index == 0].tolist()) == index.cone(0., 5., 10.).tolist()
+        assert np.allclose(sep, separation(ra[match], dec[match],
+                                           np.array([0., 45.])[input_index],
+                                           np.array([5., -30.])[input_index]))
+        assert (sep <= 10.).all()
+
+    def test_empty(self):
+        index = SkyIndex([np.nan], [0.])
+        assert index.cone(0., 0., 1.).tolist() == []
+        match, sep = index.crossmatch([0.], [0.], 1.)
+        assert match.tolist() == [-1]
+
+    def test_from_drpall(self, drpall, drpall_table, tmpdir):
+        index = SkyIndex.from_drpall('v3_1_1', drpall=drpall)
+        cached = tmpdir.join('cache', 'drpall_v3_1_1.npz')
+        assert cached.check()
+
+        assert index.names.tolist() == drpall_table['plateifu'].tolist()
+        assert index.names[index.cone(232.6, 48.6, 1.)].tolist() == ['8485-1901', '8485-1902']
+
+        # the cache is used without the DRPall file, and rebuilt when it changes
+        os.remove(drpall)
+        assert SkyIndex.from_drpall('v3_1_1', drpall=drpall).names.tolist() == \
+            index.names.tolist()
+
+        drpall_table[:3].write(drpall, format='fits')
+        marvin.utils.general.general.drpTable.clear()
+        assert len(SkyIndex.from_drpall('v3_1_1', drpall=drpall)) == 3
+
+    def test_get_sky_index(self, drpall, drpall_table):
+        index = get_sky_index('v3_1_1', drpall=drpall)
+        assert get_sky_index('v3_1_1', drpall=drpall) is index
+        assert get_sky_index('v3_1_1', drpall=drpall_table) is not index
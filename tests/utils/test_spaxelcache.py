@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_spaxelcache.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from marvin.utils.general.spaxelcache import SpaxelMajorCache, get_spaxel_cache
+
+
+@pytest.fixture()
+def cubefile(tmp_path):
+    flux = np.arange(20 * 5 * 4, dtype='>f4').reshape(20, 5, 4)
+    hdulist = fits.HDUList([fits.PrimaryHDU(),
+                            fits.ImageHDU(flux, name='FLUX'),
+                            fits.ImageHDU(flux * 2, name='IVAR'),
+                            fits.ImageHDU(np.arange(20, dtype='>f8'), name='WAVE')])
+    filename = str(tmp_path / 'manga-1-1-LOGCUBE.fits.gz')
+    hdulist.writeto(filename)
+    return filename
+
+
+class TestSpaxelMajorCache(object):
+
+    def test_path(self, cubefile):
+        spaxel_cache = SpaxelMajorCache(cubefile)
+        assert spaxel_cache.path.endswith('manga-1-1-LOGCUBE.spaxel')
+        assert get_spaxel_cache(cubefile) is None
+
+    def test_build(self, cubefile):
+        spaxel_cache = SpaxelMajorCache(cubefile)
+        assert spaxel_cache.build() == ['FLUX', 'IVAR']
+        assert spaxel_cache.extensions() == ['FLUX', 'IVAR']
+        assert spaxel_cache.build() == []
+
+        transposed = spaxel_cache.get('flux')
+        assert transposed.shape == (5, 4, 20)
+        assert transposed.dtype.isnative
+
+        assert isinstance(get_spaxel_cache(cubefile), SpaxelMajorCache)
+
+    def test_read(self, cubefile):
+        spaxel_cache = SpaxelMajorCache(cubefile)
+
+        with fits.open(cubefile) as hdulist:
+            data = hdulist['IVAR'].data
+            expected = spaxel_cache.read(hdulist, 'IVAR', 3, 2)
+            np.testing.assert_array_equal(expected, data[:, 3, 2])
+
+            spaxel_cache.build(hdulist=hdulist, extnames=['IVAR'])
+            np.testing.assert_array_equal(spaxel_cache.read(hdulist, 'IVAR', 3, 2), expected)
+
+            spectra = spaxel_cache.read(hdulist, 'IVAR', np.array([0, 4]), np.array([1, 3]))
+            assert spectra.shape == (2, 20)
+            np.testing.assert_array_equal(spectra[1], data[:, 4, 3])
+
+    def test_stale(self, cubefile):
+        spaxel_cache = SpaxelMajorCache(cubefile)
+        spaxel_cache.build(extnames=['FLUX'])
+
+        os.utime(spaxel_cache._get_array_path('FLUX'), (0, 0))
+        assert not spaxel_cache.exists('FLUX')
+        assert spaxel_cache.get('FLUX') is None
+
+    def test_clear(self, cubefile):
+        spaxel_cache = SpaxelMajorCache(cubefile)
+        spaxel_cache.build()
+        spaxel_cache.clear()
+
+        assert not os.path.exists(spaxel_cache.path)
+        assert get_spaxel_cache(cubefile) is None
@@ -9,7 +9,10 @@
 # @Last Modified time: 2017-06-12 19:13:15
 
 from __future__ import print_function, division, absolute_import
-from marvin.utils.general.structs import Dotable, DotableCaseInsensitive
+import pickle
+
+import marvin.utils.general.structs as structs
+from marvin.utils.general.structs import Dotable, DotableCaseInsensitive, FuzzyDict, FuzzyList
 import pytest
 
 from collections import OrderedDict
@@ -39,3 +42,90 @@ class TestCoreDotable(object):
         assert dotdictci[key.upper()] == dotdictci.__getattr__(key.lower())
         assert dotdictci[key.lower()] == dotdictci.__getattr__(key.upper())
         assert dotdictci[key.lower()] == dotdictci.__getattr__(key.lower())
+
+
+fuzzy_keys = ['emline_gflux_ha_6564', 'emline_gflux_hb_4862', 'stellar_vel']
+
+
+@pytest.fixture()
+def fuzzylist():
+    return FuzzyList(fuzzy_keys)
+
+
+class TestFuzzyList(object):
+
+    @pytest.mark.parametrize('value', [('emline_gflux_ha_6564'), ('EMLINE GFLUX HA 6564'),
+                                       ('gflux ha')])
+    def test_getitem(self, fuzzylist, value):
+        assert fuzzylist[value] == 'emline_gflux_ha_6564'
+
+    def test_getattr(self, fuzzylist):
+        assert fuzzylist.stellar_vel == 'stellar_vel'
+        with pytest.raises(AttributeError):
+            fuzzylist.stellar
+
+    def test_memoised(self, fuzzylist, monkeypatch):
+        assert fuzzylist['gflux hb'] == 'emline_gflux_hb_4862'
+
+        monkeypatch.setattr(fuzzylist, 'use_fuzzy', None)
+        assert fuzzylist['gflux hb'] == 'emline_gflux_hb_4862'
+
+    def test_bad_value(self, fuzzylist):
+        assert 'emline_bad' not in fuzzylist
+        with pytest.raises(ValueError):
+            fuzzylist['emline_bad']
+
+    def test_lru_size(self, fuzzylist, monkeypatch):
+        monkeypatch.setattr(structs, '_fuzzy_cache_size', 1)
+        fuzzylist['gflux hb']
+        fuzzylist['gflux ha']
+        assert len(structs._fuzzy_cache) == 1
+
+    @pytest.mark.parametrize('mutate', [(lambda ll: ll.append('gflux_hb')),
+                                        (lambda ll: ll.insert(0, 'gflux_hb')),
+                                        (lambda ll: ll.__setitem__(2, 'gflux_hb')),
+                                        (lambda ll: ll.extend(['gflux_hb']))])
+    def test_invalidation(self, fuzzylist, mutate):
+        assert fuzzylist['gflux hb'] == 'emline_gflux_hb_4862'
+        mutate(fuzzylist)
+        assert fuzzylist['gflux hb'] == 'gflux_hb'
+
+    def test_pop(self, fuzzylist):
+        assert fuzzylist.stellar_vel == 'stellar_vel'
+        fuzzylist.pop()
+        assert 'stellar_vel' not in fuzzylist
+        assert fuzzylist['gflux hb'] == 'emline_gflux_hb_4862'
+
+    def test_pickle(self, fuzzylist):
+        assert fuzzylist['gflux hb'] == 'emline_gflux_hb_4862'
+
+        unpickled = pickle.loads(pickle.dumps(fuzzylist))
+        assert '_fuzzy_index' not in unpickled.__dict__
+        assert unpickled['gflux ha'] == 'emline_gflux_ha_6564'
+
+
+class TestFuzzyDict(object):
+
+    def test_pickle(self):
+        fuzzydict = FuzzyDict((key, ii) for ii, key in enumerate(fuzzy_keys))
+        assert fuzzydict['gflux hb'] == 1
+
+        unpickled = pickle.loads(pickle.dumps(fuzzydict))
+        assert '_fuzzy_index' not in unpickled.__dict__
+        assert unpickled['gflux hb'] == 1
+        assert unpickled._get_fuzzy_index().token != fuzzydict._get_fuzzy_index().token
+
+    def test_getitem(self):
+        fuzzydict = FuzzyDict((key, ii) for ii, key in enumerate(fuzzy_keys))
+        assert fuzzydict['stellar_vel'] == 2
+        assert fuzzydict['Stellar Vel'] == 2
+        assert fuzzydict['gflux hb'] == 1
+        assert fuzzydict.emline_gflux_ha_6564 == 0
+
+    def test_invalidation(self):
+        fuzzydict = FuzzyDict((key, ii) for ii, key in enumerate(fuzzy_keys))
+        assert fuzzydict['gflux hb'] == 1
+        fuzzydict['gflux_hb'] = 5
+        assert fuzzydict['gflux hb'] == 5
+        del fuzzydict['gflux_hb']
+        assert fuzzydict['gflux hb'] == 1
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_summary.py
+#
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+
+from __future__ import absolute_import, division, print_function
+
+import pytest
+from sqlalchemy_boolean_search import parse_boolean_search
+
+from marvin import config
+from marvin.core.exceptions import MarvinError
+from marvin.utils.general.skyindex import get_sky_index
+from marvin.utils.general.summary import SummaryQuery
+
+
+@pytest.fixture()
+def summary(drpall_table, dapall_table):
+    return SummaryQuery('v3_1_1', '3.1.0', release='DR17', drpall=drpall_table,
+                        dapall=dapall_table)
+
+
+def run(summary, search_filter, params=('cube.plateifu',)):
+    summary.params = list(params)
+    summary.filter(parse_boolean_search(search_filter))
+    return [row[0] for row in summary.all()]
+
+
+class TestSummaryQuery(object):
+
+    @pytest.mark.parametrize('name, full', [('z', 'nsa.z'),
+                                            ('mangaid', 'cube.mangaid'),
+                                            ('nsa.logmass', 'nsa.elpetro_logmass'),
+                                            ('cube.plate', 'cube.plate')])
+    def test_get_full_name(self, summary, name, full):
+        assert summary.get_full_name(name) == full
+
+    @pytest.mark.parametrize('name', ['spaxelprop.emline_gflux_ha_6564', 'cube.unknown',
+                                      'not_a_parameter'])
+    def test_get_full_name_fails(self, summary, name):
+        with pytest.raises(MarvinError):
+            summary.get_full_name(name)
+
+    @pytest.mark.parametrize('search_filter, expected',
+                             [('nsa.z < 0.03', ['8485-1902', '7443-1901']),
+                              ('z < 0.03 and not cube.plate == 7443', ['8485-1902']),
+                              ('nsa.z between 0.03 and 0.05', ['8485-1901', '8000-3701']),
+                              ('cube.plateifu = 8485*', ['8485-1901', '8485-1902']),
+                              ('cube.mangaid = 2091', ['8485-1902']),
+                              ('cube.manga_target1 & 1024 or cube.quality & 64',
+                               ['8485-1901', '8485-1902', '8000-3701']),
+                              ('nsa.elpetro_logmass > 10.5', ['8485-1901', '7443-12701']),
+                              ('nsa.elpetro_absmag_g_r >= 0.5', ['8485-1901', '7443-12701',
+                                                                 '8000-3701'])])
+    def test_filter(self, summary, search_filter, expected):
+        assert run(summary, search_filter) == expected
+
+    def test_dapall(self, summary):
+        plateifus = run(summary, 'dapall.sfr_1re > 0.1 and template.name = *MASTARHC2',
+                        params=['cube.plateifu', 'bintype.name', 'dapall.sfr_1re'])
+        assert plateifus == ['8485-1901', '7443-12701']
+        assert summary.all()[0] == ('8485-1901', 'HYB10', 0.6)
+
+    def test_cone(self, summary):
+        summary.cone(232.544, 48.690, 0.5)
+        assert run(summary, 'nsa.z < 1') == ['8485-1901', '8485-1902']
+
+    def test_cone_file(self, monkeypatch, tmpdir, drpall_table, dapall_table):
+        drpall = str(tmpdir.join('drpall.fits'))
+        drpall_table.write(drpall, format='fits')
+        monkeypatch.setitem(config._custom_config, 'sky_index_dir', str(tmpdir.join('skyindex')))
+
+        summary = SummaryQuery('v3_1_1', '3.1.0', release='DR17', drpall=drpall,
+                               dapall=dapall_table)
+        summary.cone(232.544, 48.690, 0.5)
+        assert run(summary, 'nsa.z < 1') == ['8485-1901', '8485-1902']
+
+        # the index of the file is cached on disk for the drpver
+        assert summary._get_sky_index() is get_sky_index('v3_1_1', drpall=drpall)
+        assert tmpdir.join('skyindex', 'drpall_v3_1_1.npz').check()
+
+    def test_order_slice(self, summary):
+        summary.params = ['cube.plateifu', 'nsa.z']
+        summary.order_by('z', order='desc')
+
+        assert summary.count() == 5
+        assert [row[0] for row in summary.slice(1, 3).all()] == ['8485-1901', '8000-3701']
+        assert summary.from_self().all()[0] == ('7443-12701', 0.117)